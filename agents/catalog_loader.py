@@ -0,0 +1,170 @@
+import os
+import csv
+import json
+import asyncio
+import hashlib
+import logging
+from typing import Callable, Dict, Any, Iterator, Optional, Set, Tuple
+
+from agents.product_catalog import Product, ProductCatalog
+
+logger = logging.getLogger(__name__)
+
+# CSV columns holding lists are "|"-separated
+_CSV_LIST_FIELDS = ("features", "aliases")
+
+
+class CatalogLoader:
+    """Loads the product catalog from a JSON-lines or CSV file.
+
+    Files are streamed row by row. Each row's raw bytes are hashed; rows whose
+    hash is unchanged since the previous load reuse the existing ``Product``
+    object without being parsed again, so a reload costs one sequential read
+    plus work proportional to the rows that actually changed.
+    """
+
+    def __init__(self, path: str, incremental_ratio: float = 0.1):
+        self.path = path
+        # Above this fraction of changed rows a full index rebuild is cheaper
+        self.incremental_ratio = incremental_ratio
+        self.format = "csv" if path.lower().endswith(".csv") else "jsonl"
+        self._signature: Optional[Tuple[int, int]] = None
+        self._row_products: Dict[bytes, Product] = {}
+        self.catalog: Optional[ProductCatalog] = None
+
+    def _stat_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def has_changed(self) -> bool:
+        """Cheap mtime/size check; no file contents are read"""
+        try:
+            return self._stat_signature() != self._signature
+        except FileNotFoundError:
+            return False
+
+    def _iter_rows(self) -> Iterator[Tuple[bytes, Callable[[], Dict[str, Any]]]]:
+        """Yield (row digest, lazy parser) pairs"""
+        if self.format == "csv":
+            with open(self.path, newline="", encoding="utf-8") as handle:
+                reader = csv.reader(handle)
+                header = next(reader, None)
+                if header is None:
+                    return
+                for row in reader:
+                    if not any(row):
+                        continue
+                    digest = hashlib.blake2b("\x1f".join(row).encode("utf-8"), digest_size=16).digest()
+                    yield digest, (lambda row=row: self._parse_csv_row(header, row))
+        else:
+            with open(self.path, "rb") as handle:
+                for line in handle:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    digest = hashlib.blake2b(line, digest_size=16).digest()
+                    yield digest, (lambda line=line: json.loads(line))
+
+    @staticmethod
+    def _parse_csv_row(header, row) -> Dict[str, Any]:
+        record = dict(zip(header, row))
+        for field in _CSV_LIST_FIELDS:
+            value = record.get(field)
+            record[field] = [item.strip() for item in value.split("|") if item.strip()] if value else []
+        return record
+
+    def load(self) -> Tuple[ProductCatalog, Set[str]]:
+        """Read the file and return (catalog, changed SKUs)"""
+        signature = self._stat_signature()
+        previous = self.catalog
+        row_products: Dict[bytes, Product] = {}
+        products = []
+        upserts = []
+        version_hash = hashlib.sha1()
+
+        for digest, parse in self._iter_rows():
+            product = self._row_products.get(digest)
+            if product is None:
+                record = parse()
+                product = Product(record.pop("sku"), record)
+                upserts.append(product)
+            row_products[digest] = product
+            products.append(product)
+            version_hash.update(digest)
+
+        version = version_hash.hexdigest()[:12]
+        if previous is None:
+            catalog = ProductCatalog(products, version=version)
+            changed = set(catalog.skus())
+        else:
+            seen = {product.sku for product in products}
+            removed = [sku for sku in previous.skus() if sku not in seen]
+            changed = {product.sku for product in upserts} | set(removed)
+            if len(changed) <= self.incremental_ratio * max(len(products), 1):
+                catalog = previous.with_changes(upserts, removed, version=version)
+            else:
+                catalog = ProductCatalog(products, version=version)
+
+        # Commit loader state only once the whole file parsed cleanly
+        self._row_products = row_products
+        self._signature = signature
+        self.catalog = catalog
+        return catalog, changed
+
+
+class CatalogWatcher:
+    """Polls a catalog file and hot-swaps it into the chat agent"""
+
+    def __init__(self, loader: CatalogLoader, apply: Callable[[ProductCatalog, Set[str]], Any],
+                 interval: float = None):
+        self.loader = loader
+        self.apply = apply
+        self.interval = interval if interval is not None else float(os.getenv("CATALOG_RELOAD_INTERVAL", 5))
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    async def reload_if_changed(self) -> bool:
+        if not self.loader.has_changed():
+            return False
+        try:
+            # Parse off the event loop; the swap itself happens back on the loop
+            catalog, changed = await asyncio.to_thread(self.loader.load)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Catalog reload failed, keeping previous catalog: {str(e)}")
+            return False
+        self.last_error = None
+        if changed:
+            result = self.apply(catalog, changed)
+            if asyncio.iscoroutine(result):
+                await result
+            self.reloads += 1
+        return bool(changed)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.reload_if_changed()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.loader.path,
+            "catalog_version": self.loader.catalog.version if self.loader.catalog else None,
+            "products": len(self.loader.catalog) if self.loader.catalog else 0,
+            "reloads": self.reloads,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,91 @@
+import os
+import time
+import logging
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open trial requests.
+
+    Closed: calls flow; ``failure_threshold`` consecutive failures (slow
+    calls count as failures) trip it open. Open: calls are rejected until
+    ``open_seconds`` pass. Half-open: up to ``half_open_calls`` trial calls
+    are let through; a success closes the breaker, a failure re-opens it.
+    """
+
+    def __init__(self, name: str, config: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.config = {
+            "failure_threshold": int(os.getenv("HF_BREAKER_FAILURES", 5)),
+            "open_seconds": float(os.getenv("HF_BREAKER_OPEN_SECONDS", 30)),
+            "half_open_calls": int(os.getenv("HF_BREAKER_HALF_OPEN_CALLS", 1)),
+            "slow_call_seconds": float(os.getenv("HF_SLOW_CALL_SECONDS", 15)),
+        }
+        if config:
+            self.config.update(config)
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trials_in_flight = 0
+        self.counters = {"rejected": 0, "trips": 0}
+
+    def allow_request(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.config["open_seconds"]:
+                self.counters["rejected"] += 1
+                return False
+            self.state = HALF_OPEN
+            self._trials_in_flight = 0
+            logger.info(f"Circuit {self.name} half-open: probing upstream")
+        if self.state == HALF_OPEN:
+            if self._trials_in_flight >= self.config["half_open_calls"]:
+                self.counters["rejected"] += 1
+                return False
+            self._trials_in_flight += 1
+        return True
+
+    def record_success(self, seconds: float):
+        if seconds >= self.config["slow_call_seconds"]:
+            self.record_failure()
+            return
+        if self.state == HALF_OPEN:
+            logger.info(f"Circuit {self.name} closed: upstream recovered")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._trials_in_flight = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.config["failure_threshold"]:
+            self._trip()
+
+    def release(self):
+        """Give back a half-open trial slot for a call that never completed"""
+        if self.state == HALF_OPEN and self._trials_in_flight > 0:
+            self._trials_in_flight -= 1
+
+    def _trip(self):
+        if self.state != OPEN:
+            self.counters["trips"] += 1
+            logger.warning(f"Circuit {self.name} open after {self.consecutive_failures} failures")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._trials_in_flight = 0
+
+    def stats(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = max(0.0, self.config["open_seconds"] - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_seconds": round(retry_in, 1) if retry_in is not None else None,
+            **self.counters
+        }
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Any, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHTTPClient:
+    """Shared, connection-pooled async HTTP client for upstream API calls"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {
+            "max_connections": int(os.getenv("HTTP_MAX_CONNECTIONS", 20)),
+            "max_keepalive_connections": int(os.getenv("HTTP_MAX_KEEPALIVE", 10)),
+            "keepalive_expiry": float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30)),
+            "per_host_concurrency": int(os.getenv("HTTP_PER_HOST_CONCURRENCY", 8)),
+            "connect_timeout": float(os.getenv("HTTP_CONNECT_TIMEOUT", 5)),
+            "read_timeout": float(os.getenv("HTTP_READ_TIMEOUT", 30)),
+            "write_timeout": float(os.getenv("HTTP_WRITE_TIMEOUT", 10)),
+            "pool_timeout": float(os.getenv("HTTP_POOL_TIMEOUT", 5)),
+        }
+        if config:
+            self.config.update(config)
+
+        # Per-host overrides, e.g. {"api-inference.huggingface.co": 4}
+        self.host_limits: Dict[str, int] = {}
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.config["max_connections"],
+            max_keepalive_connections=self.config["max_keepalive_connections"],
+            keepalive_expiry=self.config["keepalive_expiry"]
+        )
+        timeout = httpx.Timeout(
+            connect=self.config["connect_timeout"],
+            read=self.config["read_timeout"],
+            write=self.config["write_timeout"],
+            pool=self.config["pool_timeout"]
+        )
+        # One long-lived client keeps TCP/TLS sessions and resolved hosts warm
+        return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    def set_host_limit(self, host: str, limit: int):
+        """Override the concurrency cap for a single upstream host"""
+        self.host_limits[host] = limit
+        self._host_semaphores.pop(host, None)
+
+    def _semaphore_for(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            limit = self.host_limits.get(host, self.config["per_host_concurrency"])
+            semaphore = asyncio.Semaphore(limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    def _timeout_for(self, read_timeout: Optional[float]) -> Optional[httpx.Timeout]:
+        if read_timeout is None:
+            return None
+        return httpx.Timeout(
+            connect=min(self.config["connect_timeout"], read_timeout),
+            read=read_timeout,
+            write=self.config["write_timeout"],
+            pool=min(self.config["pool_timeout"], read_timeout)
+        )
+
+    async def post(self, url: str, headers: Dict[str, str] = None, json: Any = None,
+                   read_timeout: Optional[float] = None) -> httpx.Response:
+        """POST through the shared pool, respecting the per-host concurrency cap"""
+        host = httpx.URL(url).host
+        timeout = self._timeout_for(read_timeout)
+        async with self._semaphore_for(host):
+            if timeout is None:
+                return await self.client.post(url, headers=headers, json=json)
+            return await self.client.post(url, headers=headers, json=json, timeout=timeout)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, headers: Dict[str, str] = None, json: Any = None,
+                     read_timeout: Optional[float] = None) -> AsyncIterator[httpx.Response]:
+        """Open a streamed response; the host slot is held until the body is consumed"""
+        host = httpx.URL(url).host
+        timeout = self._timeout_for(read_timeout)
+        kwargs = {"headers": headers, "json": json}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        async with self._semaphore_for(host):
+            async with self.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def aclose(self):
+        """Close pooled connections; safe to call more than once"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("HTTP client pool closed")
+        self._client = None
+        self._host_semaphores.clear()
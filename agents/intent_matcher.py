@@ -0,0 +1,93 @@
+import logging
+from collections import deque
+from typing import Dict, List, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+IntentRules = Sequence[Tuple[str, Sequence[str]]]
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class IntentMatcher:
+    """Aho-Corasick keyword automaton that finds every intent in one pass.
+
+    Rules are ``(intent, keywords)`` pairs in priority order. Keywords match
+    on word boundaries; a trailing ``*`` allows any word suffix, so
+    ``"compar*"`` matches "compare" and "comparison" while ``"rc"`` no
+    longer matches inside "source".
+    """
+
+    def __init__(self, rules: IntentRules):
+        self.priority: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # node -> [(keyword length, prefix match, intents)]
+        self._output: List[List[Tuple[int, bool, Tuple[str, ...]]]] = [[]]
+
+        keyword_intents: Dict[Tuple[str, bool], List[str]] = {}
+        for intent, keywords in rules:
+            if intent not in self.priority:
+                self.priority.append(intent)
+            for keyword in keywords:
+                keyword = keyword.lower()
+                prefix = keyword.endswith("*")
+                keyword = keyword.rstrip("*")
+                if keyword:
+                    keyword_intents.setdefault((keyword, prefix), []).append(intent)
+
+        for (keyword, prefix), intents in keyword_intents.items():
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append((len(keyword), prefix, tuple(intents)))
+
+        self._build_failure_links()
+        logger.debug(f"Intent matcher built: {len(keyword_intents)} keywords, {len(self._goto)} states")
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def matches(self, text: str) -> Set[str]:
+        """All intents whose keywords occur in the text"""
+        text = text.lower()
+        found: Set[str] = set()
+        node = 0
+        length = len(text)
+        for index, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for keyword_length, prefix, intents in self._output[node]:
+                start = index - keyword_length + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if not prefix and index + 1 < length and _is_word_char(text[index + 1]):
+                    continue
+                found.update(intents)
+        return found
+
+    def first(self, found: Set[str], candidates: Sequence[str] = None) -> str:
+        """Highest-priority intent from a match set, or None"""
+        for intent in candidates or self.priority:
+            if intent in found:
+                return intent
+        return None
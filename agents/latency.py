@@ -0,0 +1,85 @@
+import os
+import logging
+from collections import deque
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """EWMA and rolling-percentile view of an upstream's latency and error rate"""
+
+    def __init__(self, window: int = 200, alpha: float = 0.2):
+        self.alpha = alpha
+        self._samples = deque(maxlen=window)
+        self.ewma: Optional[float] = None
+        self.error_rate = 0.0
+        self.successes = 0
+        self.failures = 0
+
+    def record_success(self, seconds: float):
+        self.successes += 1
+        self._samples.append(seconds)
+        self.ewma = seconds if self.ewma is None else self.alpha * seconds + (1 - self.alpha) * self.ewma
+        self.error_rate = (1 - self.alpha) * self.error_rate
+
+    def record_failure(self, seconds: Optional[float] = None):
+        self.failures += 1
+        if seconds is not None:
+            # A timed-out call still tells us the upstream is at least this slow
+            self._samples.append(seconds)
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+
+    def record_abandoned(self, seconds: float):
+        """A call cancelled after ``seconds`` would have taken at least that long"""
+        if self.ewma is None:
+            self.ewma = seconds
+        elif seconds > self.ewma:
+            self.ewma = self.alpha * seconds + (1 - self.alpha) * self.ewma
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+    @property
+    def sample_count(self) -> int:
+        return len(self._samples)
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "ewma_ms": round(self.ewma * 1000, 1) if self.ewma is not None else None,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "successes": self.successes,
+            "failures": self.failures
+        }
+
+
+class AdaptiveTimeout:
+    """Upstream timeout derived from observed p95 latency instead of a fixed value"""
+
+    def __init__(self, tracker: LatencyTracker, config: Optional[Dict[str, Any]] = None):
+        self.tracker = tracker
+        self.config = {
+            "min_seconds": float(os.getenv("HF_TIMEOUT_MIN", 3)),
+            "max_seconds": float(os.getenv("HF_TIMEOUT_MAX", 30)),
+            "multiplier": float(os.getenv("HF_TIMEOUT_MULTIPLIER", 1.5)),
+            # Until this many samples exist the timeout stays at max_seconds
+            "min_samples": int(os.getenv("HF_TIMEOUT_MIN_SAMPLES", 20)),
+        }
+        if config:
+            self.config.update(config)
+
+    def current(self) -> float:
+        if self.tracker.sample_count < self.config["min_samples"]:
+            return self.config["max_seconds"]
+        p95 = self.tracker.percentile(0.95)
+        # Never tighter than the smoothed average, so a few fast calls can't starve slow ones
+        basis = max(p95, self.tracker.ewma or 0.0)
+        return max(self.config["min_seconds"],
+                   min(self.config["max_seconds"], basis * self.config["multiplier"]))
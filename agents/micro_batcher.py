@@ -0,0 +1,144 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Any, Hashable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    __slots__ = ("item", "future", "enqueued", "timeout", "batch", "sender")
+
+    def __init__(self, item: Any, future: asyncio.Future, timeout: float):
+        self.item = item
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.timeout = timeout
+        # Set once flushed: every item sent together, and the task sending them
+        self.batch: Optional[List["_Pending"]] = None
+        self.sender: Optional[asyncio.Task] = None
+
+
+class MicroBatcher:
+    """Collects items submitted within a short window into one batched call per key.
+
+    A batch is sent when ``window_ms`` has passed since its first item or as
+    soon as it holds ``max_size`` items. ``send_batch(key, items, timeout)``
+    must return one result per item, in order; the batch timeout is the most
+    generous of its callers'. A caller cancelled while still queued is simply
+    taken out of the batch; once every caller of a sent batch is cancelled,
+    the batched call itself is cancelled.
+    """
+
+    def __init__(self, send_batch: Callable[[Hashable, List[Any], float], Awaitable[List[Any]]],
+                 config: Dict[str, Any] = None):
+        self.send_batch = send_batch
+        self.config = {
+            "window_ms": float(os.getenv("HF_BATCH_WINDOW_MS", 15)),
+            "max_size": int(os.getenv("HF_BATCH_MAX_SIZE", 8)),
+        }
+        if config:
+            self.config.update(config)
+        self._queues: Dict[Hashable, List[_Pending]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._sending: Set[asyncio.Task] = set()
+        self.counters = {"submitted": 0, "cancelled": 0, "batches": 0, "items": 0, "aborted": 0}
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+
+    async def submit(self, key: Hashable, item: Any, timeout: float) -> Any:
+        loop = asyncio.get_running_loop()
+        pending = _Pending(item, loop.create_future(), timeout)
+        queue = self._queues.setdefault(key, [])
+        queue.append(pending)
+        self.counters["submitted"] += 1
+
+        if len(queue) >= self.config["max_size"] or self.config["window_ms"] <= 0:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.config["window_ms"] / 1000, self._flush, key)
+
+        try:
+            return await pending.future
+        except asyncio.CancelledError:
+            self.counters["cancelled"] += 1
+            queue = self._queues.get(key)
+            if queue and pending in queue:
+                queue.remove(pending)
+            elif (pending.sender is not None and not pending.sender.done()
+                  and all(other.future.cancelled() for other in pending.batch)):
+                # Nobody is left to use the results: abort the upstream call
+                pending.sender.cancel()
+                self.counters["aborted"] += 1
+                for other in pending.batch:
+                    other.sender = None
+            raise
+
+    def _flush(self, key: Hashable):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._queues.pop(key, None)
+        if not batch:
+            return
+
+        now = time.monotonic()
+        for pending in batch:
+            delay = now - pending.enqueued
+            self._queue_delay_total += delay
+            self._queue_delay_max = max(self._queue_delay_max, delay)
+        self.counters["batches"] += 1
+        self.counters["items"] += len(batch)
+
+        task = asyncio.ensure_future(self._send(key, batch))
+        for pending in batch:
+            pending.batch = batch
+            pending.sender = task
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, key: Hashable, batch: List[_Pending]):
+        error: Optional[BaseException] = None
+        try:
+            results = await self.send_batch(key, [pending.item for pending in batch],
+                                            max(pending.timeout for pending in batch))
+            for pending, result in zip(batch, results):
+                if not pending.future.done():
+                    pending.future.set_result(result)
+            if len(results) != len(batch):
+                error = RuntimeError(f"Batched call for {key} returned {len(results)} results for {len(batch)} items")
+        except asyncio.CancelledError:
+            error = RuntimeError(f"Batched call for {key} was cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Batched call for {key} failed: {str(e)}")
+            error = e
+        finally:
+            # No caller may be left waiting, whatever happened to the call
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(error)
+
+    async def aclose(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for queue in self._queues.values():
+            for pending in queue:
+                pending.future.cancel()
+        self._queues.clear()
+        for task in list(self._sending):
+            task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        batches, items = self.counters["batches"], self.counters["items"]
+        return {
+            **self.counters,
+            "window_ms": self.config["window_ms"],
+            "max_size": self.config["max_size"],
+            "avg_batch_size": round(items / batches, 2) if batches else 0.0,
+            "fill_rate": round(items / (batches * self.config["max_size"]), 3) if batches else 0.0,
+            "avg_queue_delay_ms": round(self._queue_delay_total / items * 1000, 2) if items else 0.0,
+            "max_queue_delay_ms": round(self._queue_delay_max * 1000, 2)
+        }
@@ -0,0 +1,132 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+
+from agents.latency import LatencyTracker, AdaptiveTimeout
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRouter:
+    """Routes each request to the fastest healthy candidate model, with hedging.
+
+    Every model keeps its own EWMA latency and error rate. Candidates whose
+    error rate is over ``max_error_rate`` are tried last; the rest are ordered
+    by EWMA latency, with not-yet-measured models first so they get sampled.
+    If the chosen model hasn't answered after ``hedge_delay`` seconds (or
+    fails sooner) the next candidate is started too, and the first usable
+    answer wins; the losers are cancelled.
+    """
+
+    def __init__(self, candidates: Dict[str, List[str]], config: Optional[Dict[str, Any]] = None):
+        self.candidates = {agent_type: list(models) for agent_type, models in candidates.items()}
+        self.config = {
+            "hedge_delay": float(os.getenv("HF_HEDGE_DELAY", 2.0)),
+            "max_hedges": int(os.getenv("HF_MAX_HEDGES", 1)),
+            "max_error_rate": float(os.getenv("HF_MODEL_MAX_ERROR_RATE", 0.5)),
+        }
+        if config:
+            self.config.update(config)
+
+        self.trackers: Dict[str, LatencyTracker] = {}
+        self.timeouts: Dict[str, AdaptiveTimeout] = {}
+        for models in self.candidates.values():
+            for model in models:
+                if model not in self.trackers:
+                    self.trackers[model] = LatencyTracker()
+                    self.timeouts[model] = AdaptiveTimeout(self.trackers[model])
+        self.counters = {"requests": 0, "hedges": 0, "hedge_wins": 0, "exhausted": 0}
+        self.wins: Dict[str, int] = {model: 0 for model in self.trackers}
+
+    def rank(self, agent_type: str) -> List[str]:
+        """Candidates for an agent_type, best first"""
+        models = self.candidates.get(agent_type) or next(iter(self.candidates.values()))
+
+        def score(item: Tuple[int, str]) -> Tuple[bool, float, int]:
+            position, model = item
+            tracker = self.trackers[model]
+            unhealthy = tracker.error_rate > self.config["max_error_rate"]
+            return unhealthy, tracker.ewma if tracker.ewma is not None else 0.0, position
+
+        return [model for _, model in sorted(enumerate(models), key=score)]
+
+    def expected_latency(self, agent_type: str) -> Optional[float]:
+        """EWMA latency of the model a request would go to first, if measured"""
+        return self.trackers[self.rank(agent_type)[0]].ewma
+
+    def timeout_for(self, model: str) -> float:
+        return self.timeouts[model].current()
+
+    def record_success(self, model: str, seconds: float):
+        self.trackers[model].record_success(seconds)
+
+    def record_failure(self, model: str, seconds: Optional[float] = None):
+        self.trackers[model].record_failure(seconds)
+
+    def record_abandoned(self, model: str, seconds: float):
+        self.trackers[model].record_abandoned(seconds)
+
+    async def call(self, agent_type: str,
+                   fn: Callable[[str], Awaitable[Optional[Any]]]) -> Tuple[Optional[str], Optional[Any]]:
+        """Run ``fn(model)`` on the best candidate, hedging onto the next ones.
+
+        ``fn`` returns None for an unusable answer. Returns (model, result),
+        or (None, None) when every attempt failed.
+        """
+        self.counters["requests"] += 1
+        models = self.rank(agent_type)
+        max_attempts = min(len(models), 1 + self.config["max_hedges"])
+        pending: Dict[asyncio.Task, Tuple[str, float]] = {}
+        started = 0
+
+        def launch():
+            nonlocal started
+            model = models[started]
+            pending[asyncio.ensure_future(fn(model))] = (model, time.monotonic())
+            started += 1
+
+        launch()
+        next_hedge = time.monotonic() + self.config["hedge_delay"]
+        try:
+            while pending:
+                wait_for = None
+                if started < max_attempts:
+                    wait_for = max(0.0, next_hedge - time.monotonic())
+                done, _ = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    model, _ = pending.pop(task)
+                    result = None if task.cancelled() or task.exception() else task.result()
+                    if result is not None:
+                        self.wins[model] += 1
+                        if model != models[0]:
+                            self.counters["hedge_wins"] += 1
+                        return model, result
+                # Primary is slow, or everything running failed: bring in the next candidate
+                if started < max_attempts and (not pending or time.monotonic() >= next_hedge):
+                    self.counters["hedges"] += 1
+                    logger.info(f"Hedging {agent_type} request onto {models[started]}")
+                    launch()
+                    next_hedge = time.monotonic() + self.config["hedge_delay"]
+            self.counters["exhausted"] += 1
+            return None, None
+        finally:
+            now = time.monotonic()
+            for task, (model, launched) in pending.items():
+                task.cancel()
+                # Losers still tell us they are slower than the winner
+                self.record_abandoned(model, now - launched)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "models": {
+                model: {
+                    **tracker.stats(),
+                    "wins": self.wins[model],
+                    "timeout_seconds": round(self.timeouts[model].current(), 2)
+                }
+                for model, tracker in self.trackers.items()
+            }
+        }
@@ -0,0 +1,165 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Any, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = "unknown"
+WARM = "warm"
+LOADING = "loading"
+
+
+class _ModelState:
+    __slots__ = ("state", "ready_at", "last_ping", "last_change")
+
+    def __init__(self):
+        self.state = UNKNOWN
+        self.ready_at: Optional[float] = None
+        self.last_ping: Optional[float] = None
+        self.last_change = time.monotonic()
+
+
+class ModelWarmer:
+    """Keeps upstream models loaded and tracks which ones are cold.
+
+    ``ping(model)`` sends a cheap inference call and returns
+    (status code, estimated seconds until loaded or None). Every model is
+    pinged each ``interval`` seconds, and again as soon as a loading model is
+    due to be ready. Live traffic reports its 503s through ``mark_loading``,
+    so requests can be held for a model that is only seconds away from ready
+    instead of failing straight to the fallback.
+    """
+
+    def __init__(self, models: Iterable[str], ping: Callable[[str], Awaitable[Tuple[int, Optional[float]]]],
+                 config: Optional[Dict[str, Any]] = None):
+        self.ping = ping
+        self.config = {
+            "interval": float(os.getenv("HF_WARM_INTERVAL", 240)),
+            # Hold a request at most this long for a loading model
+            "max_hold": float(os.getenv("HF_COLD_MAX_HOLD", 20)),
+        }
+        if config:
+            self.config.update(config)
+        self._models: Dict[str, _ModelState] = {model: _ModelState() for model in dict.fromkeys(models)}
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.counters = {"pings": 0, "ping_errors": 0, "loading_reports": 0, "held": 0, "hold_timeouts": 0}
+        self._held_seconds = 0.0
+
+    def _entry(self, model: str) -> _ModelState:
+        entry = self._models.get(model)
+        if entry is None:
+            entry = self._models[model] = _ModelState()
+        return entry
+
+    def _set_state(self, entry: _ModelState, model: str, state: str):
+        if entry.state != state:
+            logger.info(f"Model {model} is now {state}")
+            entry.state = state
+            entry.last_change = time.monotonic()
+
+    def mark_warm(self, model: str):
+        entry = self._entry(model)
+        entry.ready_at = None
+        self._set_state(entry, model, WARM)
+
+    def mark_loading(self, model: str, estimated_seconds: Optional[float]):
+        entry = self._entry(model)
+        self.counters["loading_reports"] += 1
+        entry.ready_at = time.monotonic() + (estimated_seconds if estimated_seconds is not None else self.config["max_hold"])
+        self._set_state(entry, model, LOADING)
+        # Re-ping when it should be up rather than at the next regular interval
+        self._wake.set()
+
+    def is_loading(self, model: str) -> bool:
+        entry = self._models.get(model)
+        return entry is not None and entry.state == LOADING
+
+    async def wait_until_ready(self, model: str, max_wait: Optional[float] = None) -> bool:
+        """Hold a request while its model finishes loading; False if that would take too long"""
+        entry = self._models.get(model)
+        if entry is None or entry.state != LOADING:
+            return True
+        wait = max(0.0, entry.ready_at - time.monotonic())
+        limit = self.config["max_hold"] if max_wait is None else min(self.config["max_hold"], max_wait)
+        if wait > limit:
+            self.counters["hold_timeouts"] += 1
+            return False
+        self.counters["held"] += 1
+        self._held_seconds += wait
+        await asyncio.sleep(wait)
+        return True
+
+    async def warm(self, model: str):
+        entry = self._entry(model)
+        entry.last_ping = time.monotonic()
+        self.counters["pings"] += 1
+        try:
+            status, estimated = await self.ping(model)
+        except Exception as e:
+            self.counters["ping_errors"] += 1
+            logger.warning(f"Warm-up ping to {model} failed: {str(e)}")
+            return
+        if status == 200:
+            self.mark_warm(model)
+        elif status == 503:
+            self.mark_loading(model, estimated)
+        else:
+            self.counters["ping_errors"] += 1
+
+    def _next_due(self) -> float:
+        now = time.monotonic()
+        due = now + self.config["interval"]
+        for entry in self._models.values():
+            if entry.state == LOADING and entry.ready_at is not None:
+                due = min(due, entry.ready_at)
+            elif entry.last_ping is not None:
+                due = min(due, entry.last_ping + self.config["interval"])
+            else:
+                due = now
+        return due
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            await asyncio.gather(*(
+                self.warm(model) for model, entry in self._models.items()
+                if entry.last_ping is None
+                or now - entry.last_ping >= self.config["interval"]
+                or (entry.state == LOADING and entry.ready_at <= now)
+            ))
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.5, self._next_due() - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            **self.counters,
+            "held_seconds": round(self._held_seconds, 1),
+            "models": {
+                model: {
+                    "state": entry.state,
+                    "ready_in_seconds": round(max(0.0, entry.ready_at - now), 1) if entry.state == LOADING else None,
+                    "state_age_seconds": round(now - entry.last_change, 1)
+                }
+                for model, entry in self._models.items()
+            }
+        }
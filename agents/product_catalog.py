@@ -0,0 +1,242 @@
+import re
+import json
+import bisect
+import hashlib
+import logging
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_PRICE = re.compile(r"[\d,]+(?:\.\d+)?")
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SKILL_FROM_SPECS = re.compile(r"skill level:\s*(\w+)", re.IGNORECASE)
+
+
+def parse_price(display: str) -> Optional[float]:
+    """'₹3,499.00' -> 3499.0; None for non-numeric prices like 'Prices vary'"""
+    match = _PRICE.search(display or "")
+    if not match:
+        return None
+    return float(match.group(0).replace(",", ""))
+
+
+def _derive_skill_level(record: Dict[str, Any]) -> str:
+    if record.get("skill_level"):
+        return record["skill_level"].lower()
+    match = _SKILL_FROM_SPECS.search(record.get("specs", ""))
+    if match:
+        return match.group(1).lower()
+    ideal_for = record.get("ideal_for", "").lower()
+    if "beginner" in ideal_for:
+        return "beginner"
+    if "advanced" in ideal_for or "experienced" in ideal_for:
+        return "advanced"
+    return "all"
+
+
+class Product:
+    __slots__ = ("sku", "name", "category", "price", "price_value", "description",
+                 "features", "specs", "ideal_for", "url", "skill_level", "aliases")
+
+    def __init__(self, sku: str, record: Dict[str, Any]):
+        self.sku = sku
+        self.name = record["name"]
+        self.category = record["category"]
+        self.price = record.get("price", "")
+        self.price_value = parse_price(self.price)
+        self.description = record.get("description", "")
+        self.features = tuple(record.get("features", ()))
+        self.specs = record.get("specs", "")
+        self.ideal_for = record.get("ideal_for", "")
+        self.url = record.get("url", "")
+        self.skill_level = _derive_skill_level(record)
+        self.aliases = tuple(alias.lower() for alias in record.get("aliases", ()))
+
+    def to_record(self) -> Dict[str, Any]:
+        record = {
+            "name": self.name,
+            "category": self.category,
+            "price": self.price,
+            "description": self.description,
+            "features": list(self.features),
+            "specs": self.specs,
+            "ideal_for": self.ideal_for,
+            "url": self.url,
+            "skill_level": self.skill_level,
+        }
+        if self.aliases:
+            record["aliases"] = list(self.aliases)
+        return record
+
+
+class ProductCatalog:
+    """Immutable, indexed product catalog.
+
+    Secondary indexes (category, skill level, price, keyword) are built once
+    when the catalog is constructed, so queries never walk every product.
+    Catalogs are never mutated; ``with_changes`` derives a new one that shares
+    every index entry the change set doesn't touch.
+    """
+
+    def __init__(self, products: Iterable[Product], version: Optional[str] = None):
+        self._products: Dict[str, Product] = {}
+        self._by_category: Dict[str, List[Product]] = {}
+        self._by_skill: Dict[str, List[Product]] = {}
+        self._by_keyword: Dict[str, List[str]] = {}
+
+        for product in products:
+            self._products[product.sku] = product
+            self._by_category.setdefault(product.category, []).append(product)
+            self._by_skill.setdefault(product.skill_level, []).append(product)
+            for token in self._keywords(product):
+                self._by_keyword.setdefault(token, []).append(product.sku)
+
+        priced = sorted(
+            (p.price_value, p.sku) for p in self._products.values() if p.price_value is not None
+        )
+        self._price_keys = [price for price, _ in priced]
+        self._price_skus = [sku for _, sku in priced]
+        self.version = version or self._compute_version()
+
+    def with_changes(self, upserts: Iterable[Product], removed: Iterable[str] = (),
+                     version: Optional[str] = None) -> "ProductCatalog":
+        """New catalog with products replaced/added/removed, updating indexes incrementally"""
+        catalog = ProductCatalog.__new__(ProductCatalog)
+        catalog._products = dict(self._products)
+        catalog._by_category = dict(self._by_category)
+        catalog._by_skill = dict(self._by_skill)
+        catalog._by_keyword = dict(self._by_keyword)
+        catalog._price_keys = list(self._price_keys)
+        catalog._price_skus = list(self._price_skus)
+
+        # Index lists are shared with this catalog until a change touches them
+        owned = set()
+
+        def own(index: Dict[str, list], key: str) -> list:
+            if (id(index), key) not in owned:
+                index[key] = list(index.get(key, ()))
+                owned.add((id(index), key))
+            return index[key]
+
+        def drop_empty(index: Dict[str, list], key: str):
+            if not index.get(key):
+                index.pop(key, None)
+                owned.discard((id(index), key))
+
+        def unindex(product: Product):
+            own(catalog._by_category, product.category).remove(product)
+            drop_empty(catalog._by_category, product.category)
+            own(catalog._by_skill, product.skill_level).remove(product)
+            drop_empty(catalog._by_skill, product.skill_level)
+            for token in self._keywords(product):
+                own(catalog._by_keyword, token).remove(product.sku)
+                drop_empty(catalog._by_keyword, token)
+            if product.price_value is not None:
+                position = bisect.bisect_left(catalog._price_keys, product.price_value)
+                while catalog._price_skus[position] != product.sku:
+                    position += 1
+                del catalog._price_keys[position]
+                del catalog._price_skus[position]
+
+        def index(product: Product):
+            own(catalog._by_category, product.category).append(product)
+            own(catalog._by_skill, product.skill_level).append(product)
+            for token in self._keywords(product):
+                own(catalog._by_keyword, token).append(product.sku)
+            if product.price_value is not None:
+                position = bisect.bisect_right(catalog._price_keys, product.price_value)
+                catalog._price_keys.insert(position, product.price_value)
+                catalog._price_skus.insert(position, product.sku)
+
+        for sku in removed:
+            product = catalog._products.pop(sku, None)
+            if product is not None:
+                unindex(product)
+        for product in upserts:
+            previous = catalog._products.get(product.sku)
+            if previous is not None:
+                unindex(previous)
+            catalog._products[product.sku] = product
+            index(product)
+
+        catalog.version = version or catalog._compute_version()
+        return catalog
+
+    @classmethod
+    def from_dict(cls, catalog: Dict[str, Dict[str, Any]]) -> "ProductCatalog":
+        return cls(Product(sku, record) for sku, record in catalog.items())
+
+    @staticmethod
+    def _keywords(product: Product) -> Set[str]:
+        tokens = set(_TOKEN.findall(product.name.lower()))
+        for alias in product.aliases:
+            tokens.update(_TOKEN.findall(alias))
+        return tokens
+
+    def _compute_version(self) -> str:
+        """Content hash of the catalog, stable across restarts"""
+        payload = json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+    def diff(self, other: "ProductCatalog") -> Set[str]:
+        """SKUs added, removed or changed between this catalog and another"""
+        changed = set(self._products.keys() ^ other._products.keys())
+        for sku, product in self._products.items():
+            other_product = other._products.get(sku)
+            if (other_product is not None and other_product is not product
+                    and other_product.to_record() != product.to_record()):
+                changed.add(sku)
+        return changed
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {sku: product.to_record() for sku, product in self._products.items()}
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def __iter__(self) -> Iterator[Product]:
+        return iter(self._products.values())
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self._products
+
+    def __getitem__(self, sku: str) -> Product:
+        return self._products[sku]
+
+    def get(self, sku: str) -> Optional[Product]:
+        return self._products.get(sku)
+
+    def skus(self) -> List[str]:
+        return list(self._products)
+
+    def categories(self) -> List[str]:
+        return list(self._by_category)
+
+    def by_category(self, category: str) -> List[Product]:
+        return self._by_category.get(category, [])
+
+    def by_skill(self, skill_level: str) -> List[Product]:
+        return self._by_skill.get(skill_level.lower(), [])
+
+    def _price_slice(self, min_price: Optional[float], max_price: Optional[float]) -> Tuple[int, int]:
+        lo = 0 if min_price is None else bisect.bisect_left(self._price_keys, min_price)
+        hi = len(self._price_keys) if max_price is None else bisect.bisect_right(self._price_keys, max_price)
+        return lo, hi
+
+    def in_price_range(self, min_price: float = None, max_price: float = None) -> List[Product]:
+        """Products priced within [min_price, max_price], cheapest first"""
+        lo, hi = self._price_slice(min_price, max_price)
+        return [self._products[sku] for sku in self._price_skus[lo:hi]]
+
+    def count_in_price_range(self, min_price: float = None, max_price: float = None) -> int:
+        lo, hi = self._price_slice(min_price, max_price)
+        return max(0, hi - lo)
+
+    def price_bounds(self) -> Tuple[Optional[float], Optional[float]]:
+        if not self._price_keys:
+            return None, None
+        return self._price_keys[0], self._price_keys[-1]
+
+    def by_keyword(self, keyword: str) -> List[Product]:
+        """Products whose name or aliases contain the keyword token"""
+        return [self._products[sku] for sku in self._by_keyword.get(keyword.lower(), ())]
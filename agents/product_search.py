@@ -0,0 +1,276 @@
+import re
+import math
+import heapq
+import bisect
+import logging
+from typing import Callable, Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from agents.product_catalog import Product, ProductCatalog
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"a", "an", "and", "the", "of", "for", "in", "on", "to", "with", "is", "me", "i", "do", "you"}
+
+# BM25F field weights: a hit in the product name counts three times as much
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "description": 1.0,
+    "features": 1.0,
+    "specs": 1.0,
+    "ideal_for": 1.0,
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def _field_text(product: Product, field: str) -> str:
+    if field == "name":
+        return " ".join((product.name,) + product.aliases)
+    if field == "features":
+        return " ".join(product.features)
+    return getattr(product, field)
+
+
+class NameMatcher:
+    """Tells whether a text mentions any of a set of product names.
+
+    Names are matched as whole token sequences, so a check is one pass over
+    the text's tokens however many names there are.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self._names = set()
+        self._lengths: Dict[str, Set[int]] = {}
+        for name in names:
+            tokens = tuple(tokenize(name))
+            if tokens:
+                self._names.add(tokens)
+                self._lengths.setdefault(tokens[0], set()).add(len(tokens))
+
+    def __call__(self, text: str) -> bool:
+        tokens = tokenize(text)
+        for i, token in enumerate(tokens):
+            for length in self._lengths.get(token, ()):
+                if tuple(tokens[i:i + length]) in self._names:
+                    return True
+        return False
+
+
+class SearchHit:
+    __slots__ = ("product", "score")
+
+    def __init__(self, product: Product, score: float):
+        self.product = product
+        self.score = score
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sku": self.product.sku,
+            "name": self.product.name,
+            "category": self.product.category,
+            "price": self.product.price,
+            "price_value": self.product.price_value,
+            "skill_level": self.product.skill_level,
+            "url": self.product.url,
+            "score": round(self.score, 4)
+        }
+
+
+class ProductSearchIndex:
+    """In-memory inverted index with BM25F ranking over catalog text fields.
+
+    BM25 impacts are precomputed per posting when the index is built and
+    postings are kept in descending impact order, so a query only sums floats
+    for the strongest ``max_postings`` documents of each term. If filters
+    leave fewer than ``limit`` hits in that window the full lists are scanned.
+    Category and price filters are resolved through the catalog's indexes;
+    when they leave fewer documents than a posting scan would touch, only
+    those candidates are scored, from a per-document impact map.
+    The final query token can be treated as a prefix for as-you-type search.
+    """
+
+    def __init__(self, catalog: ProductCatalog, k1: float = 1.2, b: float = 0.75,
+                 max_prefix_expansions: int = 32, max_postings: int = 256):
+        self.version = catalog.version
+        self.max_prefix_expansions = max_prefix_expansions
+        self.max_postings = max_postings
+        self._catalog = catalog
+        self._products: List[Product] = list(catalog)
+        self._doc_ids: Dict[str, int] = {product.sku: doc_id for doc_id, product in enumerate(self._products)}
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        # Per-document term impacts, for scoring a filtered candidate set directly
+        self._impacts: List[Dict[str, float]] = []
+        # Distinctive terms (in under half the catalog) from each name/aliases
+        self._name_terms: List[frozenset] = []
+
+        term_freqs: List[Dict[str, float]] = []
+        lengths: List[float] = []
+        for product in self._products:
+            weighted: Dict[str, float] = {}
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                tokens = tokenize(_field_text(product, field))
+                length += weight * len(tokens)
+                for token in tokens:
+                    weighted[token] = weighted.get(token, 0.0) + weight
+            term_freqs.append(weighted)
+            lengths.append(length)
+
+        doc_count = len(self._products)
+        avg_length = (sum(lengths) / doc_count) if doc_count else 1.0
+        doc_freq: Dict[str, int] = {}
+        for weighted in term_freqs:
+            for token in weighted:
+                doc_freq[token] = doc_freq.get(token, 0) + 1
+
+        for product in self._products:
+            self._name_terms.append(frozenset(
+                token for token in tokenize(_field_text(product, "name"))
+                if doc_freq[token] * 2 < doc_count
+            ))
+
+        for doc_id, weighted in enumerate(term_freqs):
+            norm = k1 * (1 - b + b * lengths[doc_id] / (avg_length or 1.0))
+            impacts = {}
+            for token, tf in weighted.items():
+                idf = math.log(1 + (doc_count - doc_freq[token] + 0.5) / (doc_freq[token] + 0.5))
+                impact = idf * tf * (k1 + 1) / (tf + norm)
+                impacts[token] = impact
+                self._postings.setdefault(token, []).append((doc_id, impact))
+            self._impacts.append(impacts)
+
+        for postings in self._postings.values():
+            postings.sort(key=lambda posting: posting[1], reverse=True)
+        self._vocabulary = sorted(self._postings)
+
+    def release(self):
+        """Free the index in small steps, so a large one never holds the GIL for long.
+
+        Meant for a worker thread once the index has been replaced; it is
+        unusable afterwards.
+        """
+        lists = list(self._postings.values())
+        self._postings.clear()
+        lists += [self._impacts, self._name_terms, self._vocabulary, self._products]
+        for items in lists:
+            while items:
+                del items[-1024:]
+        self._doc_ids.clear()
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:start + self.max_prefix_expansions]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, limit: int = 10, category: str = None,
+               min_price: float = None, max_price: float = None, prefix: bool = False,
+               require_name_match: bool = False) -> List[SearchHit]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # Each group contributes its best-scoring term per document
+        groups = [[token] for token in tokens]
+        if prefix and query[-1:].isalnum():
+            groups[-1] = self._expand_prefix(tokens[-1]) or [tokens[-1]]
+
+        def accept(doc_id: int) -> bool:
+            product = self._products[doc_id]
+            if category and product.category != category:
+                return False
+            if min_price is not None and (product.price_value is None or product.price_value < min_price):
+                return False
+            if max_price is not None and (product.price_value is None or product.price_value > max_price):
+                return False
+            return True
+
+        lengths = [len(self._postings.get(term, ())) for terms in groups for term in terms]
+        windowed_cost = sum(min(length, self.max_postings) for length in lengths)
+        candidates = self._candidates(category, min_price, max_price, len(lengths), windowed_cost)
+        if candidates is not None:
+            return self._rank_candidates(groups, limit, candidates, accept, require_name_match)
+
+        hits = self._rank(groups, limit, accept, require_name_match, self.max_postings)
+        if len(hits) < limit and any(length > self.max_postings for length in lengths):
+            candidates = self._candidates(category, min_price, max_price, len(lengths), sum(lengths))
+            if candidates is not None:
+                return self._rank_candidates(groups, limit, candidates, accept, require_name_match)
+            hits = self._rank(groups, limit, accept, require_name_match, None)
+        return hits
+
+    def _candidates(self, category: Optional[str], min_price: Optional[float], max_price: Optional[float],
+                    terms: int, scan_cost: int) -> Optional[List[int]]:
+        """Doc ids from the most selective filter, or None if scanning ``scan_cost`` postings is cheaper"""
+        sizes = []
+        if category:
+            sizes.append((len(self._catalog.by_category(category)), "category"))
+        if min_price is not None or max_price is not None:
+            sizes.append((self._catalog.count_in_price_range(min_price, max_price), "price"))
+        if not sizes:
+            return None
+        size, source = min(sizes)
+        # Scoring a candidate costs one lookup per query term
+        if size * terms >= scan_cost:
+            return None
+        if source == "category":
+            products = self._catalog.by_category(category)
+        else:
+            products = self._catalog.in_price_range(min_price, max_price)
+        return [self._doc_ids[product.sku] for product in products]
+
+    def _rank_candidates(self, groups: List[List[str]], limit: int, candidates: List[int],
+                         accept: Callable[[int], bool], require_name_match: bool) -> List[SearchHit]:
+        scored = []
+        for doc_id in candidates:
+            if not accept(doc_id):
+                continue
+            impacts = self._impacts[doc_id]
+            score = 0.0
+            matched = set()
+            for terms in groups:
+                best = 0.0
+                for term in terms:
+                    impact = impacts.get(term)
+                    if impact is not None:
+                        matched.add(term)
+                        if impact > best:
+                            best = impact
+                score += best
+            if not matched:
+                continue
+            if require_name_match and not (matched & self._name_terms[doc_id]):
+                continue
+            scored.append((score, doc_id))
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+        return [SearchHit(self._products[doc_id], score) for score, doc_id in best]
+
+    def _rank(self, groups: List[List[str]], limit: int, accept: Callable[[int], bool], require_name_match: bool,
+              max_postings: Optional[int]) -> List[SearchHit]:
+        scores: Dict[int, float] = {}
+        matched_terms: Dict[int, set] = {}
+        for terms in groups:
+            group_scores: Dict[int, float] = {}
+            for term in terms:
+                for doc_id, impact in self._postings.get(term, ())[:max_postings]:
+                    if impact > group_scores.get(doc_id, 0.0):
+                        group_scores[doc_id] = impact
+                    if require_name_match:
+                        matched_terms.setdefault(doc_id, set()).add(term)
+            for doc_id, impact in group_scores.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + impact
+
+        def keep(doc_id: int) -> bool:
+            if not accept(doc_id):
+                return False
+            return not require_name_match or bool(matched_terms[doc_id] & self._name_terms[doc_id])
+
+        filtered = ((score, doc_id) for doc_id, score in scores.items() if keep(doc_id))
+        best = heapq.nlargest(limit, filtered, key=lambda item: (item[0], -item[1]))
+        return [SearchHit(self._products[doc_id], score) for score, doc_id in best]
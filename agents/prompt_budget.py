@@ -0,0 +1,72 @@
+import os
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Context window minus the 300 generated tokens we ask for
+DEFAULT_BUDGETS = {
+    "microsoft/DialoGPT-large": 724,
+    "microsoft/DialoGPT-medium": 724,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap BPE token estimate: ~4 UTF-8 bytes per token, never fewer than words"""
+    return max((len(text.encode("utf-8")) + 3) // 4, len(text.split()))
+
+
+class PromptBudget:
+    """Fits retrieved catalog entries into a per-model prompt token budget"""
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self.budgets = dict(DEFAULT_BUDGETS)
+        if budgets:
+            self.budgets.update(budgets)
+        self.default_budget = int(os.getenv("HF_PROMPT_TOKEN_BUDGET", 724))
+        self.counters = {"requests": 0, "bytes_sent": 0, "full_bytes": 0, "truncated": 0}
+
+    def budget_for(self, model: str) -> int:
+        return self.budgets.get(model, self.default_budget)
+
+    def assemble(self, model: str, prefix: str, blocks: List[str], suffix: str,
+                 user_prompt: str) -> Tuple[str, int]:
+        """System prompt of prefix + as many blocks as fit + suffix.
+
+        Blocks are taken in the given (relevance) order. If even the bare
+        template doesn't fit, it is cut from the end. Returns the prompt and
+        how many blocks made it in.
+        """
+        budget = self.budget_for(model)
+        # "\n\nUser: ...\nAssistant:" wrapper around the user message
+        used = estimate_tokens(prefix) + estimate_tokens(suffix) + estimate_tokens(user_prompt) + 6
+
+        included = []
+        for block in blocks:
+            cost = estimate_tokens(block)
+            if used + cost > budget:
+                break
+            included.append(block)
+            used += cost
+
+        system_prompt = prefix + "".join(included) + suffix
+        if used > budget:
+            overflow = used - budget
+            keep_bytes = max(0, len(system_prompt.encode("utf-8")) - overflow * 4)
+            system_prompt = system_prompt.encode("utf-8")[:keep_bytes].decode("utf-8", "ignore")
+            self.counters["truncated"] += 1
+        return system_prompt, len(included)
+
+    def record(self, sent_bytes: int, full_bytes: int):
+        self.counters["requests"] += 1
+        self.counters["bytes_sent"] += sent_bytes
+        self.counters["full_bytes"] += full_bytes
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.counters["requests"]
+        full = self.counters["full_bytes"]
+        return {
+            **self.counters,
+            "avg_bytes_sent": round(self.counters["bytes_sent"] / requests) if requests else 0,
+            "reduction": round(1 - self.counters["bytes_sent"] / full, 3) if full else 0.0
+        }
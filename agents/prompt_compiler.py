@@ -0,0 +1,108 @@
+import time
+import logging
+from typing import Callable, Dict, Any, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Stand-in rendered where the catalog goes, to split templates around it
+CATALOG_SLOT = "\x00CATALOG\x00"
+
+
+class CompiledPrompts:
+    __slots__ = ("version", "prompts", "templates", "sizes", "compile_ms")
+
+    def __init__(self, version: str, prompts: Dict[str, str], templates: Dict[str, Tuple[str, str]],
+                 sizes: Dict[str, int], compile_ms: float):
+        self.version = version
+        self.prompts = prompts
+        self.templates = templates
+        self.sizes = sizes
+        self.compile_ms = compile_ms
+
+
+class PromptCompiler:
+    """Renders every agent_type's system prompt once per catalog version"""
+
+    def __init__(self, build_context: Callable[[], str],
+                 render_prompt: Callable[[str, str], str],
+                 agent_types: Iterable[str], default_type: str = "product",
+                 catalog_types: Iterable[str] = ("product",)):
+        self.build_context = build_context
+        self.render_prompt = render_prompt
+        self.agent_types = list(agent_types)
+        self.default_type = default_type
+        # Only these prompts embed the catalog; the rest survive catalog changes
+        self.catalog_types = set(catalog_types)
+
+        self.version: Optional[str] = None
+        self.compiled_at: Optional[float] = None
+        self.compile_ms = 0.0
+        self._prompts: Dict[str, str] = {}
+        self._templates: Dict[str, Tuple[str, str]] = {}
+        self._sizes: Dict[str, int] = {}
+
+    def compile(self, version: str):
+        """Render prompts for the given catalog version.
+
+        After the first compile only catalog-dependent prompts are re-rendered.
+        """
+        self.install(self.render(version))
+
+    def render(self, version: str, build_context: Optional[Callable[[], str]] = None) -> CompiledPrompts:
+        """Render without installing, e.g. on a worker thread ahead of a catalog swap"""
+        start = time.perf_counter()
+        prompts = dict(self._prompts)
+        stale_types = [
+            agent_type for agent_type in self.agent_types
+            if agent_type in self.catalog_types or agent_type not in prompts
+        ]
+        product_context = (build_context or self.build_context)() if stale_types else ""
+        templates = dict(self._templates)
+        for agent_type in stale_types:
+            prompts[agent_type] = self.render_prompt(agent_type, product_context)
+            if agent_type in self.catalog_types and agent_type not in templates:
+                prefix, _, suffix = self.render_prompt(agent_type, CATALOG_SLOT).partition(CATALOG_SLOT)
+                templates[agent_type] = (prefix, suffix)
+        sizes = {agent_type: len(text.encode("utf-8")) for agent_type, text in prompts.items()}
+        compiled = CompiledPrompts(version, prompts, templates, sizes, (time.perf_counter() - start) * 1000)
+        logger.info(f"Compiled {len(stale_types)} system prompts for catalog {version} in {compiled.compile_ms:.1f}ms")
+        return compiled
+
+    def install(self, compiled: CompiledPrompts):
+        # Swap in a complete set so readers never see a partial compile
+        self._prompts = compiled.prompts
+        self._templates = compiled.templates
+        self._sizes = compiled.sizes
+        self.version = compiled.version
+        self.compiled_at = time.time()
+        self.compile_ms = compiled.compile_ms
+
+    def get(self, agent_type: str, version: str) -> str:
+        """Return the compiled prompt, rebuilding only if the catalog version moved"""
+        if version != self.version:
+            self.compile(version)
+        return self._prompts[self._resolve(agent_type)]
+
+    def get_template(self, agent_type: str, version: str) -> Optional[Tuple[str, str]]:
+        """(prefix, suffix) around the catalog section, or None if the prompt has none"""
+        if version != self.version:
+            self.compile(version)
+        return self._templates.get(self._resolve(agent_type))
+
+    def size(self, agent_type: str, version: str) -> int:
+        """UTF-8 size of the compiled prompt, as cached at compile time"""
+        if version != self.version:
+            self.compile(version)
+        return self._sizes[self._resolve(agent_type)]
+
+    def _resolve(self, agent_type: str) -> str:
+        # Unknown types get the default prompt, so they must get its template too
+        return agent_type if agent_type in self._prompts else self.default_type
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "catalog_version": self.version,
+            "compiled_at": self.compiled_at,
+            "compile_ms": round(self.compile_ms, 2),
+            "rendered_bytes": dict(self._sizes)
+        }
@@ -0,0 +1,135 @@
+import os
+import re
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Canonical form of a chat message for cache keys"""
+    return _WHITESPACE.sub(" ", message.strip().lower()).rstrip("?!. ")
+
+
+class CacheEntry:
+    __slots__ = ("value", "source", "expires_at", "size")
+
+    def __init__(self, value: str, source: str, expires_at: float, size: int):
+        self.value = value
+        self.source = source
+        self.expires_at = expires_at
+        self.size = size
+
+
+class ResponseCache:
+    """Bounded LRU + TTL cache of chat answers.
+
+    Each entry is tagged with the source that produced it and expires
+    according to that source's policy:
+
+    - ``huggingface``: model answers
+    - ``local``: deterministic keyword answers from ``_get_local_response``
+    - ``negative``: local fallbacks served after an upstream failure, kept
+      briefly so a failing upstream isn't retried for every repeat question
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {
+            "max_entries": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2048)),
+            "max_bytes": int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 8 * 1024 * 1024)),
+        }
+        self.ttl = {
+            "huggingface": float(os.getenv("RESPONSE_CACHE_HF_TTL", 3600)),
+            "local": float(os.getenv("RESPONSE_CACHE_LOCAL_TTL", 6 * 3600)),
+            "negative": float(os.getenv("RESPONSE_CACHE_NEGATIVE_TTL", 60)),
+        }
+        if config:
+            config = dict(config)
+            self.ttl.update(config.pop("ttl", {}))
+            self.config.update(config)
+
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    @staticmethod
+    def make_key(agent_type: str, message: str, catalog_version: str) -> CacheKey:
+        return (agent_type, normalize_message(message), catalog_version)
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.counters["expirations"] += 1
+            self.counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return entry
+
+    def put(self, key: CacheKey, value: str, source: str):
+        ttl = self.ttl.get(source, 0)
+        if ttl <= 0 or not value:
+            return
+        size = len(value.encode("utf-8")) + len(key[1])
+        if size > self.config["max_bytes"]:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CacheEntry(value, source, time.monotonic() + ttl, size)
+        self._bytes += size
+        self._evict()
+
+    def _remove(self, key: CacheKey):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.config["max_entries"]
+                                 or self._bytes > self.config["max_bytes"]):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.counters["evictions"] += 1
+
+    def rekey(self, old_version: str, new_version: str, is_affected: Callable[[str], bool]) -> int:
+        """Carry entries over to a new catalog version, dropping affected ones.
+
+        Returns the number of entries dropped.
+        """
+        dropped = 0
+        for key in [k for k in self._entries if k[2] == old_version]:
+            entry = self._entries[key]
+            self._remove(key)
+            if is_affected(entry.value):
+                dropped += 1
+                continue
+            new_key = (key[0], key[1], new_version)
+            if new_key not in self._entries:
+                self._entries[new_key] = entry
+                self._bytes += entry.size
+        return dropped
+
+    def values(self) -> List[str]:
+        return [entry.value for entry in self._entries.values()]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes
+        }
@@ -0,0 +1,209 @@
+import os
+import re
+import time
+import random
+import zlib
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z]+|\d+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "is", "are", "for", "to", "it", "i", "me", "you", "your",
+    "do", "can", "what", "whats", "how", "tell", "about", "please", "pls"
+}
+_SYNONYMS = {
+    "cost": "price", "costs": "price", "much": "price", "rate": "price",
+    "prices": "price", "priced": "price", "cms": "cm"
+}
+
+
+def _tokens(text: str) -> List[str]:
+    """Lowercased word/number tokens with stopwords dropped and synonyms folded"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        token = _SYNONYMS.get(token, token)
+        if token not in _STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def _shingles(tokens: List[str], size: int) -> Set[int]:
+    """Hashed character shingles taken per token, so word order doesn't matter"""
+    shingles = set()
+    for token in tokens:
+        padded = f" {token} "
+        for i in range(max(1, len(padded) - size + 1)):
+            shingles.add(zlib.crc32(padded[i:i + size].encode("utf-8")))
+    return shingles or {0}
+
+
+def _numbers_compatible(left: frozenset, right: frozenset) -> bool:
+    """Numbers must agree: equal sets, or one a non-empty subset of the other"""
+    if left == right:
+        return True
+    smaller, larger = (left, right) if len(left) <= len(right) else (right, left)
+    return bool(smaller) and smaller <= larger
+
+
+class SemanticEntry:
+    __slots__ = ("agent_type", "shingles", "numbers", "bands", "value", "generation", "expires_at")
+
+    def __init__(self, agent_type: str, shingles: Set[int], numbers: frozenset,
+                 bands: List[Tuple[int, ...]], value: str, generation: int, expires_at: float):
+        self.agent_type = agent_type
+        self.shingles = shingles
+        self.numbers = numbers
+        self.bands = bands
+        self.value = value
+        self.generation = generation
+        self.expires_at = expires_at
+
+
+class SemanticCache:
+    """Near-duplicate answer cache using MinHash signatures and LSH banding.
+
+    Prompts are reduced to per-token character shingles; LSH buckets find
+    candidate entries in roughly constant time and the exact shingle Jaccard
+    decides whether a candidate is close enough. Numbers in the prompt (sizes,
+    model numbers) must agree so "30cm" never answers a "55cm" question.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {
+            "threshold": float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.7)),
+            "max_entries": int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 1024)),
+            "ttl": float(os.getenv("SEMANTIC_CACHE_TTL", 3600)),
+            # How many catalog versions behind an entry may be and still be served
+            "max_catalog_lag": int(os.getenv("SEMANTIC_CACHE_MAX_CATALOG_LAG", 0)),
+            "shingle_size": 3,
+            "bands": 16,
+            "rows": 4,
+        }
+        if config:
+            self.config.update(config)
+
+        num_perm = self.config["bands"] * self.config["rows"]
+        rng = random.Random(1729)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+        self._entries: "OrderedDict[int, SemanticEntry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[int]] = {}
+        self._next_id = 0
+        self.catalog_version: Optional[str] = None
+        self.generation = 0
+        self.counters = {"hits": 0, "misses": 0, "inserts": 0, "evictions": 0, "stale": 0}
+
+    def set_catalog_version(self, version: str, is_affected: Callable[[str], bool] = None):
+        """Advance the catalog generation used for staleness checks.
+
+        With ``is_affected``, entries whose answer doesn't touch the changed
+        products are carried forward to the new generation; the rest are dropped.
+        """
+        if version == self.catalog_version:
+            return
+        if self.catalog_version is not None:
+            self.generation += 1
+        self.catalog_version = version
+        if is_affected is None:
+            return
+        for entry_id, entry in list(self._entries.items()):
+            if is_affected(entry.value):
+                self._remove(entry_id)
+                self.counters["stale"] += 1
+            else:
+                entry.generation = self.generation
+
+    def _signature(self, shingles: Set[int]) -> List[Tuple[int, ...]]:
+        signature = [
+            min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+            for a, b in self._perms
+        ]
+        rows = self.config["rows"]
+        return [tuple(signature[i:i + rows]) for i in range(0, len(signature), rows)]
+
+    def _is_stale(self, entry: SemanticEntry) -> bool:
+        return (entry.expires_at <= time.monotonic()
+                or self.generation - entry.generation > self.config["max_catalog_lag"])
+
+    def lookup(self, agent_type: str, prompt: str) -> Optional[str]:
+        tokens = _tokens(prompt)
+        shingles = _shingles(tokens, self.config["shingle_size"])
+        numbers = frozenset(t for t in tokens if t.isdigit())
+        bands = self._signature(shingles)
+
+        candidates: Set[int] = set()
+        for band_index, band in enumerate(bands):
+            candidates |= self._buckets.get((agent_type, band_index, band), set())
+
+        best_id, best_score = None, 0.0
+        for entry_id in candidates:
+            entry = self._entries.get(entry_id)
+            if entry is None or not _numbers_compatible(entry.numbers, numbers):
+                continue
+            if self._is_stale(entry):
+                self._remove(entry_id)
+                self.counters["stale"] += 1
+                continue
+            score = len(shingles & entry.shingles) / len(shingles | entry.shingles)
+            if score > best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None or best_score < self.config["threshold"]:
+            self.counters["misses"] += 1
+            return None
+        self._entries.move_to_end(best_id)
+        self.counters["hits"] += 1
+        return self._entries[best_id].value
+
+    def store(self, agent_type: str, prompt: str, value: str):
+        tokens = _tokens(prompt)
+        shingles = _shingles(tokens, self.config["shingle_size"])
+        bands = self._signature(shingles)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = SemanticEntry(
+            agent_type, shingles, frozenset(t for t in tokens if t.isdigit()), bands, value,
+            self.generation, time.monotonic() + self.config["ttl"]
+        )
+        for band_index, band in enumerate(bands):
+            self._buckets.setdefault((agent_type, band_index, band), set()).add(entry_id)
+        self.counters["inserts"] += 1
+
+        while len(self._entries) > self.config["max_entries"]:
+            self._remove(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        for band_index, band in enumerate(entry.bands):
+            key = (entry.agent_type, band_index, band)
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def values(self) -> List[str]:
+        return [entry.value for entry in self._entries.values()]
+
+    def clear(self):
+        self._entries.clear()
+        self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "generation": self.generation
+        }
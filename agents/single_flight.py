@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters", "deadline")
+
+    def __init__(self, task: asyncio.Task, deadline: Optional[float]):
+        self.task = task
+        self.waiters = 0
+        self.deadline = deadline
+
+    def covers(self, deadline: Optional[float]) -> bool:
+        """Whether this flight is allowed to run at least as long as ``deadline``"""
+        if self.deadline is None:
+            return True
+        return deadline is not None and self.deadline >= deadline
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    Every caller awaits the same task through ``asyncio.shield``, so one
+    caller being cancelled never cancels the shared work. The task itself is
+    cancelled only when its last waiter leaves before it finishes.
+
+    A flight is bounded by the deadline of the caller that started it, so a
+    caller only joins a flight whose deadline is at least its own; otherwise
+    it starts a new flight, which later callers with the same key join.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.counters = {"calls": 0, "executions": 0, "collapsed": 0, "abandoned": 0, "outlived": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                 deadline: Optional[float] = None) -> Any:
+        """Run ``fn`` or join an identical call; ``deadline`` is the ``time.monotonic()`` bound ``fn`` runs to"""
+        self.counters["calls"] += 1
+        flight = self._flights.get(key)
+        if flight is not None and not flight.covers(deadline):
+            # That flight gives up sooner than this caller has to; the
+            # existing waiters keep it, new callers get this one
+            self.counters["outlived"] += 1
+            flight = None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()), deadline)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._forget(key, flight))
+            self.counters["executions"] += 1
+        else:
+            self.counters["collapsed"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Detach first so a caller arriving now starts a fresh flight
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.counters["abandoned"] += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "in_flight": len(self._flights)}
@@ -1,10 +1,42 @@
-import requests
 import os
+import json
+import time
+import asyncio
 import logging
-from typing import Dict, Any
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Any, Iterable, List, Optional, Set, Tuple, Union
+
+import httpx
+
+from agents.http_client import AsyncHTTPClient
+from agents.prompt_compiler import CompiledPrompts, PromptCompiler
+from agents.prompt_budget import PromptBudget, estimate_tokens
+from agents.response_cache import ResponseCache, normalize_message
+from agents.semantic_cache import SemanticCache
+from agents.single_flight import SingleFlight
+from agents.latency import LatencyTracker
+from agents.circuit_breaker import CircuitBreaker
+from agents.model_router import ModelRouter
+from agents.micro_batcher import MicroBatcher
+from agents.model_warmer import ModelWarmer
+from agents.intent_matcher import IntentMatcher
+from agents.product_catalog import Product, ProductCatalog
+from agents.product_search import NameMatcher, ProductSearchIndex, SearchHit
 
 logger = logging.getLogger(__name__)
 
+class CatalogUpdate:
+    """A catalog plus everything derived from it, ready for ``install_catalog``"""
+    __slots__ = ("catalog", "base_version", "changed_skus", "search_index", "prompts", "is_affected")
+    
+    def __init__(self, catalog: ProductCatalog, base_version: str):
+        self.catalog = catalog
+        self.base_version = base_version
+        self.changed_skus: Set[str] = set()
+        self.search_index: Optional[ProductSearchIndex] = None
+        self.prompts: Optional[CompiledPrompts] = None
+        self.is_affected: Optional[Callable[[str], bool]] = None
+
 class StaticaAIAgent:
     def __init__(self):
         self.huggingface_token = os.getenv("HF_TOKEN", "")
@@ -22,7 +54,7 @@ class StaticaAIAgent:
         }
         
         # Complete Product Catalog based on your website
-        self.product_catalog = {
+        catalog = {
             # Static Model Kits
             "virus_sw_80_30cm": {
                 "name": "Virus SW 80 Static Model Balsa Kit (30 cms)",
@@ -40,7 +72,8 @@ class StaticaAIAgent:
                 ],
                 "specs": "Length: 30cm, Material: Balsa Wood",
                 "ideal_for": "NCC competitions, beginners, hobbyists, educational projects",
-                "url": "https://statica.in/balsa-wood-aircraft-model-kits/"
+                "url": "https://statica.in/balsa-wood-aircraft-model-kits/",
+                "aliases": ["sw80", "virus 30"]
             },
             
             "virus_sw_80_55cm": {
@@ -59,7 +92,8 @@ class StaticaAIAgent:
                 ],
                 "specs": "Length: 55cm, Material: Balsa Wood",
                 "ideal_for": "Advanced modelers, display pieces, competitions, collectors",
-                "url": "https://statica.in/balsa-wood-aircraft-model-kits/"
+                "url": "https://statica.in/balsa-wood-aircraft-model-kits/",
+                "aliases": ["sw80", "virus 55"]
             },
             
             "dassault_rafale": {
@@ -91,7 +125,8 @@ class StaticaAIAgent:
                 ],
                 "specs": "Scale model, Material: Balsa Wood", 
                 "ideal_for": "IAF enthusiasts, advanced builders",
-                "url": "https://statica.in/premium-aircraft-models/"
+                "url": "https://statica.in/premium-aircraft-models/",
+                "aliases": ["su30", "su30mki"]
             },
             
             # Flying Model Kits
@@ -144,65 +179,552 @@ class StaticaAIAgent:
                 "url": "https://statica.in/precision-modeling-tools-aircraft-assembly/"
             }
         }
+        self.product_catalog = ProductCatalog.from_dict(catalog)
         
         self.models = {
             "product": "microsoft/DialoGPT-large",
             "support": "microsoft/DialoGPT-medium", 
             "general": "microsoft/DialoGPT-medium"
         }
+        
+        # Local-answer routing table, highest priority first. A trailing "*"
+        # allows word suffixes; everything else matches whole words only.
+        self.intent_rules = [
+            ("static_models", ["virus", "sw80", "static model*", "balsa"]),
+            ("flying_models", ["flying", "control line", "rc", "skybee", "peacemaker"]),
+            ("tools", ["tool*", "equipment", "cutter*", "sanding"]),
+            ("ncc", ["ncc", "competition*", "air wing"]),
+            ("pricing", ["price*", "cost*", "how much"]),
+            ("comparison", ["difference*", "compar*", "which one"]),
+            ("beginner", ["beginner*", "starter*", "first kit"]),
+            ("greeting", ["hello", "hi", "help"]),
+        ]
+        # Detail keywords used to pick a specific answer within an intent
+        self.detail_rules = [
+            ("size_30", ["30*", "small*"]),
+            ("size_55", ["55*", "large*"]),
+            ("rafale", ["rafale"]),
+            ("sukhoi", ["sukhoi", "su30*"]),
+            ("static", ["static"]),
+            ("flying", ["flying"]),
+        ]
+        self.intent_priority = [intent for intent, _ in self.intent_rules]
+        self.intent_matcher = IntentMatcher(self.intent_rules + self.detail_rules)
+        
+        self.hf_api_host = "api-inference.huggingface.co"
+        self.http_client = AsyncHTTPClient()
+        self.http_client.set_host_limit(
+            self.hf_api_host, int(os.getenv("HF_MAX_CONCURRENCY", 4))
+        )
+        self.default_model = "microsoft/DialoGPT-large"
+        # Identical concurrent upstream calls share one request
+        self.single_flight = SingleFlight()
+        # A degraded upstream is skipped outright instead of waited on
+        self.hf_latency = LatencyTracker()
+        self.hf_breaker = CircuitBreaker("huggingface")
+        # Each agent_type prefers its own model and can hedge onto the others
+        self.model_router = ModelRouter({
+            agent_type: [model] + sorted(set(self.models.values()) - {model})
+            for agent_type, model in self.models.items()
+        })
+        # Prompts for the same model arriving within a few ms share one HTTPS call
+        self.micro_batcher = MicroBatcher(self._post_hf_batch)
+        # Pings keep models loaded; known cold starts hold requests briefly
+        self.model_warmer = ModelWarmer(self.models.values(), self._ping_model)
+        
+        # System prompts are rendered once per catalog version, not per message
+        self.prompt_compiler = PromptCompiler(
+            self._build_product_context,
+            self._get_system_prompt,
+            self.models.keys()
+        )
+        self.catalog_version = self.product_catalog.version
+        self._search_index: Optional[ProductSearchIndex] = None
+        self.prompt_compiler.compile(self.catalog_version)
+        # Upstream prompts carry only the catalog entries relevant to the message
+        self.prompt_budget = PromptBudget()
+        self.prompt_top_k = int(os.getenv("HF_PROMPT_TOP_K", 4))
+        self._context_blocks: Dict[str, str] = {}
+        self._context_blocks_version = self.catalog_version
+        
+        # Local answer is computed alongside the upstream call and used if it's slow
+        self.speculation = {
+            "latency_budget": float(os.getenv("HF_LATENCY_BUDGET", 6)),
+            "background_fill": os.getenv("HF_BACKGROUND_FILL", "true").lower() in ("1", "true", "yes"),
+            # With less budget left than this the upstream isn't even tried
+            "min_remote_budget": float(os.getenv("HF_MIN_REMOTE_BUDGET", 0.3)),
+        }
+        self.speculation_counters = {"remote": 0, "local_timeout": 0, "local_failure": 0,
+                                     "background_fills": 0, "remote_skipped": 0}
+        self._background_tasks: Set[asyncio.Task] = set()
+        
+        self.response_cache = ResponseCache()
+        self.semantic_cache = SemanticCache()
+        self.semantic_cache.set_catalog_version(self.catalog_version)
+    
+    async def aclose(self):
+        """Release pooled upstream connections"""
+        for task in list(self._background_tasks):
+            task.cancel()
+        await self.model_warmer.stop()
+        await self.micro_batcher.aclose()
+        await self.http_client.aclose()
+    
+    def update_catalog(self, product_catalog: Union[ProductCatalog, Dict[str, Dict[str, Any]]],
+                       changed_skus: Optional[Set[str]] = None):
+        """Swap in a new catalog and invalidate only what depends on changed SKUs or their categories"""
+        self.install_catalog(self.prepare_catalog(product_catalog, changed_skus))
+    
+    async def reload_catalog(self, product_catalog: Union[ProductCatalog, Dict[str, Dict[str, Any]]],
+                             changed_skus: Optional[Set[str]] = None):
+        """``update_catalog`` with the search index, prompts and cache checks built on a worker thread"""
+        cached_answers = self.response_cache.values() + self.semantic_cache.values()
+        update = await asyncio.to_thread(self.prepare_catalog, product_catalog, changed_skus, cached_answers)
+        retired = self.install_catalog(update)
+        if retired is not None:
+            # Dropping the last reference to a large index would free it on the loop in one go
+            await asyncio.to_thread(retired.release)
+    
+    def prepare_catalog(self, product_catalog: Union[ProductCatalog, Dict[str, Dict[str, Any]]],
+                        changed_skus: Optional[Set[str]] = None,
+                        cached_answers: Iterable[str] = ()) -> "CatalogUpdate":
+        """Build everything a catalog swap needs without touching live state; safe off the event loop"""
+        if not isinstance(product_catalog, ProductCatalog):
+            product_catalog = ProductCatalog.from_dict(product_catalog)
+        base = self.product_catalog
+        update = CatalogUpdate(product_catalog, base.version)
+        if product_catalog.version == base.version:
+            return update
+        if changed_skus is None:
+            changed_skus = base.diff(product_catalog)
+        update.changed_skus = changed_skus
+        update.search_index = ProductSearchIndex(product_catalog)
+        update.prompts = self.prompt_compiler.render(
+            product_catalog.version, lambda: self._build_product_context(product_catalog)
+        )
+        update.is_affected = self._stale_answer_check(base, product_catalog, changed_skus, cached_answers)
+        return update
+    
+    def install_catalog(self, update: "CatalogUpdate") -> Optional[ProductSearchIndex]:
+        """Swap in a prepared catalog in one step and carry unaffected cached answers over.
+
+        Returns the search index it replaced, if any.
+        """
+        old_version = self.catalog_version
+        version = update.catalog.version
+        if version == old_version or update.search_index is None:
+            self.product_catalog = update.catalog
+            return None
+        changed_skus, is_affected = update.changed_skus, update.is_affected
+        if update.base_version != old_version:
+            # Another reload landed while this one was being prepared; diff against what is live now
+            changed_skus = self.product_catalog.diff(update.catalog)
+            is_affected = self._stale_answer_check(self.product_catalog, update.catalog, changed_skus)
+        
+        # Single-threaded swap: no coroutine observes a half-updated agent
+        self.product_catalog = update.catalog
+        self.catalog_version = version
+        retired, self._search_index = self._search_index, update.search_index
+        self.prompt_compiler.install(update.prompts)
+        dropped = self.response_cache.rekey(old_version, version, is_affected)
+        self.semantic_cache.set_catalog_version(version, is_affected)
+        logger.info(f"Catalog {old_version} -> {version}: {len(changed_skus)} SKUs changed, "
+                    f"{dropped} cached answers invalidated")
+        return retired
     
-    async def generate_response(self, prompt: str, agent_type: str = "product") -> str:
-        """Generate response with complete Statica product knowledge"""
+    @staticmethod
+    def _stale_answer_check(old_catalog: ProductCatalog, new_catalog: ProductCatalog,
+                            changed_skus: Set[str], cached_answers: Iterable[str] = ()) -> Callable[[str], bool]:
+        """Predicate for cached answers a catalog change makes stale.
+
+        An answer naming a changed product is stale, and so is one naming any
+        product of a category that gained, lost or changed a product: it may
+        be a listing of that category, which an added kit can't appear in.
+        ``cached_answers`` are checked up front, leaving only answers cached
+        since then to scan during the swap.
+        """
+        if set(old_catalog.categories()) != set(new_catalog.categories()):
+            # Overview answers list the categories themselves
+            return lambda text: True
+        changed_categories = set()
+        names = set()
+        for sku in changed_skus:
+            for catalog in (old_catalog, new_catalog):
+                product = catalog.get(sku)
+                if product is not None:
+                    changed_categories.add(product.category)
+                    names.add(product.name)
+        for category in changed_categories:
+            names.update(product.name for product in old_catalog.by_category(category))
+        matcher = NameMatcher(names)
+        checked = {text: matcher(text) for text in cached_answers}
+        
+        def is_affected(text: str) -> bool:
+            stale = checked.get(text)
+            return matcher(text) if stale is None else stale
+        
+        return is_affected
+    
+    def get_search_index(self) -> ProductSearchIndex:
+        """BM25 index for the current catalog, rebuilt lazily after a catalog change"""
+        index = self._search_index
+        if index is None or index.version != self.catalog_version:
+            index = ProductSearchIndex(self.product_catalog)
+            self._search_index = index
+        return index
+    
+    def search_products(self, query: str, limit: int = 10, **filters) -> List[SearchHit]:
+        """Rank catalog products against a free-text query"""
+        return self.get_search_index().search(query, limit=limit, **filters)
+    
+    async def generate_response(self, prompt: str, agent_type: str = "product",
+                                meta: Optional[Dict[str, Any]] = None,
+                                deadline: Optional[float] = None) -> str:
+        """Generate response with complete Statica product knowledge; ``meta`` receives agent_used.
+
+        ``deadline`` is a ``time.monotonic()`` instant the answer is due by; the
+        cheapest tier that fits is used: cache, then upstream model, then local.
+        """
+        meta = meta if meta is not None else {}
         try:
-            # Build comprehensive product context
-            product_context = self._build_product_context()
-            system_prompt = self._get_system_prompt(agent_type, product_context)
+            cache_key = self.response_cache.make_key(agent_type, prompt, self.catalog_version)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                meta["agent_used"] = "cache"
+                return cached.value
             
             if self.huggingface_token:
-                response = await self._call_huggingface_api(prompt, system_prompt)
-                if response and "thank you for your message" not in response.lower():
+                # Rephrasings of an already answered question skip the upstream call
+                response = self.semantic_cache.lookup(agent_type, prompt)
+                if response is not None:
+                    meta["agent_used"] = "semantic_cache"
+                    self.response_cache.put(cache_key, response, "huggingface")
                     return response
+                if self._remote_fits(agent_type, deadline):
+                    return await self._remote_or_local(prompt, agent_type, cache_key, meta, deadline)
+                # Not cached: a caller with more budget should still get the model's answer
+                self.speculation_counters["remote_skipped"] += 1
+                meta["agent_used"] = "local"
+                return self._get_local_response(prompt, agent_type)
             
             # Fallback to specialized local responses
-            return self._get_local_response(prompt, agent_type)
+            response = self._get_local_response(prompt, agent_type)
+            self.response_cache.put(cache_key, response, "local")
+            meta["agent_used"] = "local"
+            return response
                 
         except Exception as e:
             logger.error(f"AI generation error: {str(e)}")
-            return self._get_local_response(prompt, agent_type)
+            meta["agent_used"] = "local"
+            try:
+                return self._get_local_response(prompt, agent_type)
+            except Exception as e:
+                logger.error(f"Local response error: {str(e)}")
+                return self._get_general_response(prompt)
     
-    def _build_product_context(self) -> str:
-        """Build detailed product context for the AI"""
-        catalog_summary = "STatica.in COMPLETE PRODUCT CATALOG:\n\n"
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else deadline - time.monotonic()
+    
+    def _remote_fits(self, agent_type: str, deadline: Optional[float]) -> bool:
+        """Whether an upstream call can plausibly finish before the deadline"""
+        remaining = self._remaining(deadline)
+        if remaining is None:
+            return True
+        expected = self.model_router.expected_latency(agent_type) or 0.0
+        return remaining >= max(self.speculation["min_remote_budget"], expected)
+    
+    async def _remote_or_local(self, prompt: str, agent_type: str, cache_key: str,
+                               meta: Dict[str, Any], deadline: Optional[float] = None) -> str:
+        """Race the upstream call against the latency budget, with the local answer ready.
+
+        The remote answer wins if it arrives within budget. Otherwise the local
+        answer goes out at once and the upstream call either finishes in the
+        background to fill the caches or is cancelled.
+        """
+        remote_meta: Dict[str, Any] = {}
+        remote = asyncio.ensure_future(self._call_huggingface_api(prompt, agent_type, remote_meta, deadline))
+        try:
+            # Local work overlaps the upstream round trip
+            local = self._get_local_response(prompt, agent_type)
+            budget = self.speculation["latency_budget"]
+            remaining = self._remaining(deadline)
+            # The caller's deadline, not the speculation budget, bounds this wait
+            caller_limited = remaining is not None and remaining < budget
+            if caller_limited:
+                budget = max(0.0, remaining)
+            done, _ = await asyncio.wait({remote}, timeout=budget)
+        except asyncio.CancelledError:
+            self._finish_in_background(remote, prompt, agent_type, cache_key)
+            raise
+        
+        if done:
+            response = None if remote.exception() else remote.result()
+            if self._store_remote_answer(prompt, agent_type, cache_key, response):
+                self.speculation_counters["remote"] += 1
+                meta["agent_used"] = "huggingface"
+                meta.update(remote_meta)
+                return response
+            self.speculation_counters["local_failure"] += 1
+            # A call cut short at the deadline failed for this caller only
+            caller_limited = caller_limited and self._remaining(deadline) < self.speculation["min_remote_budget"]
+        else:
+            self.speculation_counters["local_timeout"] += 1
+            logger.info(f"Upstream over {budget:.2f}s budget, answering locally")
+            self._finish_in_background(remote, prompt, agent_type, cache_key)
         
+        # Short-lived, so a late or recovered upstream answer replaces it soon.
+        # Skipped when only this caller's budget ran out: a caller with more
+        # time should still get the model's answer
+        if not caller_limited:
+            self.response_cache.put(cache_key, local, "negative")
+        meta["agent_used"] = "local"
+        return local
+    
+    def _store_remote_answer(self, prompt: str, agent_type: str, cache_key: str,
+                             response: Optional[str]) -> bool:
+        """Cache a usable upstream answer; False if it isn't one"""
+        if not response or "thank you for your message" in response.lower():
+            return False
+        self.semantic_cache.store(agent_type, prompt, response)
+        self.response_cache.put(cache_key, response, "huggingface")
+        return True
+    
+    def _finish_in_background(self, remote: asyncio.Task, prompt: str, agent_type: str, cache_key: str):
+        if not self.speculation["background_fill"]:
+            remote.cancel()
+            return
+        
+        def fill(task: asyncio.Task):
+            self._background_tasks.discard(task)
+            if task.cancelled() or task.exception():
+                return
+            if self._store_remote_answer(prompt, agent_type, cache_key, task.result()):
+                self.speculation_counters["background_fills"] += 1
+        
+        self._background_tasks.add(remote)
+        remote.add_done_callback(fill)
+    
+    async def generate_batch(self, requests: Iterable[Tuple[str, str]],
+                             concurrency: int = 8) -> AsyncIterator[Dict[str, Any]]:
+        """Answer (prompt, agent_type) pairs concurrently, yielding results in input order.
+
+        Identical prompts share one generation. At most ``concurrency`` answers
+        are generated at once and only a small window of results is buffered,
+        so memory stays flat however long the input is.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        window_size = concurrency * 2
+        window = deque()
+        # key -> [task, number of window entries waiting on it]
+        inflight: Dict[Tuple[str, str], list] = {}
+        
+        async def run_one(prompt: str, agent_type: str) -> Dict[str, Any]:
+            async with semaphore:
+                meta: Dict[str, Any] = {}
+                start = time.perf_counter()
+                response = await self.generate_response(prompt, agent_type, meta)
+                return {
+                    "response": response,
+                    "agent_used": meta.get("agent_used", "local"),
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+                }
+        
+        async def finish_head() -> Dict[str, Any]:
+            index, key, deduplicated = window.popleft()
+            slot = inflight[key]
+            try:
+                result = dict(await slot[0])
+                result["success"] = True
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {str(e)}")
+                result = {"response": "", "agent_used": "fallback", "elapsed_ms": None, "success": False}
+            slot[1] -= 1
+            if slot[1] == 0:
+                del inflight[key]
+            return {"index": index, "deduplicated": deduplicated, **result}
+        
+        try:
+            for index, (prompt, agent_type) in enumerate(requests):
+                key = (agent_type, normalize_message(prompt))
+                slot = inflight.get(key)
+                deduplicated = slot is not None
+                if slot is None:
+                    slot = inflight[key] = [asyncio.create_task(run_one(prompt, agent_type)), 0]
+                slot[1] += 1
+                window.append((index, key, deduplicated))
+                while len(window) >= window_size:
+                    yield await finish_head()
+            while window:
+                yield await finish_head()
+        finally:
+            # Consumer went away (e.g. client disconnect): drop outstanding work
+            for task, _ in inflight.values():
+                task.cancel()
+    
+    async def stream_response(self, prompt: str, agent_type: str = "product",
+                              meta: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Yield the answer in chunks as it is produced; ``meta`` receives agent_used"""
+        meta = meta if meta is not None else {}
+        cache_key = self.response_cache.make_key(agent_type, prompt, self.catalog_version)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            meta["agent_used"] = "cache"
+            for chunk in self._chunk_text(cached.value):
+                yield chunk
+            return
+        
+        if self.huggingface_token:
+            similar = self.semantic_cache.lookup(agent_type, prompt)
+            if similar is not None:
+                meta["agent_used"] = "semantic_cache"
+                self.response_cache.put(cache_key, similar, "huggingface")
+                for chunk in self._chunk_text(similar):
+                    yield chunk
+                return
+            
+            # Streams can't be hedged, so they go straight to the best-ranked model
+            model = self.model_router.rank(agent_type)[0]
+            system_prompt = self._build_system_prompt(agent_type, prompt, model)
+            parts = []
+            completed = False
+            if await self.model_warmer.wait_until_ready(model) and self.hf_breaker.allow_request():
+                start = time.monotonic()
+                first_token_seconds = None
+                try:
+                    async for token in self._stream_huggingface_api(prompt, system_prompt, model):
+                        if first_token_seconds is None:
+                            first_token_seconds = time.monotonic() - start
+                        parts.append(token)
+                        yield token
+                    completed = True
+                except (asyncio.CancelledError, GeneratorExit):
+                    self.hf_breaker.release()
+                    raise
+                except Exception as e:
+                    logger.error(f"Hugging Face stream error: {str(e)}")
+                if first_token_seconds is not None:
+                    self._record_upstream_success(model, first_token_seconds)
+                else:
+                    self._record_upstream_failure(model)
+            
+            text = "".join(parts).strip()
+            if text:
+                meta["agent_used"] = "huggingface"
+                meta["model"] = model
+                # Only complete answers are worth caching
+                if completed:
+                    self.semantic_cache.store(agent_type, prompt, text)
+                    self.response_cache.put(cache_key, text, "huggingface")
+                return
+        
+        response = self._get_local_response(prompt, agent_type)
+        self.response_cache.put(
+            cache_key, response, "negative" if self.huggingface_token else "local"
+        )
+        meta["agent_used"] = "local"
+        for chunk in self._chunk_text(response):
+            yield chunk
+    
+    @staticmethod
+    def _chunk_text(text: str, size: int = 48) -> List[str]:
+        """Split text into roughly ``size``-character chunks on whitespace"""
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = min(start + size, len(text))
+            if end < len(text):
+                space = text.rfind(" ", start, end)
+                if space > start:
+                    end = space + 1
+            chunks.append(text[start:end])
+            start = end
+        return chunks
+    
+    def _build_product_context(self, product_catalog: Optional[ProductCatalog] = None) -> str:
+        """Build detailed product context for the AI"""
+        product_catalog = product_catalog or self.product_catalog
         # Group by category
         categories = {
             "static_models": "🎯 STATIC DISPLAY MODEL KITS (Balsa Wood):",
             "flying_models": "✈️ FLYING MODEL KITS (RC & Control Line):", 
             "tools": "🛠️ PRECISION MODELING TOOLS & EQUIPMENT:"
         }
-        
+        parts = ["STatica.in COMPLETE PRODUCT CATALOG:\n\n"]
         for category_id, category_name in categories.items():
-            catalog_summary += f"\n{category_name}\n"
-            catalog_summary += "=" * 50 + "\n"
+            parts.append(f"\n{category_name}\n")
+            parts.append("=" * 50 + "\n")
             
-            for product_id, product in self.product_catalog.items():
-                if product["category"] == category_id:
-                    catalog_summary += f"""
-Product: {product['name']}
-Price: {product['price']}
-Description: {product['description']}
-Key Features: {', '.join(product['features'][:3])}...
-Ideal For: {product['ideal_for']}
-Details: {self.company_context['website']}{product['url']}
+            for product in product_catalog.by_category(category_id):
+                parts.append(self._format_product_context(product))
+        
+        return "".join(parts)
+    
+    def _format_product_context(self, product: Product) -> str:
+        """One product's entry in the system prompt catalog"""
+        return f"""
+Product: {product.name}
+Price: {product.price}
+Description: {product.description}
+Key Features: {', '.join(product.features[:3])}...
+Ideal For: {product.ideal_for}
+Details: {self.company_context['website']}{product.url}
 ---
 """
+    
+    def _context_block(self, product: Product) -> str:
+        if self._context_blocks_version != self.catalog_version:
+            self._context_blocks = {}
+            self._context_blocks_version = self.catalog_version
+        block = self._context_blocks.get(product.sku)
+        if block is None:
+            block = self._format_product_context(product)
+            self._context_blocks[product.sku] = block
+        return block
+    
+    def _build_system_prompt(self, agent_type: str, prompt: str, model: Optional[str] = None) -> str:
+        """System prompt for one upstream call, trimmed to the model's token budget.
+
+        Catalog prompts get the top-k products retrieved for this message
+        instead of the whole catalog, added in relevance order while they fit.
+        """
+        model = model or self.default_model
+        full_bytes = self.prompt_compiler.size(agent_type, self.catalog_version)
+        template = self.prompt_compiler.get_template(agent_type, self.catalog_version)
+        if template is None:
+            prefix, suffix, blocks = self.prompt_compiler.get(agent_type, self.catalog_version), "", []
+        else:
+            prefix, suffix = template
+            hits = self.search_products(prompt, limit=self.prompt_top_k)
+            blocks = [self._context_block(hit.product) for hit in hits]
         
-        return catalog_summary
+        system_prompt, included = self.prompt_budget.assemble(model, prefix, blocks, suffix, prompt)
+        sent_bytes = len(system_prompt.encode("utf-8"))
+        self.prompt_budget.record(sent_bytes, full_bytes)
+        logger.info(f"Prompt for {model}: {sent_bytes} bytes (~{estimate_tokens(system_prompt)} tokens), "
+                    f"{included}/{len(blocks)} products, full catalog prompt {full_bytes} bytes")
+        return system_prompt
     
     def _get_system_prompt(self, agent_type: str, product_context: str) -> str:
         """Get system prompt with complete Statica product knowledge"""
-        base_prompts = {
-            "product": f"""You are a product expert and aeromodelling specialist for {self.company_context['name']} - India's premier aircraft model kit provider.
+        if agent_type == "support":
+            return f"""You are a customer support specialist for {self.company_context['name']}.
+
+You help with:
+- Order status and shipping inquiries across India
+- Product questions and specifications
+- Assembly guidance and resource direction
+- Website navigation and product categories
+- General customer service and support
+
+Be supportive and focus on helping modelers with their specific needs."""
+        
+        if agent_type == "general":
+            return f"""You are a helpful AI assistant for {self.company_context['name']} website.
+
+Provide friendly, accurate information about our premium aircraft model kits, tools, and aeromodelling supplies."""
+        
+        return f"""You are a product expert and aeromodelling specialist for {self.company_context['name']} - India's premier aircraft model kit provider.
 
 COMPANY INFORMATION:
 - Business: {self.company_context['business_type']}
@@ -243,127 +765,125 @@ Always be:
 - Helpful in guiding customers to the right products
 - Specific about product details and specifications
 - Encouraging about the hobby and craftsmanship
-- Clear about pricing and product availability""",
-
-            "support": f"""You are a customer support specialist for {self.company_context['name']}.
-
-You help with:
-- Order status and shipping inquiries across India
-- Product questions and specifications
-- Assembly guidance and resource direction
-- Website navigation and product categories
-- General customer service and support
-
-Be supportive and focus on helping modelers with their specific needs.""",
-
-            "general": f"""You are a helpful AI assistant for {self.company_context['name']} website.
-
-Provide friendly, accurate information about our premium aircraft model kits, tools, and aeromodelling supplies."""
-        }
-        
-        return base_prompts.get(agent_type, base_prompts["product"])
+- Clear about pricing and product availability"""
     
     def _get_local_response(self, prompt: str, agent_type: str) -> str:
         """Intelligent local responses specific to Statica products"""
-        prompt_lower = prompt.lower()
-        
-        # Product category detection
-        if any(word in prompt_lower for word in ['virus', 'sw80', 'static model', 'balsa']):
-            return self._get_static_models_response(prompt_lower)
-        
-        elif any(word in prompt_lower for word in ['flying', 'control line', 'rc', 'skybee', 'peacemaker']):
-            return self._get_flying_models_response(prompt_lower)
+        # One pass over the text finds every intent and detail keyword
+        found = self.intent_matcher.matches(prompt)
+        intent = self.intent_matcher.first(found, self.intent_priority)
         
-        elif any(word in prompt_lower for word in ['tools', 'equipment', 'cutters', 'sanding']):
+        if intent == "static_models":
+            return self._get_static_models_response(found)
+        elif intent == "flying_models":
+            return self._get_flying_models_response(prompt)
+        elif intent == "tools":
             return self._get_tools_response()
-        
-        elif any(word in prompt_lower for word in ['ncc', 'competition', 'air wing']):
+        elif intent == "ncc":
             return self._get_ncc_response()
-        
-        elif any(word in prompt_lower for word in ['price', 'cost', 'how much']):
+        elif intent == "pricing":
             return self._get_pricing_response()
-        
-        elif any(word in prompt_lower for word in ['difference', 'compare', 'which one']):
-            return self._get_comparison_response(prompt_lower)
-        
-        elif any(word in prompt_lower for word in ['beginner', 'starter', 'first kit']):
+        elif intent == "comparison":
+            return self._get_comparison_response(found)
+        elif intent == "beginner":
             return self._get_beginner_recommendation()
-        
-        elif any(word in prompt_lower for word in ['hello', 'hi', 'help']):
+        elif intent == "greeting":
             return self._get_welcome_response()
         
-        else:
-            return self._get_general_response(prompt)
+        # No intent keyword: a product named in the message gets its detail card
+        hits = self.search_products(prompt, limit=1, require_name_match=True)
+        if hits:
+            return self._format_product_details(hits[0].product)
+        return self._get_general_response(prompt)
+    
+    def _find_product(self, sku: str, query: str, category: Optional[str] = None) -> Optional[Product]:
+        """The built-in SKU if the loaded catalog has it, else the best name match for ``query``"""
+        product = self.product_catalog.get(sku)
+        if product is None:
+            hits = self.search_products(query, limit=1, category=category, require_name_match=True)
+            product = hits[0].product if hits else None
+        return product
     
-    def _get_static_models_response(self, prompt: str) -> str:
+    def _get_static_models_response(self, found: Set[str]) -> str:
         """Handle static model kit queries"""
-        if '30' in prompt or 'small' in prompt:
-            product = self.product_catalog['virus_sw_80_30cm']
-        elif '55' in prompt or 'large' in prompt:
-            product = self.product_catalog['virus_sw_80_55cm']
-        elif 'rafale' in prompt:
-            product = self.product_catalog['dassault_rafale']
-        elif 'sukhoi' in prompt or 'su30' in prompt:
-            product = self.product_catalog['sukhoi_su30']
-        else:
+        product = None
+        if 'size_30' in found:
+            product = self._find_product('virus_sw_80_30cm', 'virus 30cm', 'static_models')
+        elif 'size_55' in found:
+            product = self._find_product('virus_sw_80_55cm', 'virus 55cm', 'static_models')
+        elif 'rafale' in found:
+            product = self._find_product('dassault_rafale', 'rafale', 'static_models')
+        elif 'sukhoi' in found:
+            product = self._find_product('sukhoi_su30', 'sukhoi su30', 'static_models')
+        
+        if product is None:
             # General static models info
-            static_kits = [p for p in self.product_catalog.values() if p['category'] == 'static_models']
+            static_kits = self.product_catalog.by_category('static_models')
             
             response = "**🎯 STATIC DISPLAY MODEL KITS**\n\n"
             response += "We offer premium balsa wood static model kits perfect for display, education, and NCC competitions:\n\n"
             
             for kit in static_kits:
-                response += f"✈️ **{kit['name']}** - {kit['price']}\n"
-                response += f"   {kit['description'][:100]}...\n"
-                response += f"   Ideal for: {kit['ideal_for']}\n\n"
+                response += f"✈️ **{kit.name}** - {kit.price}\n"
+                response += f"   {kit.description[:100]}...\n"
+                response += f"   Ideal for: {kit.ideal_for}\n\n"
             
             response += f"Browse all static models: {self.company_context['website']}/balsa-wood-aircraft-model-kits/"
             return response
 
-        return f"""**{product['name']}**
+        return self._format_product_details(product)
+    
+    def _format_product_details(self, product: Product) -> str:
+        """Detail card for a single product"""
+        return f"""**{product.name}**
 
-💰 **Price:** {product['price']}
-📏 **Specs:** {product['specs']}
-🎯 **Ideal For:** {product['ideal_for']}
+💰 **Price:** {product.price}
+📏 **Specs:** {product.specs}
+🎯 **Ideal For:** {product.ideal_for}
 
-{product['description']}
+{product.description}
 
 **Key Features:**
-{chr(10).join('• ' + feature for feature in product['features'])}
+{chr(10).join('• ' + feature for feature in product.features)}
 
-**Perfect for:** {product['ideal_for']}
+**Perfect for:** {product.ideal_for}
 
-🔗 **View Details:** {product['url']}
+🔗 **View Details:** {product.url}
 
 Ready to build this amazing aircraft model? Visit our website to order!"""
     
     def _get_flying_models_response(self, prompt: str) -> str:
         """Handle flying model kit queries"""
-        flying_kits = [p for p in self.product_catalog.values() if p['category'] == 'flying_models']
+        flying_kits = self.product_catalog.by_category('flying_models')
         
         response = "**✈️ FLYING MODEL KITS**\n\n"
         response += "We offer control line and RC flying model kits for hobbyists who want to fly their creations:\n\n"
         
         for kit in flying_kits:
-            response += f"🚀 **{kit['name']}** - {kit['price']}\n"
-            response += f"   {kit['description']}\n"
-            response += f"   Skill Level: {kit['ideal_for']}\n\n"
+            response += f"🚀 **{kit.name}** - {kit.price}\n"
+            response += f"   {kit.description}\n"
+            response += f"   Skill Level: {kit.ideal_for}\n\n"
         
         response += f"Explore flying models: {self.company_context['website']}/flying-model-kits-rc-control-line/"
         return response
     
     def _get_tools_response(self) -> str:
         """Handle tools and equipment queries"""
-        tools = self.product_catalog['modeling_tools']
+        tools = self.product_catalog.get('modeling_tools')
+        if tools is None:
+            tools = next(iter(self.product_catalog.by_category('tools')), None)
         
-        return f"""**🛠️ PRECISION MODELING TOOLS**
-
-{tools['description']}
+        offer = ""
+        if tools is not None:
+            offer = f"""{tools.description}
 
 **What we offer:**
-{chr(10).join('• ' + feature for feature in tools['features'])}
+{chr(10).join('• ' + feature for feature in tools.features)}
 
-**Essential for:**
+"""
+        return f"""**🛠️ PRECISION MODELING TOOLS**
+
+{offer}**Essential for:**
 • Cutting and shaping balsa wood
 • Sanding and finishing surfaces  
 • Precise assembly and alignment
@@ -376,18 +896,23 @@ These tools will help you build better, more precise aircraft models!"""
     
     def _get_ncc_response(self) -> str:
         """Handle NCC-specific inquiries"""
-        ncc_kits = [
-            self.product_catalog['virus_sw_80_30cm'],
-            self.product_catalog['virus_sw_80_55cm']
-        ]
+        ncc_kits = []
+        for sku, query in (('virus_sw_80_30cm', 'virus 30cm'), ('virus_sw_80_55cm', 'virus 55cm')):
+            product = self._find_product(sku, query, 'static_models')
+            if product is not None and product not in ncc_kits:
+                ncc_kits.append(product)
+        # The Virus recommendations below only apply if those kits are stocked
+        has_virus_kits = len(ncc_kits) == 2
+        if not ncc_kits:
+            ncc_kits = self.product_catalog.by_category('static_models')[:2]
         
         response = "**Perfect for NCC Air Wing!** 🎖️\n\n"
         response += "Our kits are specifically designed for AIVSC & IGC aeromodelling competitions:\n\n"
         
         for kit in ncc_kits:
-            response += f"✅ **{kit['name']}** - {kit['price']}\n"
-            response += f"   {kit['specs']}\n"
-            response += f"   {kit['ideal_for']}\n\n"
+            response += f"✅ **{kit.name}** - {kit.price}\n"
+            response += f"   {kit.specs}\n"
+            response += f"   {kit.ideal_for}\n\n"
         
         response += "**Why our kits are ideal for NCC:**\n"
         response += "• Precision CNC laser-cut for competition-level accuracy\n"
@@ -396,11 +921,14 @@ These tools will help you build better, more precise aircraft models!"""
         response += "• IAF scheme decals for authenticity\n"
         response += "• Meets NCC competition requirements\n\n"
         
-        response += "**Recommended for NCC Competitions:**\n"
-        response += "• **30cm Virus SW 80** - Standard competition size\n"
-        response += "• **55cm Virus SW 80** - For advanced projects\n\n"
-        
-        response += "Both kits include everything needed for NCC building competitions!"
+        if has_virus_kits:
+            response += "**Recommended for NCC Competitions:**\n"
+            response += "• **30cm Virus SW 80** - Standard competition size\n"
+            response += "• **55cm Virus SW 80** - For advanced projects\n\n"
+            
+            response += "Both kits include everything needed for NCC building competitions!"
+        else:
+            response += f"Browse all static models: {self.company_context['website']}/balsa-wood-aircraft-model-kits/"
         return response
     
     def _get_pricing_response(self) -> str:
@@ -434,11 +962,11 @@ Here's our pricing range for Statica aircraft model kits:
 
 Which type of model kit interests you?"""
     
-    def _get_comparison_response(self, prompt: str) -> str:
+    def _get_comparison_response(self, found: Set[str]) -> str:
         """Handle product comparison queries"""
-        if 'static' in prompt and 'flying' in prompt:
+        if 'static' in found and 'flying' in found:
             return self._compare_static_vs_flying()
-        elif '30' in prompt and '55' in prompt:
+        elif 'size_30' in found and 'size_55' in found:
             return self._compare_virus_sizes()
         else:
             return self._general_comparison()
@@ -471,22 +999,24 @@ Which experience are you looking for?"""
     
     def _compare_virus_sizes(self) -> str:
         """Compare Virus SW 80 sizes"""
-        kit_30 = self.product_catalog['virus_sw_80_30cm']
-        kit_55 = self.product_catalog['virus_sw_80_55cm']
+        kit_30 = self._find_product('virus_sw_80_30cm', 'virus 30cm', 'static_models')
+        kit_55 = self._find_product('virus_sw_80_55cm', 'virus 55cm', 'static_models')
+        if kit_30 is None or kit_55 is None or kit_30 is kit_55:
+            return self._general_comparison()
         
         return f"""**🆚 Virus SW 80: 30cm vs 55cm Comparison**
 
-**{kit_30['name']}**
-• Price: {kit_30['price']}
+**{kit_30.name}**
+• Price: {kit_30.price}
 • Length: 30cm
-• Best for: {kit_30['ideal_for']}
+• Best for: {kit_30.ideal_for}
 • Portability: Easy to transport
 • Detail Level: Standard competition detail
 
-**{kit_55['name']}**  
-• Price: {kit_55['price']}
+**{kit_55.name}**  
+• Price: {kit_55.price}
 • Length: 55cm  
-• Best for: {kit_55['ideal_for']}
+• Best for: {kit_55.ideal_for}
 • Portability: Larger, more impressive
 • Detail Level: Enhanced details and presence
 
@@ -594,46 +1124,202 @@ For more specific assistance, you can also:
 
 What specific type of aircraft model kit are you interested in?"""
 
-    async def _call_huggingface_api(self, prompt: str, system_prompt: str) -> str:
-        """Call Hugging Face API with enhanced context"""
-        try:
-            model = "microsoft/DialoGPT-large"
-            api_url = f"https://api-inference.huggingface.co/models/{model}"
-            
-            headers = {
-                "Authorization": f"Bearer {self.huggingface_token}",
-                "Content-Type": "application/json"
-            }
-            
-            full_prompt = f"{system_prompt}\n\nUser: {prompt}\nAssistant:"
-            
-            payload = {
-                "inputs": full_prompt,
-                "parameters": {
-                    "max_new_tokens": 300,
-                    "temperature": 0.7,
-                    "do_sample": True,
-                    "return_full_text": False
-                }
+    def _build_hf_request(self, prompt: str, system_prompt: str, stream: bool = False,
+                          model: Optional[str] = None) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """URL, headers and payload for a Hugging Face inference call"""
+        model = model or self.default_model
+        api_url = f"https://{self.hf_api_host}/models/{model}"
+        
+        headers = {
+            "Authorization": f"Bearer {self.huggingface_token}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "inputs": self._format_hf_input(prompt, system_prompt),
+            "parameters": {
+                "max_new_tokens": 300,
+                "temperature": 0.7,
+                "do_sample": True,
+                "return_full_text": False
             }
+        }
+        if stream:
+            payload["stream"] = True
+        return api_url, headers, payload
+    
+    @staticmethod
+    def _format_hf_input(prompt: str, system_prompt: str) -> str:
+        return f"{system_prompt}\n\nUser: {prompt}\nAssistant:"
+    
+    @staticmethod
+    def _parse_generated(entry: Any) -> Optional[str]:
+        """Answer text from one generated item; batched calls nest it in a list"""
+        if isinstance(entry, list):
+            entry = entry[0] if entry else {}
+        generated_text = entry.get('generated_text', '') if isinstance(entry, dict) else ''
+        if "Assistant:" in generated_text:
+            generated_text = generated_text.split("Assistant:")[-1].strip()
+        return generated_text or None
+    
+    async def _call_huggingface_api(self, prompt: str, agent_type: str,
+                                    meta: Optional[Dict[str, Any]] = None,
+                                    deadline: Optional[float] = None) -> Optional[str]:
+        """Call Hugging Face API with enhanced context; None when no usable answer"""
+        async def request(model: str) -> Optional[str]:
+            system_prompt = self._build_system_prompt(agent_type, prompt, model)
+            return await self._request_huggingface(prompt, system_prompt, model, deadline)
+        
+        model, response = await self.single_flight.do(
+            (agent_type, self.catalog_version, prompt),
+            lambda: self.model_router.call(agent_type, request),
+            deadline
+        )
+        if meta is not None and model is not None:
+            meta["model"] = model
+        return response
+    
+    async def _request_huggingface(self, prompt: str, system_prompt: str, model: str,
+                                   deadline: Optional[float] = None) -> Optional[str]:
+        """Single upstream inference request, sent as part of a micro-batch"""
+        read_timeout = self.model_router.timeout_for(model)
+        remaining = self._remaining(deadline)
+        # A timeout we imposed for the caller's deadline says nothing about upstream health
+        deadline_capped = remaining is not None and remaining < read_timeout
+        if deadline_capped:
+            if remaining <= 0:
+                return None
+            read_timeout = remaining
+        
+        # A 503 "loading" marks the model cold; retry once it should be up, if that's soon enough
+        for _ in range(2):
+            if not await self.model_warmer.wait_until_ready(model, self._remaining(deadline)):
+                return None
+            if deadline is not None:
+                read_timeout = min(read_timeout, max(0.0, self._remaining(deadline)))
+            response = await self.micro_batcher.submit(model, (prompt, system_prompt, deadline_capped), read_timeout)
+            if response is not None or not self.model_warmer.is_loading(model):
+                return response
+        return None
+    
+    async def _post_hf_batch(self, model: str, items: List[Tuple[str, str, bool]],
+                             read_timeout: float) -> List[Optional[str]]:
+        """One upstream inference call for a batch of prompts, guarded by the circuit breaker"""
+        if not self.hf_breaker.allow_request():
+            return [None] * len(items)
+        start = time.monotonic()
+        try:
+            prompt, system_prompt, _ = items[0]
+            api_url, headers, payload = self._build_hf_request(prompt, system_prompt, model=model)
+            if len(items) > 1:
+                payload["inputs"] = [self._format_hf_input(prompt, system_prompt)
+                                     for prompt, system_prompt, _ in items]
             
-            response = requests.post(
+            response = await self.http_client.post(
                 api_url,
                 headers=headers,
                 json=payload,
-                timeout=30
+                read_timeout=read_timeout
             )
             
             if response.status_code == 200:
+                self._record_upstream_success(model, time.monotonic() - start)
+                self.model_warmer.mark_warm(model)
                 result = response.json()
-                if isinstance(result, list) and len(result) > 0:
-                    generated_text = result[0].get('generated_text', '')
-                    if "Assistant:" in generated_text:
-                        generated_text = generated_text.split("Assistant:")[-1].strip()
-                    return generated_text or self._get_local_response(prompt, "product")
+                if not isinstance(result, list) or len(result) != len(items):
+                    return [None] * len(items)
+                return [self._parse_generated(entry) for entry in result]
             
-            return self._get_local_response(prompt, "product")
-                
+            estimated = self._loading_estimate(response)
+            if estimated is not None:
+                # Cold model, not an unhealthy upstream
+                logger.info(f"Model {model} is loading, ready in ~{estimated:.0f}s")
+                self.hf_breaker.release()
+                self.model_warmer.mark_loading(model, estimated)
+                return [None] * len(items)
+            
+            logger.warning(f"Hugging Face API returned {response.status_code} for {model}")
+            self._record_upstream_failure(model)
+            return [None] * len(items)
+        
+        except asyncio.CancelledError:
+            self.hf_breaker.release()
+            raise
         except Exception as e:
+            timed_out = isinstance(e, httpx.TimeoutException)
+            if timed_out and all(capped for _, _, capped in items):
+                logger.info(f"Hugging Face call to {model} stopped at the request deadline")
+                self.hf_breaker.release()
+                self.model_router.record_abandoned(model, time.monotonic() - start)
+                return [None] * len(items)
             logger.error(f"Hugging Face API error: {str(e)}")
-            return self._get_local_response(prompt, "product")
+            self._record_upstream_failure(model, time.monotonic() - start if timed_out else None)
+            return [None] * len(items)
+    
+    @staticmethod
+    def _loading_estimate(response: httpx.Response) -> Optional[float]:
+        """Seconds until ready from a 503 "model is loading" reply, else None"""
+        if response.status_code != 503:
+            return None
+        try:
+            body = response.json()
+        except ValueError:
+            return None
+        if not isinstance(body, dict) or "estimated_time" not in body:
+            return None
+        try:
+            return float(body["estimated_time"])
+        except (TypeError, ValueError):
+            return None
+    
+    async def _ping_model(self, model: str) -> Tuple[int, Optional[float]]:
+        """Cheapest possible inference call, used to keep a model loaded"""
+        api_url, headers, payload = self._build_hf_request("Hi", "", model=model)
+        payload["parameters"]["max_new_tokens"] = 1
+        response = await self.http_client.post(api_url, headers=headers, json=payload,
+                                               read_timeout=self.model_router.timeout_for(model))
+        return response.status_code, self._loading_estimate(response)
+    
+    def _record_upstream_success(self, model: str, seconds: float):
+        self.hf_latency.record_success(seconds)
+        self.hf_breaker.record_success(seconds)
+        self.model_router.record_success(model, seconds)
+    
+    def _record_upstream_failure(self, model: str, seconds: Optional[float] = None):
+        """Count a failed call; pass ``seconds`` only for timeouts"""
+        self.hf_latency.record_failure(seconds)
+        self.hf_breaker.record_failure()
+        self.model_router.record_failure(model, seconds)
+    
+    def upstream_stats(self) -> Dict[str, Any]:
+        return {
+            "breaker": self.hf_breaker.stats(),
+            "latency": self.hf_latency.stats(),
+            "prompt": self.prompt_budget.stats(),
+            "routing": self.model_router.stats(),
+            "speculation": {**self.speculation_counters, "background_pending": len(self._background_tasks)},
+            "batching": self.micro_batcher.stats(),
+            "models": self.model_warmer.stats()
+        }
+    
+    async def _stream_huggingface_api(self, prompt: str, system_prompt: str,
+                                      model: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield generated tokens from the Hugging Face server-sent event stream"""
+        model = model or self.default_model
+        api_url, headers, payload = self._build_hf_request(prompt, system_prompt, stream=True, model=model)
+        
+        async with self.http_client.stream("POST", api_url, headers=headers, json=payload,
+                                           read_timeout=self.model_router.timeout_for(model)) as response:
+            if response.status_code != 200:
+                await response.aread()
+                estimated = self._loading_estimate(response)
+                if estimated is not None:
+                    self.model_warmer.mark_loading(model, estimated)
+                raise RuntimeError(f"Hugging Face stream returned {response.status_code}")
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                token = event.get("token") or {}
+                if token.get("text") and not token.get("special"):
+                    yield token["text"]
@@ -0,0 +1,54 @@
+"""Renders/sec for email templates: per-send MIME build vs precompiled segments.
+
+    python bench_templates.py [--seconds 2] [--type welcome]
+"""
+import time
+import argparse
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+from email_templates import EmailTemplates
+from template_compiler import TemplateCompiler
+
+
+def _rate(fn, seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn(count)
+            count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--type", default="welcome")
+    args = parser.parse_args()
+
+    templates = EmailTemplates()
+    compiler = TemplateCompiler(templates, {"cache_size": 0})
+    cached = TemplateCompiler(templates)
+
+    def build_mime(i):
+        rendered = templates.get_template(args.type, None, {"name": f"Pilot {i}"})
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = rendered["subject"]
+        msg.attach(MIMEText(rendered["text_body"], "plain"))
+        msg.attach(MIMEText(rendered["html_body"], "html"))
+        return msg.as_bytes()
+
+    results = [
+        ("before: get_template + MIMEMultipart", _rate(build_mime, args.seconds)),
+        ("after: compiled, unique inputs", _rate(lambda i: compiler.render_mime(args.type, None, {"name": f"Pilot {i}"}), args.seconds)),
+        ("after: compiled, cached inputs", _rate(lambda i: cached.render_mime(args.type, None, {"name": "Pilot"}), args.seconds)),
+    ]
+    baseline = results[0][1]
+    for label, rate in results:
+        print(f"{label:<40} {rate:>12,.0f} renders/s  {rate / baseline:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,24 @@
-import smtplib
 import os
+import re
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.utils import formataddr, formatdate, make_msgid
 from typing import Dict, Any, List
 from email_templates import EmailTemplates
+from smtp_pool import SMTPConnectionPool
+from template_compiler import TemplateCompiler, encode_subject
 
 logger = logging.getLogger(__name__)
 
+_EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+def is_valid_email(email: str) -> bool:
+    # fullmatch: a trailing newline would slip past ``$`` and into the To header
+    return _EMAIL_PATTERN.fullmatch(email) is not None
+
 class EmailAutomationAgent:
     def __init__(self):
         self.templates = EmailTemplates()
+        self.template_compiler = TemplateCompiler(self.templates)
         self.smtp_config = {
             "server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
             "port": int(os.getenv("SMTP_PORT", 587)),
@@ -19,46 +27,46 @@ class EmailAutomationAgent:
             "from_email": os.getenv("FROM_EMAIL", "noreply@statica.in"),
             "from_name": os.getenv("FROM_NAME", "Statica Aircraft Models")
         }
+        # Authenticated connections are reused across sends, off the event loop
+        self.smtp_pool = SMTPConnectionPool(self.smtp_config)
+    
+    def validate(self, recipient_email: str):
+        """Raise ValueError if the email can't be sent at all"""
+        if not self._is_valid_email(recipient_email):
+            raise ValueError("Invalid email address")
+        if not self.is_configured():
+            raise ValueError("Email service not configured")
+    
+    def is_configured(self) -> bool:
+        return bool(self.smtp_config["username"] and self.smtp_config["password"])
+    
+    async def send_email(self, email_type: str, recipient_email: str,
+                         custom_message: str = None, user_data: Dict[str, Any] = None):
+        """Render and send one email; raises on failure"""
+        self.validate(recipient_email)
+        subject, body = self.template_compiler.render_mime(email_type, custom_message, user_data)
+        await self.send_mime(recipient_email, subject, body)
+        logger.info(f"✅ Email sent: {email_type} to {recipient_email}")
+    
+    async def send_mime(self, recipient_email: str, subject: str, body: bytes):
+        """Send a pre-encoded MIME body from TemplateCompiler.render_mime; raises on failure"""
+        from_email = self.smtp_config["from_email"]
+        headers = (
+            f"From: {formataddr((self.smtp_config['from_name'], from_email))}\r\n"
+            f"To: {recipient_email}\r\n"
+            f"Subject: {encode_subject(subject)}\r\n"
+            f"Date: {formatdate(localtime=True)}\r\n"
+            # An explicit domain avoids a hostname lookup per message
+            f"Message-ID: {make_msgid(domain=from_email.rpartition('@')[2] or None)}\r\n"
+        )
+        await self.smtp_pool.send_raw(from_email, [recipient_email], headers.encode("utf-8") + body)
     
-    async def send_automated_email(self, email_type: str, recipient_email: str, 
-                                 custom_message: str = None, user_data: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Send automated email for Statica aircraft models"""
-        try:
-            if not self._is_valid_email(recipient_email):
-                return {"success": False, "message": "Invalid email address", "email_sent": False}
-            
-            if not self.smtp_config["username"] or not self.smtp_config["password"]:
-                return {"success": False, "message": "Email service not configured", "email_sent": False}
-            
-            template = self.templates.get_template(email_type, custom_message, user_data or {})
-            
-            msg = MimeMultipart()
-            msg['From'] = f"{self.smtp_config['from_name']} <{self.smtp_config['from_email']}>"
-            msg['To'] = recipient_email
-            msg['Subject'] = template["subject"]
-            
-            html_part = MimeText(template["html_body"], 'html')
-            text_part = MimeText(template["text_body"], 'plain')
-            msg.attach(text_part)
-            msg.attach(html_part)
-            
-            server = smtplib.SMTP(self.smtp_config["server"], self.smtp_config["port"])
-            server.starttls()
-            server.login(self.smtp_config["username"], self.smtp_config["password"])
-            server.send_message(msg)
-            server.quit()
-            
-            logger.info(f"✅ Email sent: {email_type} to {recipient_email}")
-            return {"success": True, "message": f"Email sent to {recipient_email}", "email_sent": True}
-            
-        except Exception as e:
-            logger.error(f"❌ Email sending failed: {str(e)}")
-            return {"success": False, "message": f"Failed: {str(e)}", "email_sent": False}
+    def close(self):
+        """Close pooled SMTP connections"""
+        self.smtp_pool.close()
     
     def _is_valid_email(self, email: str) -> bool:
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        return is_valid_email(email)
     
     def get_available_templates(self) -> List[Dict[str, str]]:
         return [
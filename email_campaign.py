@@ -0,0 +1,173 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from typing import AsyncIterable, Dict, Any, Iterable, List, Optional, Set, Union
+
+from smtp_pool import is_transient_error
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Spaces calls at most ``rate`` per second, shared by every campaign.
+
+    A rate of 0 means unthrottled.
+    """
+
+    def __init__(self, rate: float):
+        if rate < 0:
+            raise ValueError(f"Campaign rate must be >= 0, got {rate}")
+        self.rate = rate
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + 1 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class Campaign:
+    def __init__(self, email_type: str, total: int, max_failures: int):
+        self.id = uuid.uuid4().hex
+        self.email_type = email_type
+        self.total = total
+        self.status = "running"
+        self.sent = 0
+        self.failed = 0
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        # Only the first ``max_failures`` are kept; ``failed`` counts all of them
+        self.failures: List[Dict[str, str]] = []
+        self.max_failures = max_failures
+        self.task: Optional[asyncio.Task] = None
+
+    def record_failure(self, email: str, error: str):
+        self.failed += 1
+        if len(self.failures) < self.max_failures:
+            self.failures.append({"email": email, "error": error})
+
+    def to_dict(self) -> Dict[str, Any]:
+        done = self.sent + self.failed
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "campaign_id": self.id,
+            "email_type": self.email_type,
+            "status": self.status,
+            "total": self.total,
+            "sent": self.sent,
+            "failed": self.failed,
+            "progress": round(done / self.total, 3) if self.total else 1.0,
+            "rate_per_second": round(done / elapsed, 2) if elapsed > 0 else 0.0,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "failures": self.failures
+        }
+
+
+class CampaignRunner:
+    """Sends one template to many recipients over the shared SMTP pool.
+
+    The template is compiled once and each recipient's copy is a join of
+    pre-encoded segments and their own field values.
+    Recipients are consumed lazily and only counters plus a capped failure
+    list are kept, so memory doesn't grow with the size of the campaign.
+    """
+
+    def __init__(self, email_agent, config: Optional[Dict[str, Any]] = None):
+        self.email_agent = email_agent
+        self.config = {
+            "rate": float(os.getenv("EMAIL_CAMPAIGN_RATE", 10)),
+            "concurrency": int(os.getenv("EMAIL_CAMPAIGN_CONCURRENCY", email_agent.smtp_pool.config["pool_size"])),
+            "max_attempts": int(os.getenv("EMAIL_CAMPAIGN_MAX_ATTEMPTS", 3)),
+            "max_failures": int(os.getenv("EMAIL_CAMPAIGN_MAX_FAILURES", 1000)),
+            "retention": int(os.getenv("EMAIL_CAMPAIGN_RETENTION", 100)),
+        }
+        if config:
+            self.config.update(config)
+        self.rate_limiter = RateLimiter(self.config["rate"])
+        self.campaigns: Dict[str, Campaign] = {}
+
+    def start(self, email_type: str, recipients: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+              total: int, custom_message: Optional[str] = None) -> Campaign:
+        """Begin a campaign in the background; ``recipients`` yields {"email", "user_data"}"""
+        campaign = Campaign(email_type, total, self.config["max_failures"])
+        self.campaigns[campaign.id] = campaign
+        self._trim()
+        campaign.task = asyncio.create_task(self._run(campaign, custom_message, recipients))
+        return campaign
+
+    def get(self, campaign_id: str) -> Optional[Campaign]:
+        return self.campaigns.get(campaign_id)
+
+    def _trim(self):
+        finished = [campaign_id for campaign_id, campaign in self.campaigns.items() if campaign.status != "running"]
+        for campaign_id in finished[:max(0, len(self.campaigns) - self.config["retention"])]:
+            del self.campaigns[campaign_id]
+
+    @staticmethod
+    async def _iterate(recipients):
+        if hasattr(recipients, "__aiter__"):
+            async for recipient in recipients:
+                yield recipient
+        else:
+            for recipient in recipients:
+                yield recipient
+
+    async def _run(self, campaign: Campaign, custom_message: Optional[str],
+                   recipients: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]):
+        semaphore = asyncio.Semaphore(self.config["concurrency"])
+        pending: Set[asyncio.Task] = set()
+        try:
+            async for recipient in self._iterate(recipients):
+                await semaphore.acquire()
+                await self.rate_limiter.acquire()
+                task = asyncio.create_task(self._send_one(campaign, custom_message, recipient))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                task.add_done_callback(lambda _: semaphore.release())
+            if pending:
+                await asyncio.gather(*pending)
+            campaign.status = "completed"
+        except asyncio.CancelledError:
+            for task in pending:
+                task.cancel()
+            campaign.status = "cancelled"
+            raise
+        finally:
+            campaign.finished_at = time.time()
+            logger.info(f"Campaign {campaign.id} {campaign.status}: {campaign.sent} sent, {campaign.failed} failed")
+
+    async def _send_one(self, campaign: Campaign, custom_message: Optional[str], recipient: Dict[str, Any]):
+        email = recipient.get("email", "")
+        try:
+            self.email_agent.validate(email)
+            subject, body = self.email_agent.template_compiler.render_mime(
+                campaign.email_type, custom_message, recipient.get("user_data")
+            )
+            for attempt in range(1, self.config["max_attempts"] + 1):
+                try:
+                    await self.email_agent.send_mime(email, subject, body)
+                    break
+                except Exception as e:
+                    if attempt == self.config["max_attempts"] or not is_transient_error(e):
+                        raise
+                    await asyncio.sleep(2 ** attempt)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            campaign.record_failure(email, str(e))
+            return
+        campaign.sent += 1
+
+    async def stop(self):
+        tasks = [campaign.task for campaign in self.campaigns.values() if campaign.task and not campaign.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,268 @@
+import os
+import csv
+import hmac
+import json
+import math
+import codecs
+import asyncio
+import hashlib
+import logging
+import tempfile
+from typing import AsyncIterable, AsyncIterator, Dict, Any, List, Optional
+
+from email_agent import is_valid_email
+
+logger = logging.getLogger(__name__)
+
+EMAIL_COLUMNS = ("email", "email_address", "e-mail", "mail", "recipient", "recipient_email")
+
+
+class BloomFilter:
+    """Fixed-size set membership with a bounded false-positive rate.
+
+    Sized for ``capacity`` items at ``error_rate``; past capacity it keeps
+    working but the false-positive rate climbs.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, item: str) -> bool:
+        """Add ``item``; False if it was (probably) already present"""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        added = False
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % self.size
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+
+def unsubscribe_token(email: str, secret: str) -> str:
+    """Per-recipient token for unsubscribe links; only the holder of ``secret`` can mint one"""
+    return hmac.new(secret.encode("utf-8"), email.strip().lower().encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def verify_unsubscribe_token(email: str, token: str, secret: str) -> bool:
+    return bool(secret) and hmac.compare_digest(unsubscribe_token(email, secret), token)
+
+
+class SuppressionList:
+    """Unsubscribed addresses and blocked domains (``@example.com`` lines).
+
+    Held in sets, so a check is two hash lookups. With a ``path`` the list is
+    loaded from and appended to a plain text file, one entry per line.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.addresses = set()
+        self.domains = set()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    self._add(line)
+            logger.info(f"Loaded {len(self.addresses)} suppressed addresses and {len(self.domains)} domains")
+
+    def _add(self, entry: str) -> Optional[str]:
+        entry = entry.strip().lower()
+        if not entry or entry.startswith("#"):
+            return None
+        if entry.startswith("@"):
+            self.domains.add(entry[1:])
+        else:
+            self.addresses.add(entry)
+        return entry
+
+    def add(self, entry: str) -> bool:
+        """Suppress an address or ``@domain``; False if it already was"""
+        if entry.strip().lower() in self:
+            return False
+        entry = self._add(entry)
+        if entry is None:
+            return False
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(entry + "\n")
+        return True
+
+    def __contains__(self, email: str) -> bool:
+        if email.startswith("@"):
+            return email[1:] in self.domains
+        return email in self.addresses or email.rpartition("@")[2] in self.domains
+
+    def stats(self) -> Dict[str, Any]:
+        return {"addresses": len(self.addresses), "domains": len(self.domains)}
+
+
+class RecipientIngestor:
+    """Turns a streamed CSV upload into clean, unique, sendable recipients.
+
+    The body is decoded and split into records chunk by chunk, keeping only
+    the current partial record, so memory doesn't grow with the file.
+    The email column is found from the header (or the first row is taken as
+    data if it already holds an address); other header columns become the
+    recipient's ``user_data``. Repeated header rows are skipped, so several
+    exports can simply be concatenated. Duplicates are dropped with a
+    Bloom filter, which can rarely drop a unique address too.
+    """
+
+    def __init__(self, suppression: SuppressionList, config: Optional[Dict[str, Any]] = None):
+        self.suppression = suppression
+        self.config = {
+            "capacity": int(os.getenv("EMAIL_INGEST_CAPACITY", 1_000_000)),
+            "error_rate": float(os.getenv("EMAIL_INGEST_ERROR_RATE", 0.0001)),
+            "max_record_bytes": int(os.getenv("EMAIL_INGEST_MAX_RECORD_BYTES", 65536)),
+        }
+        if config:
+            self.config.update(config)
+        self.seen = BloomFilter(self.config["capacity"], self.config["error_rate"])
+        self.counters = {"rows": 0, "accepted": 0, "invalid": 0, "duplicates": 0, "suppressed": 0}
+        self._header: Optional[List[str]] = None
+        self._email_column: Optional[int] = None
+
+    @staticmethod
+    def _records(lines: List[str], state: List[str]):
+        """Join physical lines into CSV records; a quoted field may span lines"""
+        for line in lines:
+            state.append(line)
+            # Quotes are balanced once the record is complete ("" escapes count twice)
+            if sum(part.count('"') for part in state) % 2 == 0:
+                yield "\n".join(state)
+                state.clear()
+
+    def _start(self, row: List[str]) -> bool:
+        """Work out the layout from the first row; True if it is a header"""
+        names = [field.strip().lower() for field in row]
+        for column in EMAIL_COLUMNS:
+            if column in names:
+                self._header = names
+                self._email_column = names.index(column)
+                return True
+        for index, field in enumerate(row):
+            if is_valid_email(field.strip()):
+                self._email_column = index
+                return False
+        raise ValueError("CSV has no email column")
+
+    def _recipient(self, row: List[str]) -> Optional[Dict[str, Any]]:
+        if self._email_column is None and self._start(row):
+            return None
+        if self._header is not None and [field.strip().lower() for field in row] == self._header:
+            return None
+
+        email = row[self._email_column] if self._email_column < len(row) else ""
+        user_data = {}
+        if self._header is not None:
+            for name, value in zip(self._header, row):
+                value = value.strip()
+                if name and value and name not in EMAIL_COLUMNS:
+                    user_data[name] = value
+        return self.accept(email, user_data)
+
+    def accept(self, email: str, user_data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Normalized recipient, or None if the address is invalid, suppressed or already seen"""
+        self.counters["rows"] += 1
+        email = email.strip().lower()
+        if not is_valid_email(email):
+            self.counters["invalid"] += 1
+            return None
+        if email in self.suppression:
+            self.counters["suppressed"] += 1
+            return None
+        if not self.seen.add(email):
+            self.counters["duplicates"] += 1
+            return None
+        self.counters["accepted"] += 1
+        return {"email": email, "user_data": user_data or {}}
+
+    async def parse(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield recipients as the upload arrives; raises ValueError on a malformed file"""
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        pending = ""
+        state: List[str] = []
+        async for chunk in chunks:
+            lines = (pending + decoder.decode(chunk)).split("\n")
+            pending = lines.pop()
+            if len(pending) + sum(len(line) for line in state) > self.config["max_record_bytes"]:
+                raise ValueError("CSV record too long (unbalanced quote?)")
+            for row in csv.reader(self._records(lines, state)):
+                recipient = self._recipient(row) if row else None
+                if recipient is not None:
+                    yield recipient
+            # Let other requests run between chunks
+            await asyncio.sleep(0)
+
+        lines = (pending + decoder.decode(b"", final=True)).split("\n")
+        for row in csv.reader(self._records(lines, state)):
+            recipient = self._recipient(row) if row else None
+            if recipient is not None:
+                yield recipient
+        if state:
+            raise ValueError("CSV ends inside a quoted field")
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters)
+
+
+class RecipientSpool:
+    """Parsed recipients buffered in a temporary JSON-lines file.
+
+    An upload is spooled in full before its campaign starts, so a malformed
+    or interrupted file sends nothing and the request doesn't stay open for
+    the length of the campaign. File I/O runs off the event loop in batches.
+    """
+
+    def __init__(self, directory: Optional[str] = None, batch: int = 1000):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix="recipients-", suffix=".jsonl", dir=directory or None)
+        self._file = os.fdopen(fd, "w", encoding="utf-8")
+        self._buffer: List[str] = []
+        self.batch = batch
+        self.count = 0
+
+    async def add(self, recipient: Dict[str, Any]):
+        self._buffer.append(json.dumps(recipient))
+        self.count += 1
+        if len(self._buffer) >= self.batch:
+            await self._write()
+
+    async def _write(self):
+        lines, self._buffer = self._buffer, []
+        if lines:
+            await asyncio.to_thread(self._file.write, "".join(line + "\n" for line in lines))
+
+    async def finish(self):
+        """Write out what is buffered; the spool is read-only afterwards"""
+        await self._write()
+        await asyncio.to_thread(self._file.close)
+
+    async def __aiter__(self):
+        with open(self.path, encoding="utf-8") as f:
+            while True:
+                # readlines() stops after roughly this many bytes
+                lines = await asyncio.to_thread(f.readlines, 256 * self.batch)
+                if not lines:
+                    return
+                for line in lines:
+                    yield json.loads(line)
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
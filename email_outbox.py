@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional, Tuple
+
+from smtp_pool import is_transient_error
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+SENDING = "sending"
+RETRYING = "retrying"
+SENT = "sent"
+FAILED = "failed"
+
+
+class EmailJob:
+    __slots__ = ("id", "email_type", "recipient_email", "custom_message", "user_data",
+                 "status", "attempts", "created_at", "updated_at", "last_error")
+
+    def __init__(self, email_type: str, recipient_email: str, custom_message: Optional[str] = None,
+                 user_data: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.email_type = email_type
+        self.recipient_email = recipient_email
+        self.custom_message = custom_message
+        self.user_data = user_data or {}
+        self.status = QUEUED
+        self.attempts = 0
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.last_error: Optional[str] = None
+
+    def to_row(self) -> Tuple:
+        return (self.id, self.email_type, self.recipient_email, self.custom_message,
+                json.dumps(self.user_data), self.status, self.attempts,
+                self.created_at, self.updated_at, self.last_error)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "EmailJob":
+        job = cls(row["email_type"], row["recipient"], row["custom_message"],
+                  json.loads(row["user_data"]) if row["user_data"] else {})
+        job.id = row["id"]
+        job.status = row["status"]
+        job.attempts = row["attempts"]
+        job.created_at = row["created_at"]
+        job.updated_at = row["updated_at"]
+        job.last_error = row["last_error"]
+        return job
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "email_type": self.email_type,
+            "recipient": self.recipient_email,
+            "status": self.status,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "last_error": self.last_error
+        }
+
+
+class EmailOutbox:
+    """In-process email queue drained by background workers.
+
+    Transient SMTP errors are retried with exponential backoff and jitter; a
+    job waiting to be retried does not hold a worker. Finished jobs are kept
+    for status lookups until ``retention`` newer jobs have been submitted.
+    With a ``store``, every state change is persisted and unfinished jobs are
+    replayed by ``recover`` after a restart.
+    """
+
+    def __init__(self, email_agent, config: Optional[Dict[str, Any]] = None, store=None):
+        self.email_agent = email_agent
+        self.store = store
+        self.config = {
+            "workers": int(os.getenv("EMAIL_WORKERS", 2)),
+            "max_queue": int(os.getenv("EMAIL_QUEUE_MAX", 10000)),
+            "max_attempts": int(os.getenv("EMAIL_MAX_ATTEMPTS", 5)),
+            "retry_base": float(os.getenv("EMAIL_RETRY_BASE_SECONDS", 2)),
+            "retry_max": float(os.getenv("EMAIL_RETRY_MAX_SECONDS", 300)),
+            "retention": int(os.getenv("EMAIL_JOB_RETENTION", 10000)),
+        }
+        if config:
+            self.config.update(config)
+        self.jobs: "OrderedDict[str, EmailJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._retry_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._sent_times = deque()
+        self.in_flight = 0
+        self.counters = {"submitted": 0, "sent": 0, "failed": 0, "retries": 0, "recovered": 0}
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    def submit(self, email_type: str, recipient_email: str, custom_message: Optional[str] = None,
+               user_data: Optional[Dict[str, Any]] = None) -> EmailJob:
+        """Validate and enqueue; raises ValueError for unsendable mail, OverflowError when full"""
+        self.email_agent.validate(recipient_email)
+        if self.queue.qsize() + len(self._retry_timers) >= self.config["max_queue"]:
+            raise OverflowError("Email queue is full")
+        job = EmailJob(email_type, recipient_email, custom_message, user_data)
+        self.jobs[job.id] = job
+        self._trim_jobs()
+        self._persist(job)
+        self.queue.put_nowait(job)
+        self.counters["submitted"] += 1
+        return job
+
+    async def recover(self) -> int:
+        """Open the store and requeue jobs a previous process never finished"""
+        if self.store is None:
+            return 0
+        rows = await self.store.open()
+        for row in rows:
+            job = EmailJob.from_row(row)
+            # Whatever it was doing when the process died, it needs sending again
+            job.status = QUEUED
+            self.jobs[job.id] = job
+            self._persist(job)
+            self.queue.put_nowait(job)
+        if rows:
+            logger.info(f"Recovered {len(rows)} unsent email jobs")
+        self.counters["recovered"] = len(rows)
+        return len(rows)
+
+    def get(self, job_id: str) -> Optional[EmailJob]:
+        return self.jobs.get(job_id)
+
+    async def lookup(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status, falling back to the store for jobs no longer held in memory"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.store is None:
+            return None
+        row = await self.store.fetch(job_id)
+        return EmailJob.from_row(row).to_dict() if row else None
+
+    def _persist(self, job: EmailJob):
+        if self.store is not None:
+            self.store.save(job.to_row())
+
+    def _trim_jobs(self):
+        while len(self.jobs) > self.config["retention"]:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest.status not in (SENT, FAILED):
+                break
+            del self.jobs[oldest_id]
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.config["retry_max"], self.config["retry_base"] * 2 ** (attempts - 1))
+        # Full jitter keeps retries from a burst of failures from arriving together
+        return random.uniform(delay / 2, delay)
+
+    async def _process(self, job: EmailJob):
+        job.status = SENDING
+        job.attempts += 1
+        job.updated_at = time.time()
+        self._persist(job)
+        try:
+            await self.email_agent.send_email(job.email_type, job.recipient_email,
+                                              job.custom_message, job.user_data)
+        except Exception as e:
+            job.last_error = str(e)
+            job.updated_at = time.time()
+            if is_transient_error(e) and job.attempts < self.config["max_attempts"]:
+                delay = self._backoff(job.attempts)
+                job.status = RETRYING
+                self.counters["retries"] += 1
+                logger.warning(f"Email job {job.id} attempt {job.attempts} failed, retrying in {delay:.1f}s: {str(e)}")
+                self._retry_timers[job.id] = asyncio.get_running_loop().call_later(delay, self._requeue, job)
+            else:
+                job.status = FAILED
+                self.counters["failed"] += 1
+                logger.error(f"Email job {job.id} failed after {job.attempts} attempts: {str(e)}")
+            self._persist(job)
+            return
+        job.status = SENT
+        job.updated_at = time.time()
+        self._persist(job)
+        self.counters["sent"] += 1
+        self._sent_times.append(time.monotonic())
+
+    def _requeue(self, job: EmailJob):
+        self._retry_timers.pop(job.id, None)
+        job.status = QUEUED
+        self.queue.put_nowait(job)
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            self.in_flight += 1
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.error(f"Email worker error on job {job.id}: {str(e)}")
+            finally:
+                self.in_flight -= 1
+                self.queue.task_done()
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.config["workers"])]
+
+    async def stop(self):
+        for timer in self._retry_timers.values():
+            timer.cancel()
+        self._retry_timers.clear()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self.store is not None:
+            # Jobs cut off mid-send stay unfinished on disk and are replayed on recover
+            await self.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        cutoff = time.monotonic() - 60
+        while self._sent_times and self._sent_times[0] < cutoff:
+            self._sent_times.popleft()
+        return {
+            **self.counters,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "waiting_retry": len(self._retry_timers),
+            "in_flight": self.in_flight,
+            "workers": len(self._workers),
+            "sent_last_minute": len(self._sent_times),
+            "store": self.store.stats() if self.store is not None else None
+        }
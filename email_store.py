@@ -0,0 +1,196 @@
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ("id", "email_type", "recipient", "custom_message", "user_data",
+            "status", "attempts", "created_at", "updated_at", "last_error")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS email_jobs (
+    id TEXT PRIMARY KEY,
+    email_type TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    custom_message TEXT,
+    user_data TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS email_jobs_status ON email_jobs (status, updated_at);
+"""
+
+
+class EmailJobStore:
+    """Crash-safe SQLite (WAL) record of outbox jobs.
+
+    ``save`` only stages the job's latest row in memory; a background flusher
+    writes everything staged in one transaction every ``flush_interval``
+    seconds, or sooner once ``flush_batch`` rows are waiting. Repeated updates
+    to a job between flushes collapse into one write. With WAL and
+    ``synchronous=NORMAL`` commits don't fsync, so a crash can lose at most
+    the last flush interval, never corrupt the file. All SQLite work runs on
+    one dedicated thread.
+    """
+
+    def __init__(self, path: str, config: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.config = {
+            "flush_interval": float(os.getenv("EMAIL_STORE_FLUSH_MS", 50)) / 1000,
+            "flush_batch": int(os.getenv("EMAIL_STORE_FLUSH_BATCH", 500)),
+            "retention_seconds": float(os.getenv("EMAIL_STORE_RETENTION_HOURS", 72)) * 3600,
+            "compact_interval": float(os.getenv("EMAIL_STORE_COMPACT_INTERVAL", 3600)),
+        }
+        if config:
+            self.config.update(config)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="email-store")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._staged: Dict[str, Tuple] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._last_compact = time.monotonic()
+        self.counters = {"saves": 0, "rows_written": 0, "flushes": 0, "compacted": 0}
+        self.last_flush_ms = 0.0
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # Only takes effect on a new file; lets compaction hand pages back
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def open(self) -> List[Dict[str, Any]]:
+        """Open the database and return jobs that never reached a final state"""
+        await self._call(self._connect)
+        rows = await self._call(self._load_unfinished)
+        self._task = asyncio.create_task(self._run())
+        return rows
+
+    def _load_unfinished(self) -> List[Dict[str, Any]]:
+        cursor = self._conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM email_jobs WHERE status NOT IN ('sent', 'failed') ORDER BY created_at"
+        )
+        return [dict(zip(_COLUMNS, row)) for row in cursor]
+
+    def save(self, row: Tuple):
+        """Stage a job row (in ``_COLUMNS`` order) for the next flush"""
+        self._staged[row[0]] = row
+        self.counters["saves"] += 1
+        if len(self._staged) >= self.config["flush_batch"]:
+            self._wake.set()
+
+    def _write(self, rows: List[Tuple]):
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO email_jobs ({', '.join(_COLUMNS)}) VALUES ({placeholders})", rows
+            )
+
+    async def flush(self):
+        if not self._staged:
+            return
+        rows, self._staged = list(self._staged.values()), {}
+        start = time.perf_counter()
+        try:
+            await self._call(self._write, rows)
+        except asyncio.CancelledError:
+            # A cancelled executor call may never have run; keep the rows for the final flush
+            for row in rows:
+                self._staged.setdefault(row[0], row)
+            raise
+        except Exception as e:
+            # Put them back unless a newer update was staged meanwhile
+            for row in rows:
+                self._staged.setdefault(row[0], row)
+            logger.error(f"Email store flush failed, will retry: {str(e)}")
+            return
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        self.counters["flushes"] += 1
+        self.counters["rows_written"] += len(rows)
+
+    def _compact(self) -> int:
+        cutoff = time.time() - self.config["retention_seconds"]
+        with self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM email_jobs WHERE status IN ('sent', 'failed') AND updated_at < ?", (cutoff,)
+            ).rowcount
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if deleted:
+            self._conn.execute("PRAGMA incremental_vacuum")
+        return deleted
+
+    async def compact(self) -> int:
+        """Drop finished jobs older than the retention window and trim the WAL"""
+        deleted = await self._call(self._compact)
+        self.counters["compacted"] += deleted
+        self._last_compact = time.monotonic()
+        if deleted:
+            logger.info(f"Email store compacted: {deleted} finished jobs removed")
+        return deleted
+
+    def _fetch(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM email_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    async def fetch(self, job_id: str) -> Optional[Dict[str, Any]]:
+        staged = self._staged.get(job_id)
+        if staged is not None:
+            return dict(zip(_COLUMNS, staged))
+        return await self._call(self._fetch, job_id)
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.config["flush_interval"])
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+            if self._closing:
+                break
+            if time.monotonic() - self._last_compact >= self.config["compact_interval"]:
+                try:
+                    await self.compact()
+                except Exception as e:
+                    logger.error(f"Email store compaction failed: {str(e)}")
+
+    async def close(self):
+        if self._task is not None:
+            # Let the flusher finish its current write instead of cancelling it mid-flight
+            self._closing = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        if self._conn is not None:
+            await self.flush()
+            await self._call(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        flushes = self.counters["flushes"]
+        return {
+            **self.counters,
+            "path": self.path,
+            "staged": len(self._staged),
+            "avg_rows_per_flush": round(self.counters["rows_written"] / flushes, 1) if flushes else 0.0,
+            "last_flush_ms": round(self.last_flush_ms, 2)
+        }
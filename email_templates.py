@@ -1,6 +1,17 @@
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List
 import datetime
 
+# template type -> render method, filled in by @template below
+_REGISTRY: Dict[str, Callable[..., Dict[str, str]]] = {}
+
+def template(*template_types: str):
+    """Register a render method for one or more template types"""
+    def register(method):
+        for template_type in template_types:
+            _REGISTRY[template_type] = method
+        return method
+    return register
+
 class EmailTemplates:
     def __init__(self):
         self.company_info = {
@@ -12,26 +23,27 @@ class EmailTemplates:
         }
     
     def get_template(self, template_type: str, custom_message: str = None, user_data: Dict[str, Any] = None) -> Dict[str, str]:
-        """Get email template by type"""
+        """Render only the requested template; unknown types get the default one"""
         user_data = user_data or {}
-        
-        templates = {
-            "welcome": self._welcome_template(custom_message, user_data),
-            "support": self._support_template(custom_message, user_data),
-            "newsletter": self._newsletter_template(custom_message, user_data),
-            "offer": self._offer_template(custom_message, user_data),
-            "thank_you": self._thank_you_template(custom_message, user_data),
-            "feedback": self._feedback_template(custom_message, user_data),
-            "abandoned_cart": self._abandoned_cart_template(custom_message, user_data),
-            "password_reset": self._password_reset_template(custom_message, user_data),
-            "order_confirmation": self._order_confirmation_template(custom_message, user_data),
-            "shipping_update": self._shipping_update_template(custom_message, user_data)
-        }
-        
-        return templates.get(template_type, self._default_template(custom_message, user_data))
+        render = _REGISTRY.get(template_type, EmailTemplates._default_template)
+        return render(self, custom_message, user_data)
+    
+    @staticmethod
+    def template_types() -> List[str]:
+        return list(_REGISTRY)
     
+    @template("welcome")
     def _welcome_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
         subject = f"Welcome to {self.company_info['name']}! 🎉"
+        default_message = """
+                    <p>Here's what you can expect from us:</p>
+                    <ul>
+                        <li>🚀 Professional WordPress development</li>
+                        <li>🎨 Custom website design</li>
+                        <li>⚡ Performance optimization</li>
+                        <li>🔧 Ongoing support and maintenance</li>
+                    </ul>
+                    """
         
         html_body = f"""
         <!DOCTYPE html>
@@ -56,15 +68,7 @@ class EmailTemplates:
                     <h2>Hello {user_data.get('name', 'there')},</h2>
                     <p>Thank you for choosing {self.company_info['name']} for your WordPress needs!</p>
                     
-                    {custom_message if custom_message else """
-                    <p>Here's what you can expect from us:</p>
-                    <ul>
-                        <li>🚀 Professional WordPress development</li>
-                        <li>🎨 Custom website design</li>
-                        <li>⚡ Performance optimization</li>
-                        <li>🔧 Ongoing support and maintenance</li>
-                    </ul>
-                    """}
+                    {custom_message if custom_message else default_message}
                     
                     <p><strong>Ready to get started?</strong></p>
                     <a href="{self.company_info['website']}/dashboard" class="btn">Access Your Dashboard</a>
@@ -99,8 +103,19 @@ class EmailTemplates:
         
         return {"subject": subject, "html_body": html_body, "text_body": text_body}
     
+    @template("support")
     def _support_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
         subject = f"Re: Your Support Request - {self.company_info['name']}"
+        default_message = f"""
+                    <p>Thank you for contacting {self.company_info['name']} support. We've received your request and our team is looking into it.</p>
+                    
+                    <p><strong>What to expect next:</strong></p>
+                    <ul>
+                        <li>Initial response within 2-4 hours</li>
+                        <li>Regular updates on progress</li>
+                        <li>Solution implementation</li>
+                    </ul>
+                    """
         
         html_body = f"""
         <!DOCTYPE html>
@@ -117,16 +132,7 @@ class EmailTemplates:
                 <div class="content">
                     <h2>Hello {user_data.get('name', 'there')},</h2>
                     
-                    {custom_message if custom_message else """
-                    <p>Thank you for contacting {self.company_info['name']} support. We've received your request and our team is looking into it.</p>
-                    
-                    <p><strong>What to expect next:</strong></p>
-                    <ul>
-                        <li>Initial response within 2-4 hours</li>
-                        <li>Regular updates on progress</li>
-                        <li>Solution implementation</li>
-                    </ul>
-                    """}
+                    {custom_message if custom_message else default_message}
                     
                     <p><strong>Need immediate help?</strong></p>
                     <p>Email: {self.company_info['support_email']}<br>
@@ -155,9 +161,21 @@ class EmailTemplates:
         
         return {"subject": subject, "html_body": html_body, "text_body": text_body}
     
+    @template("newsletter")
     def _newsletter_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
         current_month = datetime.datetime.now().strftime("%B %Y")
         subject = f"📰 {self.company_info['name']} Newsletter - {current_month}"
+        default_message = """
+                    <h3>🚀 This Month's Highlights</h3>
+                    <ul>
+                        <li><strong>WordPress 6.3 Update:</strong> New features and improvements</li>
+                        <li><strong>Performance Tips:</strong> Speed up your website by 50%</li>
+                        <li><strong>Security Update:</strong> Essential plugins to protect your site</li>
+                    </ul>
+                    
+                    <h3>🎯 Pro Tip of the Month</h3>
+                    <p>Did you know? Implementing lazy loading can improve your site's loading time by up to 30%!</p>
+                    """
         
         html_body = f"""
         <!DOCTYPE html>
@@ -174,17 +192,7 @@ class EmailTemplates:
                 <div class="content">
                     <h2>Hello {user_data.get('name', 'there')},</h2>
                     
-                    {custom_message if custom_message else """
-                    <h3>🚀 This Month's Highlights</h3>
-                    <ul>
-                        <li><strong>WordPress 6.3 Update:</strong> New features and improvements</li>
-                        <li><strong>Performance Tips:</strong> Speed up your website by 50%</li>
-                        <li><strong>Security Update:</strong> Essential plugins to protect your site</li>
-                    </ul>
-                    
-                    <h3>🎯 Pro Tip of the Month</h3>
-                    <p>Did you know? Implementing lazy loading can improve your site's loading time by up to 30%!</p>
-                    """}
+                    {custom_message if custom_message else default_message}
                     
                     <a href="{self.company_info['website']}/blog" class="btn">Read Our Blog</a>
                 </div>
@@ -193,25 +201,24 @@ class EmailTemplates:
         </html>
         """
         
+        text_body = f"""
+        {self.company_info['name']} Newsletter - {current_month}
+        
+        Hello {user_data.get('name', 'there')},
+        
+        {custom_message if custom_message else "Here are this month's highlights, tips and updates from our team."}
+        
+        Read our blog: {self.company_info['website']}/blog
+        
+        The {self.company_info['name']} Team
+        """
+        
         return {"subject": subject, "html_body": html_body, "text_body": text_body}
     
+    @template("offer")
     def _offer_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
         subject = "🎁 Special Offer Just For You!"
-        
-        html_body = f"""
-        <!DOCTYPE html>
-        <html>
-        <head><style>/* Offer styling */</style></head>
-        <body>
-            <div class="container">
-                <div class="header" style="background: linear-gradient(135deg, #FF6B6B 0%, #FF8E53 100%);">
-                    <h1>🎁 Special Offer!</h1>
-                    <p>Exclusive deal for our valued customers</p>
-                </div>
-                <div class="content">
-                    <h2>Hello {user_data.get('name', 'there')},</h2>
-                    
-                    {custom_message if custom_message else """
+        default_message = """
                     <p>As a valued member of our community, we're offering you:</p>
                     
                     <div style="text-align: center; margin: 30px 0;">
@@ -227,7 +234,22 @@ class EmailTemplates:
                         <li>Security upgrades</li>
                         <li>Ongoing maintenance</li>
                     </ul>
-                    """}
+                    """
+        
+        html_body = f"""
+        <!DOCTYPE html>
+        <html>
+        <head><style>/* Offer styling */</style></head>
+        <body>
+            <div class="container">
+                <div class="header" style="background: linear-gradient(135deg, #FF6B6B 0%, #FF8E53 100%);">
+                    <h1>🎁 Special Offer!</h1>
+                    <p>Exclusive deal for our valued customers</p>
+                </div>
+                <div class="content">
+                    <h2>Hello {user_data.get('name', 'there')},</h2>
+                    
+                    {custom_message if custom_message else default_message}
                     
                     <p><strong>Offer expires in 7 days!</strong></p>
                     <a href="{self.company_info['website']}/contact" class="btn">Claim Your Discount</a>
@@ -237,22 +259,48 @@ class EmailTemplates:
         </html>
         """
         
+        text_body = f"""
+        Special Offer Just For You!
+        
+        Hello {user_data.get('name', 'there')},
+        
+        {custom_message if custom_message else "Get 20% off all WordPress services with code STATICA20."}
+        
+        Offer expires in 7 days: {self.company_info['website']}/contact
+        
+        The {self.company_info['name']} Team
+        """
+        
         return {"subject": subject, "html_body": html_body, "text_body": text_body}
     
     # Additional template methods for other email types...
+    @template("thank_you")
     def _thank_you_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
-        subject = "Thank You for Your Business! 🙏"
-        # Implementation similar to above...
-        return self._default_template(custom_message, user_data)
+        return self._default_template(custom_message, user_data, "Thank You for Your Business! 🙏")
     
+    @template("feedback")
     def _feedback_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
-        subject = "We'd Love Your Feedback! ⭐"
-        # Implementation similar to above...
-        return self._default_template(custom_message, user_data)
+        return self._default_template(custom_message, user_data, "We'd Love Your Feedback! ⭐")
+    
+    @template("abandoned_cart")
+    def _abandoned_cart_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
+        return self._default_template(custom_message, user_data, "You left something in your cart 🛒")
+    
+    @template("password_reset")
+    def _password_reset_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
+        return self._default_template(custom_message, user_data, f"Reset your {self.company_info['name']} password")
+    
+    @template("order_confirmation")
+    def _order_confirmation_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
+        return self._default_template(custom_message, user_data, f"Your {self.company_info['name']} order is confirmed ✅")
+    
+    @template("shipping_update")
+    def _shipping_update_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
+        return self._default_template(custom_message, user_data, f"Your {self.company_info['name']} order has shipped 📦")
     
-    def _default_template(self, custom_message: str, user_data: Dict[str, Any]) -> Dict[str, str]:
+    def _default_template(self, custom_message: str, user_data: Dict[str, Any], subject: str = None) -> Dict[str, str]:
         """Default template fallback"""
-        subject = f"Message from {self.company_info['name']}"
+        subject = subject or f"Message from {self.company_info['name']}"
         
         html_body = f"""
         <div class="container">
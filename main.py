@@ -1,18 +1,59 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import json
 import logging
+import time
 import os
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+catalog_watcher = None
+
+async def apply_catalog(catalog, changed_skus):
+    """Build the reloaded catalog's index and prompts off the event loop, then swap it in"""
+    await chat_agent.reload_catalog(catalog, changed_skus)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start up and tear down shared agent resources"""
+    global catalog_watcher
+    catalog_path = os.getenv("CATALOG_PATH")
+    if catalog_path:
+        loader = CatalogLoader(catalog_path)
+        catalog, changed = await asyncio.to_thread(loader.load)
+        await apply_catalog(catalog, changed)
+        catalog_watcher = CatalogWatcher(loader, apply_catalog)
+        catalog_watcher.start()
+        logger.info(f"Loaded {len(catalog)} products from {catalog_path}")
+    else:
+        # Built-in catalog: still build the search index before the first request
+        await asyncio.to_thread(chat_agent.get_search_index)
+    if chat_agent.huggingface_token:
+        chat_agent.model_warmer.start()
+    await email_outbox.recover()
+    email_outbox.start()
+    yield
+    await email_outbox.stop()
+    await campaign_runner.stop()
+    if catalog_watcher:
+        await catalog_watcher.stop()
+    await chat_agent.aclose()
+    email_agent.close()
+
 app = FastAPI(
     title="Statica.in AI Agent",
     description="AI-powered customer support for Statica.in - Premium Aircraft Model Kits",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -28,6 +69,12 @@ class ChatRequest(BaseModel):
     message: str
     agent_type: str = "product"  # product, support, general
     user_data: Optional[Dict[str, Any]] = None
+    budget_ms: Optional[int] = None  # latency budget; overrides the X-Latency-Budget-Ms header
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatRequest]
+    concurrency: Optional[int] = None
+    stream: bool = False  # NDJSON, one result per line, in input order
 
 class EmailRequest(BaseModel):
     email_type: str
@@ -36,41 +83,94 @@ class EmailRequest(BaseModel):
     custom_message: Optional[str] = None
     user_data: Optional[Dict[str, Any]] = None
 
+class CampaignRecipient(BaseModel):
+    email: str
+    user_data: Optional[Dict[str, Any]] = None
+
+class CampaignRequest(BaseModel):
+    email_type: str
+    custom_message: Optional[str] = None
+    recipients: List[CampaignRecipient]
+
+class UnsubscribeRequest(BaseModel):
+    email: str
+    token: str  # unsubscribe_token(email, EMAIL_UNSUBSCRIBE_SECRET), sent in the recipient's unsubscribe link
+
+class SuppressionRequest(BaseModel):
+    entry: str  # an address, or "@domain" to block a whole domain
+
 class ChatResponse(BaseModel):
     response: str
     success: bool = True
     agent_used: str = "huggingface"
+    tier: Optional[str] = None  # cache, local or remote
+    budget_ms: Optional[int] = None
+    elapsed_ms: Optional[float] = None
 
 class EmailResponse(BaseModel):
     success: bool
     message: str
     email_sent: bool
     recipient: str
+    job_id: Optional[str] = None
+    status: Optional[str] = None
 
 # Import agents
 from agents.statica_ai_agent import StaticaAIAgent
-from email_agent import EmailAutomationAgent
+from agents.catalog_loader import CatalogLoader, CatalogWatcher
+from email_agent import EmailAutomationAgent, is_valid_email
+from email_outbox import EmailOutbox
+from email_store import EmailJobStore
+from email_campaign import CampaignRunner
+from email_ingest import RecipientIngestor, RecipientSpool, SuppressionList, verify_unsubscribe_token
 
 # Initialize agents
 chat_agent = StaticaAIAgent()
 email_agent = EmailAutomationAgent()
+# Queued emails survive restarts unless EMAIL_STORE_PATH is set empty
+email_store_path = os.getenv("EMAIL_STORE_PATH", "data/email_outbox.sqlite3")
+email_outbox = EmailOutbox(email_agent, store=EmailJobStore(email_store_path) if email_store_path else None)
+campaign_runner = CampaignRunner(email_agent)
+suppression_list = SuppressionList(os.getenv("EMAIL_SUPPRESSION_PATH", "data/suppressions.txt") or None)
+# Uploaded recipient lists are parsed to disk here before their campaign starts
+SPOOL_DIR = os.getenv("EMAIL_SPOOL_DIR") or None
+UNSUBSCRIBE_SECRET = os.getenv("EMAIL_UNSUBSCRIBE_SECRET", "")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+ANSWER_TIERS = {"cache": "cache", "semantic_cache": "cache", "local": "local", "huggingface": "remote"}
+
+def _latency_budget_ms(budget_ms: Optional[int], http_request: Request) -> Optional[int]:
+    """Budget from the request body, else the X-Latency-Budget-Ms header"""
+    if budget_ms is None:
+        header = http_request.headers.get("x-latency-budget-ms")
+        if header and header.strip().isdigit():
+            budget_ms = int(header)
+    return budget_ms if budget_ms and budget_ms > 0 else None
+
+async def _answer_within_budget(message: str, agent_type: str, budget_ms: Optional[int]) -> Dict[str, Any]:
+    start = time.monotonic()
+    deadline = start + budget_ms / 1000 if budget_ms else None
+    meta: Dict[str, Any] = {}
+    response = await chat_agent.generate_response(message, agent_type, meta, deadline=deadline)
+    agent_used = meta.get("agent_used", "huggingface")
+    return {
+        "response": response,
+        "agent_used": agent_used,
+        "tier": ANSWER_TIERS.get(agent_used, "local"),
+        "budget_ms": budget_ms,
+        "elapsed_ms": round((time.monotonic() - start) * 1000, 1)
+    }
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
     """Main chat endpoint for Statica.in"""
     try:
         logger.info(f"Chat request: {request.message}, Agent: {request.agent_type}")
         
-        response = await chat_agent.generate_response(
-            prompt=request.message,
-            agent_type=request.agent_type
-        )
+        budget_ms = _latency_budget_ms(request.budget_ms, http_request)
+        answer = await _answer_within_budget(request.message, request.agent_type, budget_ms)
         
-        return ChatResponse(
-            response=response,
-            success=True,
-            agent_used="huggingface"
-        )
+        return ChatResponse(success=True, **answer)
         
     except Exception as e:
         logger.error(f"Chat endpoint error: {str(e)}")
@@ -80,34 +180,216 @@ async def chat_endpoint(request: ChatRequest):
             agent_used="fallback"
         )
 
-@app.post("/send-email", response_model=EmailResponse)
-async def send_email_endpoint(request: EmailRequest):
-    """Send automated emails for Statica.in"""
-    try:
-        logger.info(f"Email request: {request.email_type} to {request.recipient_email}")
+BATCH_DEFAULT_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", 8))
+BATCH_MAX_CONCURRENCY = int(os.getenv("CHAT_BATCH_MAX_CONCURRENCY", 32))
+
+@app.post("/chat/batch")
+async def chat_batch_endpoint(request: ChatBatchRequest):
+    """Answer many chat requests in one call with bounded concurrency"""
+    concurrency = max(1, min(request.concurrency or BATCH_DEFAULT_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+    logger.info(f"Chat batch request: {len(request.items)} items, concurrency {concurrency}")
+    pairs = ((item.message, item.agent_type) for item in request.items)
+    
+    if request.stream:
+        async def ndjson_stream():
+            async for result in chat_agent.generate_batch(pairs, concurrency):
+                yield json.dumps(result, ensure_ascii=False) + "\n"
         
-        result = await email_agent.send_automated_email(
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+    
+    start = time.perf_counter()
+    results = [result async for result in chat_agent.generate_batch(pairs, concurrency)]
+    return {
+        "results": results,
+        "count": len(results),
+        "unique": sum(1 for result in results if not result["deduplicated"]),
+        "total_ms": round((time.perf_counter() - start) * 1000, 1)
+    }
+
+def _sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    """Stream the chat answer as Server-Sent Events"""
+    logger.info(f"Chat stream request: {request.message}, Agent: {request.agent_type}")
+    
+    async def event_stream():
+        start = time.perf_counter()
+        first_token_ms = None
+        meta: Dict[str, Any] = {}
+        success = True
+        try:
+            # Each chunk is produced only when the client has taken the previous
+            # one; a disconnect cancels this generator and the upstream call
+            async for chunk in chat_agent.stream_response(request.message, request.agent_type, meta):
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                yield _sse_event({"token": chunk})
+                if await http_request.is_disconnected():
+                    logger.info("Chat stream client disconnected")
+                    return
+        except Exception as e:
+            logger.error(f"Chat stream error: {str(e)}")
+            success = False
+            meta["agent_used"] = "fallback"
+            yield _sse_event({"token": "I apologize, but I'm currently experiencing technical difficulties. Please try again later or email support@statica.in for immediate assistance."})
+        
+        yield _sse_event({
+            "success": success,
+            "agent_used": meta.get("agent_used", "fallback"),
+            "first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+            "total_ms": round((time.perf_counter() - start) * 1000, 1)
+        }, event="done")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/send-email", response_model=EmailResponse, status_code=202)
+async def send_email_endpoint(request: EmailRequest, response: Response):
+    """Queue an automated email for Statica.in; poll /email-jobs/{job_id} for the outcome"""
+    logger.info(f"Email request: {request.email_type} to {request.recipient_email}")
+    try:
+        job = email_outbox.submit(
             email_type=request.email_type,
             recipient_email=request.recipient_email,
             custom_message=request.custom_message,
             user_data=request.user_data or {}
         )
-        
-        return EmailResponse(
-            success=result["success"],
-            message=result["message"],
-            email_sent=result["email_sent"],
-            recipient=request.recipient_email
-        )
-        
-    except Exception as e:
-        logger.error(f"Email endpoint error: {str(e)}")
+    except (ValueError, OverflowError) as e:
+        response.status_code = 400 if isinstance(e, ValueError) else 503
         return EmailResponse(
             success=False,
-            message=f"Failed to send email: {str(e)}",
+            message=str(e),
             email_sent=False,
             recipient=request.recipient_email
         )
+    
+    return EmailResponse(
+        success=True,
+        message=f"Email queued for {request.recipient_email}",
+        email_sent=False,
+        recipient=request.recipient_email,
+        job_id=job.id,
+        status=job.status
+    )
+
+@app.get("/email-jobs/{job_id}")
+async def get_email_job(job_id: str):
+    """Status of a queued email"""
+    job = await email_outbox.lookup(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown email job")
+    return job
+
+def _require_email_service():
+    # Otherwise every recipient would fail on its own once the campaign runs
+    if not email_agent.is_configured():
+        raise HTTPException(status_code=503, detail="Email service not configured")
+
+@app.post("/campaigns", status_code=202)
+async def start_campaign(request: CampaignRequest):
+    """Send one template to many recipients, personalized and rate limited"""
+    logger.info(f"Campaign request: {request.email_type} to {len(request.recipients)} recipients")
+    _require_email_service()
+    # Same validation, dedup and suppression as an uploaded list
+    ingestor = RecipientIngestor(suppression_list, {"capacity": max(1, len(request.recipients))})
+    recipients = [
+        recipient for recipient in (ingestor.accept(item.email, item.user_data) for item in request.recipients)
+        if recipient is not None
+    ]
+    campaign = campaign_runner.start(request.email_type, recipients, len(recipients), request.custom_message)
+    result = campaign.to_dict()
+    result.pop("failures")
+    result["ingest"] = ingestor.stats()
+    return result
+
+@app.post("/campaigns/upload", status_code=202)
+async def upload_campaign(http_request: Request, email_type: str = Query(...), custom_message: Optional[str] = None):
+    """Start a campaign from a CSV request body once all of it has been parsed"""
+    _require_email_service()
+    ingestor = RecipientIngestor(suppression_list)
+    spool = await asyncio.to_thread(RecipientSpool, SPOOL_DIR)
+    start = time.perf_counter()
+    try:
+        async for recipient in ingestor.parse(http_request.stream()):
+            await spool.add(recipient)
+        await spool.finish()
+    except BaseException as e:
+        # Nothing has been sent yet; a bad or cut-off file sends nothing at all
+        spool.discard()
+        if isinstance(e, ValueError):
+            raise HTTPException(status_code=400, detail=str(e))
+        if isinstance(e, ClientDisconnect):
+            raise HTTPException(status_code=400, detail="Upload interrupted")
+        raise
+    
+    campaign = campaign_runner.start(email_type, spool, spool.count, custom_message)
+    campaign.task.add_done_callback(lambda _: spool.discard())
+    logger.info(f"Campaign upload {campaign.id}: {ingestor.stats()}")
+    result = campaign.to_dict()
+    result.pop("failures")
+    result["ingest"] = {**ingestor.stats(), "took_ms": round((time.perf_counter() - start) * 1000, 1)}
+    return result
+
+@app.post("/unsubscribe")
+async def unsubscribe(request: UnsubscribeRequest):
+    """Exclude the recipient's own address from future campaigns"""
+    if not UNSUBSCRIBE_SECRET:
+        raise HTTPException(status_code=503, detail="Unsubscribe links are not configured")
+    email = request.email.strip().lower()
+    if not is_valid_email(email) or not verify_unsubscribe_token(email, request.token, UNSUBSCRIBE_SECRET):
+        raise HTTPException(status_code=403, detail="Invalid unsubscribe link")
+    added = await asyncio.to_thread(suppression_list.add, email)
+    return {"email": email, "suppressed": True, "added": added}
+
+@app.post("/admin/suppressions")
+async def add_suppression(request: SuppressionRequest, x_admin_token: str = Header("")):
+    """Suppress any address or a whole "@domain"; requires the X-Admin-Token header"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin API is not configured")
+    if not hmac.compare_digest(x_admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    entry = request.entry.strip().lower()
+    # A domain entry has to be a valid domain once given a local part
+    valid = is_valid_email(f"postmaster{entry}" if entry.startswith("@") else entry)
+    if not valid:
+        raise HTTPException(status_code=400, detail="Expected an email address or @domain")
+    added = await asyncio.to_thread(suppression_list.add, entry)
+    return {"entry": entry, "suppressed": True, "added": added}
+
+@app.get("/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str):
+    """Progress and per-recipient failures of a campaign"""
+    campaign = campaign_runner.get(campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Unknown campaign")
+    return campaign.to_dict()
+
+@app.get("/products/search")
+async def search_products(
+    q: str = Query(..., min_length=1),
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    prefix: bool = True,
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Search the product catalog (BM25 ranking, as-you-type prefix matching)"""
+    start = time.perf_counter()
+    hits = chat_agent.search_products(
+        q, limit=limit, category=category,
+        min_price=min_price, max_price=max_price, prefix=prefix
+    )
+    return {
+        "query": q,
+        "results": [hit.to_dict() for hit in hits],
+        "took_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
 
 @app.get("/email-templates")
 async def get_email_templates():
@@ -123,7 +405,15 @@ async def root():
         "version": "2.0.0",
         "endpoints": {
             "chat": "POST /chat",
+            "chat_stream": "POST /chat/stream",
+            "chat_batch": "POST /chat/batch",
             "send_email": "POST /send-email",
+            "email_job": "GET /email-jobs/{job_id}",
+            "campaigns": "POST /campaigns",
+            "campaign_upload": "POST /campaigns/upload?email_type=",
+            "unsubscribe": "POST /unsubscribe",
+            "suppressions": "POST /admin/suppressions",
+            "product_search": "GET /products/search?q=",
             "templates": "GET /email-templates",
             "health": "GET /health"
         }
@@ -134,18 +424,28 @@ async def health_check():
     return {
         "status": "healthy", 
         "service": "Statica AI Agent",
-        "timestamp": __import__('datetime').datetime.now().isoformat()
+        "timestamp": __import__('datetime').datetime.now().isoformat(),
+        "prompts": chat_agent.prompt_compiler.stats(),
+        "response_cache": chat_agent.response_cache.stats(),
+        "semantic_cache": chat_agent.semantic_cache.stats(),
+        "single_flight": chat_agent.single_flight.stats(),
+        "upstream": chat_agent.upstream_stats(),
+        "catalog": catalog_watcher.stats() if catalog_watcher else {"source": "builtin"},
+        "smtp": email_agent.smtp_pool.stats(),
+        "email_templates": email_agent.template_compiler.stats(),
+        "email_outbox": email_outbox.stats(),
+        "suppressions": suppression_list.stats()
     }
 
 @app.get("/test-chat")
-async def test_chat_get(message: str = "Hello"):
+async def test_chat_get(http_request: Request, message: str = "Hello", budget_ms: Optional[int] = None):
     """Test chat via GET parameters"""
-    response = await chat_agent.generate_response(message, "product")
+    answer = await _answer_within_budget(message, "product", _latency_budget_ms(budget_ms, http_request))
     return {
         "your_message": message,
-        "ai_response": response,
+        "ai_response": answer.pop("response"),
         "success": True,
-        "agent_used": "huggingface"
+        **answer
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+import os
+import time
+import smtplib
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """True if the connection is unusable, False if only this message was rejected"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        # 421: server is closing the channel
+        return error.smtp_code == 421
+    # SMTPException subclasses OSError, so test it before plain socket errors
+    return not isinstance(error, smtplib.SMTPException) and isinstance(error, OSError)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True if retrying the same message later may succeed"""
+    if _is_connection_error(error):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return False
+
+
+class _PooledConnection:
+    __slots__ = ("smtp", "created_at", "last_used", "messages_sent")
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+
+class SMTPConnectionPool:
+    """Reusable authenticated SMTP connections, driven from a dedicated thread pool.
+
+    smtplib is blocking, so every SMTP exchange runs on one of ``pool_size``
+    worker threads; that also caps how many connections are open at once.
+    Idle connections are reused LIFO, checked with NOOP once they have been
+    idle for ``health_check_after`` seconds, closed after ``idle_timeout``
+    seconds or ``max_messages`` sends, and replaced transparently if the
+    server dropped them.
+    """
+
+    def __init__(self, smtp_config: Dict[str, Any], config: Optional[Dict[str, Any]] = None):
+        self.smtp_config = smtp_config
+        self.config = {
+            "pool_size": int(os.getenv("SMTP_POOL_SIZE", 4)),
+            "idle_timeout": float(os.getenv("SMTP_IDLE_TIMEOUT", 60)),
+            "health_check_after": float(os.getenv("SMTP_HEALTH_CHECK_AFTER", 10)),
+            "max_messages": int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", 100)),
+            "timeout": float(os.getenv("SMTP_TIMEOUT", 30)),
+        }
+        if config:
+            self.config.update(config)
+        self._idle: List[_PooledConnection] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.counters = {
+            "sent": 0, "failed": 0, "opened": 0, "reused": 0, "reconnects": 0,
+            "closed_idle": 0, "closed_max_messages": 0, "closed_unhealthy": 0
+        }
+
+    def _count(self, name: str):
+        # Counters are bumped from every worker thread
+        with self._lock:
+            self.counters[name] += 1
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.config["pool_size"], thread_name_prefix="smtp")
+        return self._executor
+
+    def _connect(self) -> _PooledConnection:
+        server, port = self.smtp_config["server"], self.smtp_config["port"]
+        if port == 465:
+            smtp = smtplib.SMTP_SSL(server, port, timeout=self.config["timeout"])
+        else:
+            smtp = smtplib.SMTP(server, port, timeout=self.config["timeout"])
+            smtp.starttls()
+        smtp.login(self.smtp_config["username"], self.smtp_config["password"])
+        self._count("opened")
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _close(connection: _PooledConnection):
+        try:
+            connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    @staticmethod
+    def _is_healthy(connection: _PooledConnection) -> bool:
+        try:
+            return connection.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self) -> Optional[_PooledConnection]:
+        """Most recently used healthy idle connection, or None"""
+        now = time.monotonic()
+        expired = []
+        connection = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if now - candidate.last_used > self.config["idle_timeout"]:
+                    expired.append(candidate)
+                    continue
+                connection = candidate
+                break
+            # Anything older than the one we took has been idle even longer
+            for candidate in self._idle:
+                if now - candidate.last_used > self.config["idle_timeout"]:
+                    expired.append(candidate)
+            self._idle = [candidate for candidate in self._idle if candidate not in expired]
+
+        for candidate in expired:
+            self._count("closed_idle")
+            self._close(candidate)
+        if connection is not None and now - connection.last_used > self.config["health_check_after"]:
+            if not self._is_healthy(connection):
+                self._count("closed_unhealthy")
+                connection.smtp.close()
+                return None
+        return connection
+
+    def _release(self, connection: _PooledConnection):
+        connection.last_used = time.monotonic()
+        if connection.messages_sent >= self.config["max_messages"]:
+            self._count("closed_max_messages")
+            self._close(connection)
+            return
+        with self._lock:
+            self._idle.append(connection)
+
+    def _deliver(self, send: Callable[[smtplib.SMTP], Any]):
+        """Run ``send`` on a pooled connection; a dropped reused connection is replaced once"""
+        connection = self._acquire()
+        reused = connection is not None
+        if reused:
+            self._count("reused")
+        else:
+            connection = self._connect()
+
+        try:
+            send(connection.smtp)
+        except Exception as e:
+            if not _is_connection_error(e):
+                # Message-level rejection; the connection itself is still usable
+                self._count("failed")
+                connection.messages_sent += 1
+                self._release(connection)
+                raise
+            connection.smtp.close()
+            if not reused:
+                self._count("failed")
+                raise
+            # Server closed a connection we thought was alive: retry on a fresh one
+            self._count("reconnects")
+            connection = self._connect()
+            try:
+                send(connection.smtp)
+            except Exception:
+                self._count("failed")
+                connection.smtp.close()
+                raise
+
+        connection.messages_sent += 1
+        self._count("sent")
+        self._release(connection)
+
+    def send_raw_sync(self, from_addr: str, to_addrs: List[str], data: bytes):
+        """Send an already serialized message (CRLF line ends) as-is"""
+        self._deliver(lambda smtp: smtp.sendmail(from_addr, to_addrs, data))
+
+    async def send_raw(self, from_addr: str, to_addrs: List[str], data: bytes):
+        """Send without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.send_raw_sync, from_addr, to_addrs, data)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "idle_connections": len(self._idle), "pool_size": self.config["pool_size"]}
@@ -0,0 +1,201 @@
+import os
+import re
+import html
+import json
+import time
+import uuid
+import hashlib
+import binascii
+from collections import OrderedDict
+from email.header import Header
+from typing import Dict, Any, Optional, Tuple
+
+_SLOT = re.compile("\x00([^\x00]*)\x00")
+CUSTOM_MESSAGE = "custom_message"
+
+
+class _SlotRecorder(dict):
+    """user_data stand-in that renders a marker for every field a template reads"""
+
+    def __init__(self):
+        super().__init__()
+        self.defaults: Dict[str, Any] = {}
+
+    def __bool__(self):
+        # Templates do ``user_data or {}``; an empty dict would be swapped out
+        return True
+
+    def get(self, key, default=None):
+        self.defaults[key] = default
+        return f"\x00{key}\x00"
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+
+def _qp(data: bytes) -> bytes:
+    """Quoted-printable with CRLF line ends"""
+    # b2a_qp keeps CR as-is, so any CRLF or lone CR would end up as a bare CR on the wire
+    data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return binascii.b2a_qp(data).replace(b"\n", b"\r\n")
+
+
+class _CompiledPart:
+    """One rendered part as static segments around named slots.
+
+    Static segments are kept both as UTF-8 and pre-encoded as
+    quoted-printable. QP segments can be encoded independently and joined
+    with soft line breaks, so only slot values are encoded per message.
+    """
+
+    __slots__ = ("static", "static_qp", "slots", "escape")
+
+    def __init__(self, text: str, escape: bool):
+        pieces = _SLOT.split(text)
+        self.static = [piece.encode("utf-8") for piece in pieces[0::2]]
+        self.static_qp = [_qp(piece) for piece in self.static]
+        self.slots = pieces[1::2]
+        self.escape = escape
+
+    def _value(self, slot: str, values: Dict[str, Any], defaults: Dict[str, Any]) -> bytes:
+        value = values.get(slot, defaults.get(slot))
+        text = str(value) if value is not None else ""
+        # custom_message is HTML by design; user fields are not
+        if self.escape and slot != CUSTOM_MESSAGE:
+            text = html.escape(text)
+        return text.encode("utf-8")
+
+    def render(self, values: Dict[str, Any], defaults: Dict[str, Any]) -> bytes:
+        out = [self.static[0]]
+        for index, slot in enumerate(self.slots):
+            out.append(self._value(slot, values, defaults))
+            out.append(self.static[index + 1])
+        return b"".join(out)
+
+    def render_qp(self, values: Dict[str, Any], defaults: Dict[str, Any]) -> bytes:
+        out = [self.static_qp[0]]
+        for index, slot in enumerate(self.slots):
+            out.append(_qp(self._value(slot, values, defaults)))
+            out.append(self.static_qp[index + 1])
+        # Soft line breaks between independently encoded segments
+        return b"=\r\n".join(piece for piece in out if piece)
+
+
+class CompiledTemplate:
+    def __init__(self, templates, template_type: str, with_custom_message: bool):
+        recorder = _SlotRecorder()
+        custom_message = f"\x00{CUSTOM_MESSAGE}\x00" if with_custom_message else None
+        rendered = templates.get_template(template_type, custom_message, recorder)
+        self.defaults = recorder.defaults
+        self.subject = _CompiledPart(rendered["subject"], escape=False)
+        self.text = _CompiledPart(rendered["text_body"], escape=False)
+        self.html = _CompiledPart(rendered["html_body"], escape=True)
+        self.compiled_at = time.monotonic()
+        # "=_" never occurs in quoted-printable output, so it can't collide with a body
+        self.boundary = f"=_{uuid.uuid4().hex}"
+
+    def render(self, values: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "subject": self.subject.render(values, self.defaults).decode("utf-8"),
+            "html_body": self.html.render(values, self.defaults).decode("utf-8"),
+            "text_body": self.text.render(values, self.defaults).decode("utf-8")
+        }
+
+    def render_mime(self, values: Dict[str, Any]) -> Tuple[str, bytes]:
+        """(subject, pre-encoded multipart/alternative body with its headers)"""
+        subject = self.subject.render(values, self.defaults).decode("utf-8")
+        boundary = self.boundary.encode("ascii")
+        body = b"".join((
+            b'MIME-Version: 1.0\r\nContent-Type: multipart/alternative;\r\n boundary="', boundary, b'"\r\n\r\n',
+            b"--", boundary, b'\r\nContent-Type: text/plain; charset="utf-8"\r\n'
+            b"Content-Transfer-Encoding: quoted-printable\r\n\r\n",
+            self.text.render_qp(values, self.defaults),
+            b"\r\n--", boundary, b'\r\nContent-Type: text/html; charset="utf-8"\r\n'
+            b"Content-Transfer-Encoding: quoted-printable\r\n\r\n",
+            self.html.render_qp(values, self.defaults),
+            b"\r\n--", boundary, b"--\r\n"
+        ))
+        return subject, body
+
+
+class TemplateCompiler:
+    """Compiles EmailTemplates once per type and caches rendered output.
+
+    Compiled templates expire after ``ttl`` seconds so date-dependent text
+    (the newsletter month) stays current. Fully rendered MIME bodies are kept
+    in an LRU keyed by template type and a hash of the variable inputs.
+    """
+
+    def __init__(self, templates, config: Optional[Dict[str, Any]] = None):
+        self.templates = templates
+        self.config = {
+            "ttl": float(os.getenv("EMAIL_TEMPLATE_TTL", 3600)),
+            "cache_size": int(os.getenv("EMAIL_RENDER_CACHE_SIZE", 1024)),
+        }
+        if config:
+            self.config.update(config)
+        self._compiled: Dict[Tuple[str, bool], CompiledTemplate] = {}
+        self._rendered: "OrderedDict[Tuple[str, str], Tuple[str, bytes]]" = OrderedDict()
+        self.counters = {"compiles": 0, "renders": 0, "cache_hits": 0}
+
+    def get(self, template_type: str, with_custom_message: bool) -> CompiledTemplate:
+        key = (template_type, with_custom_message)
+        compiled = self._compiled.get(key)
+        if compiled is None or time.monotonic() - compiled.compiled_at > self.config["ttl"]:
+            if compiled is not None:
+                # Bodies rendered from the expired compile may be stale
+                for cached_key in [k for k in self._rendered if k[0] == template_type]:
+                    del self._rendered[cached_key]
+            compiled = CompiledTemplate(self.templates, template_type, with_custom_message)
+            self._compiled[key] = compiled
+            self.counters["compiles"] += 1
+        return compiled
+
+    @staticmethod
+    def values_for(custom_message: Optional[str], user_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        values = dict(user_data or {})
+        if custom_message:
+            values[CUSTOM_MESSAGE] = custom_message
+        return values
+
+    def render(self, template_type: str, custom_message: Optional[str] = None,
+               user_data: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        compiled = self.get(template_type, bool(custom_message))
+        self.counters["renders"] += 1
+        return compiled.render(self.values_for(custom_message, user_data))
+
+    def render_mime(self, template_type: str, custom_message: Optional[str] = None,
+                    user_data: Optional[Dict[str, Any]] = None) -> Tuple[str, bytes]:
+        compiled = self.get(template_type, bool(custom_message))
+        values = self.values_for(custom_message, user_data)
+        # Only the fields the template reads can change its output
+        relevant = {slot: values.get(slot) for slot in compiled.defaults}
+        relevant[CUSTOM_MESSAGE] = values.get(CUSTOM_MESSAGE)
+        digest = hashlib.blake2b(json.dumps(relevant, sort_keys=True, default=str).encode("utf-8"),
+                                 digest_size=16).hexdigest()
+        key = (template_type, digest)
+        cached = self._rendered.get(key)
+        if cached is not None:
+            self._rendered.move_to_end(key)
+            self.counters["cache_hits"] += 1
+            return cached
+
+        self.counters["renders"] += 1
+        rendered = compiled.render_mime(values)
+        self._rendered[key] = rendered
+        if len(self._rendered) > self.config["cache_size"]:
+            self._rendered.popitem(last=False)
+        return rendered
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "compiled": len(self._compiled), "cached_bodies": len(self._rendered)}
+
+
+def encode_subject(subject: str) -> str:
+    """Header-safe subject; subjects carry user fields, so line breaks are dropped"""
+    subject = " ".join(subject.splitlines())
+    try:
+        subject.encode("ascii")
+        return subject
+    except UnicodeEncodeError:
+        return Header(subject, "utf-8").encode()
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from agents.catalog_loader import CatalogLoader
+from agents.statica_ai_agent import StaticaAIAgent
+
+EXTERNAL_PRODUCTS = [
+    {"sku": "spitfire_mk9", "name": "Spitfire Mk IX Balsa Kit", "category": "static_models",
+     "price": "₹3,999.00", "description": "Supermarine Spitfire display kit.",
+     "features": ["Laser cut balsa"], "specs": "Length: 40cm", "ideal_for": "Collectors",
+     "url": "https://statica.in/spitfire/"},
+    {"sku": "glider_trainer", "name": "Glider Trainer Kit", "category": "flying_models",
+     "price": "₹2,499.00", "description": "Hand launch glider.",
+     "features": ["Beginner friendly"], "specs": "Skill Level: Beginner", "ideal_for": "Beginners",
+     "url": "https://statica.in/glider/"},
+]
+
+PROMPTS = [
+    "do you sell tools?",
+    "which kit for ncc",
+    "virus 30cm",
+    "virus 55cm",
+    "tell me about the rafale",
+    "compare 30 and 55",
+    "how much does it cost",
+]
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.delenv("HF_TOKEN", raising=False)
+    path = tmp_path / "catalog.jsonl"
+    path.write_text("\n".join(json.dumps(product) for product in EXTERNAL_PRODUCTS) + "\n", encoding="utf-8")
+    agent = StaticaAIAgent()
+    catalog, changed = CatalogLoader(str(path)).load()
+    agent.update_catalog(catalog, changed)
+    return agent
+
+
+def test_reloaded_catalog_drops_builtin_skus(agent):
+    assert "virus_sw_80_30cm" not in agent.product_catalog
+    assert "modeling_tools" not in agent.product_catalog
+    assert len(agent.product_catalog) == len(EXTERNAL_PRODUCTS)
+
+
+@pytest.mark.parametrize("prompt", PROMPTS)
+def test_local_answers_survive_missing_skus(agent, prompt):
+    response = agent._get_local_response(prompt, "product")
+    assert response
+    assert "technical difficulties" not in response
+
+
+def test_static_answers_use_reloaded_products(agent):
+    response = agent._get_local_response("which kit for ncc", "product")
+    assert "Spitfire Mk IX Balsa Kit" in response
+    assert "Virus SW 80 Static Model Balsa Kit" not in response
+
+
+def test_size_comparison_falls_back_without_both_sizes(agent):
+    response = agent._get_local_response("compare 30 and 55", "product")
+    assert "I can help you compare" in response
+
+
+def test_generate_response_answers_locally(agent):
+    import asyncio
+
+    meta = {}
+    response = asyncio.run(agent.generate_response("do you sell tools?", "product", meta))
+    assert meta["agent_used"] == "local"
+    assert "PRECISION MODELING TOOLS" in response
+
+
+def test_added_product_invalidates_listings_of_its_category(monkeypatch):
+    import asyncio
+
+    from agents.product_catalog import Product
+
+    monkeypatch.delenv("HF_TOKEN", raising=False)
+    agent = StaticaAIAgent()
+
+    def ask(prompt):
+        meta = {}
+        response = asyncio.run(agent.generate_response(prompt, "product", meta))
+        return meta["agent_used"], response
+
+    listing = ask("show me balsa static models")
+    tools = ask("do you sell tools?")
+    assert ask("show me balsa static models") == ("cache", listing[1])
+
+    mig = Product("mig_21", {**EXTERNAL_PRODUCTS[0], "name": "MiG-21 Bison Static Model Kit"})
+    agent.update_catalog(agent.product_catalog.with_changes([mig]), {"mig_21"})
+
+    agent_used, response = ask("show me balsa static models")
+    assert agent_used == "local"
+    assert "MiG-21 Bison Static Model Kit" in response
+    # A category the change didn't touch keeps its cached answer
+    assert ask("do you sell tools?") == ("cache", tools[1])
+
+
+def test_reload_builds_index_and_prompts_off_the_event_loop(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+
+    import agents.statica_ai_agent as statica
+
+    monkeypatch.delenv("HF_TOKEN", raising=False)
+    agent = StaticaAIAgent()
+    old_index = agent.get_search_index()
+    built = []
+
+    class RecordingIndex(statica.ProductSearchIndex):
+        def __init__(self, catalog):
+            built.append(threading.current_thread())
+            super().__init__(catalog)
+
+    build_context = agent._build_product_context
+
+    def recording_context(product_catalog=None):
+        built.append(threading.current_thread())
+        return build_context(product_catalog)
+
+    monkeypatch.setattr(statica, "ProductSearchIndex", RecordingIndex)
+    monkeypatch.setattr(agent, "_build_product_context", recording_context)
+
+    path = tmp_path / "catalog.jsonl"
+    path.write_text("\n".join(json.dumps(product) for product in EXTERNAL_PRODUCTS) + "\n", encoding="utf-8")
+    catalog, changed = CatalogLoader(str(path)).load()
+    asyncio.run(agent.reload_catalog(catalog, changed))
+
+    assert len(built) == 2
+    assert threading.main_thread() not in built
+    assert agent.catalog_version == catalog.version
+    assert "Spitfire Mk IX Balsa Kit" in agent.prompt_compiler.get("product", agent.catalog_version)
+    # Requests after the swap use the prebuilt index instead of building one on the loop
+    assert agent.get_search_index().version == catalog.version
+    assert len(built) == 2
+    # The replaced index was taken apart on the worker thread
+    assert old_index._postings == {}
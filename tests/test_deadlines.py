@@ -0,0 +1,103 @@
+import time
+import asyncio
+
+import pytest
+
+from agents.single_flight import SingleFlight
+from agents.statica_ai_agent import StaticaAIAgent
+
+MODEL_ANSWER = "The Virus SW 80 is our most popular kit."
+
+
+def test_longer_deadline_does_not_join_shorter_flight():
+    async def scenario():
+        flight = SingleFlight()
+        executions = []
+
+        async def work(name):
+            executions.append(name)
+            await asyncio.sleep(0.01)
+            return name
+
+        now = time.monotonic()
+        short = asyncio.create_task(flight.do("key", lambda: work("short"), now + 0.5))
+        await asyncio.sleep(0)
+        long = asyncio.create_task(flight.do("key", lambda: work("long"), now + 20))
+        await asyncio.sleep(0)
+        shorter = asyncio.create_task(flight.do("key", lambda: work("shorter"), now + 0.2))
+        unbounded = asyncio.create_task(flight.do("key", lambda: work("unbounded")))
+        return await asyncio.gather(short, long, shorter, unbounded), executions, flight.stats()
+
+    results, executions, stats = asyncio.run(scenario())
+    # The 20s caller started its own flight; the 0.2s caller joined it; no deadline outlives 20s
+    assert results == ["short", "long", "long", "unbounded"]
+    assert executions == ["short", "long", "unbounded"]
+    assert stats["outlived"] == 2
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setenv("HF_TOKEN", "test-token")
+    monkeypatch.setenv("HF_BACKGROUND_FILL", "false")
+    agent = StaticaAIAgent()
+    calls = []
+
+    async def fake_request(prompt, system_prompt, model, deadline=None):
+        calls.append(deadline)
+        remaining = None if deadline is None else deadline - time.monotonic()
+        # Upstream needs 1s; a shorter deadline cuts the call off
+        if remaining is not None and remaining < 1.0:
+            await asyncio.sleep(max(0.0, remaining))
+            return None
+        await asyncio.sleep(1.0)
+        return MODEL_ANSWER
+
+    agent._request_huggingface = fake_request
+    agent.upstream_calls = calls
+    return agent
+
+
+def test_job_caller_is_not_cut_short_by_widget_caller(agent):
+    async def scenario():
+        now = time.monotonic()
+        widget_meta, job_meta = {}, {}
+        widget = asyncio.create_task(agent.generate_response("sw80 details", "product", widget_meta, now + 0.5))
+        await asyncio.sleep(0)
+        job = asyncio.create_task(agent.generate_response("sw80 details", "product", job_meta, now + 20))
+        return await widget, widget_meta, await job, job_meta
+
+    widget, widget_meta, job, job_meta = asyncio.run(scenario())
+    assert widget_meta["agent_used"] == "local"
+    assert job_meta["agent_used"] == "huggingface"
+    assert job == MODEL_ANSWER
+
+
+def test_expired_budget_is_not_negatively_cached(agent):
+    async def scenario():
+        meta = {}
+        await agent.generate_response("sw80 details", "product", meta, time.monotonic() + 0.5)
+        retry_meta = {}
+        retry = await agent.generate_response("sw80 details", "product", retry_meta, time.monotonic() + 20)
+        return meta, retry, retry_meta
+
+    meta, retry, retry_meta = asyncio.run(scenario())
+    assert meta["agent_used"] == "local"
+    assert retry_meta["agent_used"] == "huggingface"
+    assert retry == MODEL_ANSWER
+
+
+def test_upstream_failure_is_negatively_cached(agent):
+    async def failing(prompt, system_prompt, model, deadline=None):
+        return None
+
+    agent._request_huggingface = failing
+
+    async def scenario():
+        first, second = {}, {}
+        await agent.generate_response("sw80 details", "product", first, time.monotonic() + 20)
+        await agent.generate_response("sw80 details", "product", second, time.monotonic() + 20)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["agent_used"] == "local"
+    assert second["agent_used"] == "cache"
@@ -0,0 +1,30 @@
+import time
+import asyncio
+
+import pytest
+
+from email_campaign import RateLimiter
+
+
+def _elapsed(limiter, calls):
+    async def scenario():
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(calls)))
+        return time.monotonic() - start
+
+    return asyncio.run(scenario())
+
+
+def test_rate_limiter_spaces_calls():
+    # Ten calls at 50/s: the first goes at once, the rest 20ms apart
+    assert _elapsed(RateLimiter(50), 10) >= 0.17
+
+
+def test_zero_rate_is_unthrottled():
+    limiter = RateLimiter(0)
+    assert _elapsed(limiter, 1000) < 0.5
+
+
+def test_negative_rate_is_rejected():
+    with pytest.raises(ValueError):
+        RateLimiter(-1)
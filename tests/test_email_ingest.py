@@ -0,0 +1,204 @@
+import os
+import asyncio
+
+import httpx
+import pytest
+
+from email_campaign import RateLimiter
+from email_ingest import (RecipientIngestor, RecipientSpool, SuppressionList,
+                          unsubscribe_token, verify_unsubscribe_token)
+
+os.environ.setdefault("EMAIL_STORE_PATH", "")
+os.environ.setdefault("EMAIL_SUPPRESSION_PATH", "")
+import main  # noqa: E402
+
+SECRET = "unsubscribe-secret"
+ADMIN_TOKEN = "admin-secret"
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _parse(ingestor, data: bytes):
+    async def scenario():
+        return [recipient async for recipient in ingestor.parse(_chunks(data))]
+
+    return asyncio.run(scenario())
+
+
+@pytest.fixture
+def suppression(tmp_path):
+    suppression = SuppressionList(str(tmp_path / "suppressions.txt"))
+    suppression.add("blocked@example.com")
+    suppression.add("@spam.test")
+    return suppression
+
+
+def test_parse_filters_invalid_suppressed_and_duplicate_rows(suppression):
+    data = (
+        b"\xef\xbb\xbfName,Email,City\r\n"
+        b"Ananya,ananya@example.com,Pune\r\n"
+        b"Dup,ANANYA@example.com,Delhi\r\n"
+        b"Blocked,blocked@example.com,Goa\r\n"
+        b"Spammer,anyone@spam.test,Goa\r\n"
+        b"Broken,not-an-email,Goa\r\n"
+        b"Name,Email,City\r\n"
+        b'"Rao, Vikram",vikram@example.com,"Multi\nline"\r\n'
+    )
+    ingestor = RecipientIngestor(suppression, {"capacity": 100})
+    recipients = _parse(ingestor, data)
+
+    assert recipients == [
+        {"email": "ananya@example.com", "user_data": {"name": "Ananya", "city": "Pune"}},
+        {"email": "vikram@example.com", "user_data": {"name": "Rao, Vikram", "city": "Multi\nline"}},
+    ]
+    assert ingestor.stats() == {"rows": 6, "accepted": 2, "invalid": 1, "duplicates": 1, "suppressed": 2}
+
+
+def test_headerless_file_and_missing_email_column(suppression):
+    ingestor = RecipientIngestor(suppression, {"capacity": 100})
+    assert [r["email"] for r in _parse(ingestor, b"first@example.com,x\nsecond@example.com,y\n")] == [
+        "first@example.com", "second@example.com"
+    ]
+    with pytest.raises(ValueError):
+        _parse(RecipientIngestor(suppression, {"capacity": 100}), b"name,city\nAnanya,Pune\n")
+
+
+def test_suppression_list_persists(suppression, tmp_path):
+    reloaded = SuppressionList(str(tmp_path / "suppressions.txt"))
+    assert "blocked@example.com" in reloaded
+    assert "someone@spam.test" in reloaded
+    assert "someone@example.com" not in reloaded
+
+
+def test_unsubscribe_tokens_are_per_recipient():
+    token = unsubscribe_token("Pilot@Example.com", SECRET)
+    assert verify_unsubscribe_token("pilot@example.com", token, SECRET)
+    assert not verify_unsubscribe_token("other@example.com", token, SECRET)
+    assert not verify_unsubscribe_token("pilot@example.com", token, "other-secret")
+    assert not verify_unsubscribe_token("pilot@example.com", token, "")
+
+
+def test_spool_round_trip_and_discard(tmp_path):
+    async def scenario():
+        spool = RecipientSpool(str(tmp_path), batch=3)
+        for i in range(10):
+            await spool.add({"email": f"pilot{i}@example.com", "user_data": {"n": i}})
+        await spool.finish()
+        return spool, [recipient async for recipient in spool]
+
+    spool, recipients = asyncio.run(scenario())
+    assert spool.count == 10
+    assert [r["user_data"]["n"] for r in recipients] == list(range(10))
+    spool.discard()
+    assert not os.path.exists(spool.path)
+
+
+@pytest.fixture
+def app(monkeypatch, suppression, tmp_path):
+    sent = []
+
+    async def send_mime(recipient_email, subject, body):
+        sent.append(recipient_email)
+
+    monkeypatch.setattr(main, "suppression_list", suppression)
+    monkeypatch.setattr(main, "UNSUBSCRIBE_SECRET", SECRET)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", ADMIN_TOKEN)
+    monkeypatch.setattr(main, "SPOOL_DIR", str(tmp_path / "spool"))
+    monkeypatch.setattr(main.campaign_runner, "rate_limiter", RateLimiter(0))
+    monkeypatch.setitem(main.email_agent.smtp_config, "username", "user")
+    monkeypatch.setitem(main.email_agent.smtp_config, "password", "secret")
+    monkeypatch.setattr(main.email_agent, "send_mime", send_mime)
+    return sent
+
+
+def _call(method, url, **kwargs):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.request(method, url, **kwargs)
+            body = response.json()
+            if response.status_code == 202:
+                await main.campaign_runner.get(body["campaign_id"]).task
+                body = main.campaign_runner.get(body["campaign_id"]).to_dict() | {"ingest": body.get("ingest")}
+            return response.status_code, body
+
+    return asyncio.run(scenario())
+
+
+def test_json_campaign_skips_suppressed_recipients(app):
+    status, body = _call("POST", "/campaigns", json={"email_type": "welcome", "recipients": [
+        {"email": "pilot@example.com", "user_data": {"name": "Pilot"}},
+        {"email": "blocked@example.com"},
+        {"email": "someone@spam.test"},
+        {"email": "PILOT@example.com"},
+    ]})
+    assert status == 202
+    assert app == ["pilot@example.com"]
+    assert body["total"] == 1 and body["sent"] == 1
+    assert body["ingest"]["suppressed"] == 2 and body["ingest"]["duplicates"] == 1
+
+
+def test_upload_sends_nothing_until_the_whole_file_parses(app, tmp_path):
+    status, body = _call("POST", "/campaigns/upload?email_type=welcome",
+                         content=b'email,name\none@example.com,One\ntwo@example.com,"unterminated\n')
+    assert status == 400
+    assert app == []
+    assert os.listdir(tmp_path / "spool") == []
+
+    status, body = _call("POST", "/campaigns/upload?email_type=welcome",
+                         content=b"email,name\none@example.com,One\nblocked@example.com,B\ntwo@example.com,Two\n")
+    assert status == 202
+    assert sorted(app) == ["one@example.com", "two@example.com"]
+    assert body["total"] == 2 and body["status"] == "completed"
+    assert body["ingest"]["suppressed"] == 1
+    # The spool is removed once the campaign is done
+    assert os.listdir(tmp_path / "spool") == []
+
+
+def test_unsubscribe_requires_a_valid_token(app, suppression):
+    status, _ = _call("POST", "/unsubscribe", json={"email": "pilot@example.com", "token": "forged"})
+    assert status == 403
+    status, _ = _call("POST", "/unsubscribe", json={"email": "@example.com",
+                                                    "token": unsubscribe_token("@example.com", SECRET)})
+    assert status == 403
+    assert "pilot@example.com" not in suppression
+
+    token = unsubscribe_token("pilot@example.com", SECRET)
+    status, body = _call("POST", "/unsubscribe", json={"email": "Pilot@example.com", "token": token})
+    assert status == 200 and body["added"]
+    assert "pilot@example.com" in suppression
+
+
+def test_unsubscribe_is_disabled_without_a_secret(app, monkeypatch):
+    monkeypatch.setattr(main, "UNSUBSCRIBE_SECRET", "")
+    status, _ = _call("POST", "/unsubscribe", json={"email": "pilot@example.com", "token": ""})
+    assert status == 503
+
+
+def test_domain_suppression_needs_the_admin_token(app, suppression):
+    status, _ = _call("POST", "/admin/suppressions", json={"entry": "@example.org"})
+    assert status == 401
+    status, _ = _call("POST", "/admin/suppressions", json={"entry": "@"},
+                      headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert status == 400
+    status, body = _call("POST", "/admin/suppressions", json={"entry": "@Example.org"},
+                         headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert status == 200 and body["entry"] == "@example.org"
+    assert "anyone@example.org" in suppression
+
+
+@pytest.mark.parametrize("url, kwargs", [
+    ("/campaigns", {"json": {"email_type": "welcome", "recipients": [{"email": "pilot@example.com"}]}}),
+    ("/campaigns/upload?email_type=welcome", {"content": b"email\npilot@example.com\n"}),
+])
+def test_campaigns_are_refused_without_smtp_credentials(app, monkeypatch, url, kwargs):
+    monkeypatch.setitem(main.email_agent.smtp_config, "password", "")
+    campaigns = len(main.campaign_runner.campaigns)
+    status, body = _call("POST", url, **kwargs)
+    assert status == 503
+    assert body["detail"] == "Email service not configured"
+    assert len(main.campaign_runner.campaigns) == campaigns
+    assert app == []
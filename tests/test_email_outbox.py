@@ -0,0 +1,74 @@
+import time
+import asyncio
+import sqlite3
+
+from email_outbox import EmailOutbox
+from email_store import EmailJobStore
+
+
+class FakeEmailAgent:
+    def __init__(self):
+        self.sent = []
+
+    def validate(self, recipient_email):
+        if "@" not in recipient_email:
+            raise ValueError("Invalid email address")
+
+    async def send_email(self, email_type, recipient_email, custom_message=None, user_data=None):
+        self.sent.append((email_type, recipient_email))
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute("SELECT recipient, status FROM email_jobs").fetchall())
+    finally:
+        conn.close()
+
+
+def test_close_keeps_rows_whose_write_has_not_started(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        store = EmailJobStore(path, {"flush_interval": 60, "flush_batch": 1})
+        await store.open()
+        # Occupy the store thread so the flusher's write is queued behind it
+        busy = asyncio.get_running_loop().run_in_executor(store._executor, time.sleep, 0.2)
+        store.save(("job-1", "welcome", "pilot@example.com", None, None, "queued", 0, 1.0, 1.0, None))
+        await asyncio.sleep(0.05)
+        assert store.stats()["staged"] == 0
+        await store.close()
+        await busy
+
+    asyncio.run(scenario())
+    assert _rows(path) == {"pilot@example.com": "queued"}
+
+
+def test_unsent_jobs_are_recovered_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def first_run():
+        outbox = EmailOutbox(FakeEmailAgent(), store=EmailJobStore(path))
+        assert await outbox.recover() == 0
+        # Workers never start, as if the process stopped before sending
+        jobs = [outbox.submit("welcome", f"pilot{i}@example.com", None, {"name": f"Pilot {i}"}) for i in range(3)]
+        await outbox.stop()
+        return [job.id for job in jobs]
+
+    async def second_run():
+        agent = FakeEmailAgent()
+        outbox = EmailOutbox(agent, store=EmailJobStore(path))
+        recovered = await outbox.recover()
+        outbox.start()
+        await asyncio.wait_for(outbox.queue.join(), timeout=5)
+        statuses = [(await outbox.lookup(job_id))["status"] for job_id in job_ids]
+        await outbox.stop()
+        return recovered, agent.sent, statuses, outbox.jobs[job_ids[0]].user_data
+
+    job_ids = asyncio.run(first_run())
+    recovered, sent, statuses, user_data = asyncio.run(second_run())
+    assert recovered == 3
+    assert sorted(sent) == [("welcome", f"pilot{i}@example.com") for i in range(3)]
+    assert statuses == ["sent"] * 3
+    assert user_data == {"name": "Pilot 0"}
+    assert set(_rows(path).values()) == {"sent"}
@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+
+from agents.micro_batcher import MicroBatcher
+from agents.statica_ai_agent import StaticaAIAgent
+
+
+class SlowUpstream:
+    def __init__(self, seconds=10.0):
+        self.seconds = seconds
+        self.state = {"started": 0, "finished": 0, "cancelled": 0}
+
+    async def __call__(self, key, items, timeout):
+        self.state["started"] += 1
+        try:
+            await asyncio.sleep(self.seconds)
+        except asyncio.CancelledError:
+            self.state["cancelled"] += 1
+            raise
+        self.state["finished"] += 1
+        return [f"{key}:{item}" for item in items]
+
+
+def test_items_within_window_share_one_call():
+    async def scenario():
+        upstream = SlowUpstream(0.01)
+        batcher = MicroBatcher(upstream, {"window_ms": 5, "max_size": 8})
+        results = await asyncio.gather(*(batcher.submit("model", i, 1.0) for i in range(10)))
+        return results, upstream.state, batcher.stats()
+
+    results, state, stats = asyncio.run(scenario())
+    assert results == [f"model:{i}" for i in range(10)]
+    assert state["started"] == 2
+    assert stats["batches"] == 2
+
+
+def test_cancelling_every_caller_of_a_sent_batch_aborts_the_call():
+    async def scenario():
+        upstream = SlowUpstream()
+        batcher = MicroBatcher(upstream, {"window_ms": 1, "max_size": 8})
+        callers = [asyncio.create_task(batcher.submit("model", i, 1.0)) for i in range(2)]
+        await asyncio.sleep(0.05)
+        assert upstream.state["started"] == 1
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        return dict(upstream.state), batcher.stats()
+
+    state, stats = asyncio.run(scenario())
+    assert state == {"started": 1, "finished": 0, "cancelled": 1}
+    assert stats["aborted"] == 1
+
+
+def test_call_keeps_running_while_one_caller_remains():
+    async def scenario():
+        upstream = SlowUpstream(0.05)
+        batcher = MicroBatcher(upstream, {"window_ms": 1, "max_size": 8})
+        leaving = asyncio.create_task(batcher.submit("model", "a", 1.0))
+        staying = asyncio.create_task(batcher.submit("model", "b", 1.0))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        return await staying, upstream.state
+
+    result, state = asyncio.run(scenario())
+    assert result == "model:b"
+    assert state == {"started": 1, "finished": 1, "cancelled": 0}
+
+
+def test_aclose_fails_waiting_callers_instead_of_hanging():
+    async def scenario():
+        upstream = SlowUpstream()
+        batcher = MicroBatcher(upstream, {"window_ms": 1, "max_size": 8})
+        caller = asyncio.create_task(batcher.submit("model", "a", 1.0))
+        await asyncio.sleep(0.01)
+        await batcher.aclose()
+        return await asyncio.wait_for(asyncio.gather(caller, return_exceptions=True), 1.0)
+
+    (result,) = asyncio.run(scenario())
+    assert isinstance(result, RuntimeError)
+
+
+def test_short_result_list_fails_the_unanswered_items():
+    async def short(key, items, timeout):
+        return ["only one"]
+
+    async def scenario():
+        batcher = MicroBatcher(short, {"window_ms": 1, "max_size": 8})
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.submit("model", "a", 1.0), batcher.submit("model", "b", 1.0),
+                           return_exceptions=True), 1.0)
+
+    first, second = asyncio.run(scenario())
+    assert first == "only one"
+    assert isinstance(second, RuntimeError)
+
+
+def test_answering_locally_aborts_the_upstream_request(monkeypatch):
+    monkeypatch.setenv("HF_TOKEN", "test-token")
+    monkeypatch.setenv("HF_BACKGROUND_FILL", "false")
+    monkeypatch.setenv("HF_LATENCY_BUDGET", "0.1")
+    agent = StaticaAIAgent()
+    state = {"started": 0, "finished": 0, "cancelled": 0}
+
+    async def slow_post(url, headers=None, json=None, read_timeout=None):
+        state["started"] += 1
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        state["finished"] += 1
+        return httpx.Response(200, json=[{"generated_text": "late"}])
+
+    agent.http_client.post = slow_post
+
+    async def scenario():
+        meta = {}
+        await agent.generate_response("tell me about sw80", "product", meta)
+        await asyncio.sleep(0.05)
+        # Snapshot before asyncio.run cancels whatever is still running
+        return meta, dict(state)
+
+    meta, state = asyncio.run(scenario())
+    assert meta["agent_used"] == "local"
+    assert state == {"started": 1, "finished": 0, "cancelled": 1}
+    assert agent.hf_breaker.stats()["state"] == "closed"
@@ -0,0 +1,80 @@
+import time
+import random
+
+import pytest
+
+from agents.product_catalog import Product, ProductCatalog
+from agents.product_search import ProductSearchIndex
+
+CATEGORIES = ["static_models", "flying_models", "tools", "paints", "kits"]
+WORDS = ["balsa", "alpha", "alpine", "alpaca", "spitfire", "rafale", "glider", "trainer", "scale", "laser",
+         "cut", "kit", "wing", "jet", "display", "model", "virus", "mustang", "hurricane", "zero"]
+
+
+@pytest.fixture(scope="module")
+def index():
+    rng = random.Random(7)
+    products = []
+    for i in range(10000):
+        words = rng.sample(WORDS, 4)
+        products.append(Product(f"sku{i}", {
+            "name": " ".join(words[:2]).title() + f" {i}",
+            "category": rng.choice(CATEGORIES),
+            "price": f"₹{rng.randint(100, 10000):,}.00" if i % 50 else "Prices vary",
+            "description": " ".join(rng.choices(WORDS, k=12)),
+            "features": ["Model kit"],
+        }))
+    return ProductSearchIndex(ProductCatalog(products))
+
+
+def _exact(index, query, limit, accept):
+    groups = [[token] for token in query.split()]
+    return index._rank(groups, limit, accept, False, None)
+
+
+@pytest.mark.parametrize("filters", [
+    {"min_price": 5000, "max_price": 5100},
+    {"category": "tools", "max_price": 600},
+    {"min_price": 9990},
+])
+def test_selective_filters_match_a_full_scan(index, filters):
+    def accept(doc_id):
+        product = index._products[doc_id]
+        if filters.get("category") and product.category != filters["category"]:
+            return False
+        price = product.price_value
+        if "min_price" in filters and (price is None or price < filters["min_price"]):
+            return False
+        if "max_price" in filters and (price is None or price > filters["max_price"]):
+            return False
+        return True
+
+    hits = index.search("model kit", limit=10, **filters)
+    expected = _exact(index, "model kit", 10, accept)
+    assert [hit.product.sku for hit in hits] == [hit.product.sku for hit in expected]
+    assert all(accept(index._doc_ids[hit.product.sku]) for hit in hits)
+
+
+def test_selective_filters_score_only_candidates(index, monkeypatch):
+    def no_posting_scan(*args, **kwargs):
+        raise AssertionError("posting lists scanned despite a selective filter")
+
+    monkeypatch.setattr(index, "_rank", no_posting_scan)
+    assert index.search("alp", limit=5, prefix=True, min_price=2000, max_price=2050)
+    assert index.search("balsa", limit=5, category="tools", max_price=200)
+
+
+def test_broad_filter_still_applies(index):
+    hits = index.search("model kit", limit=20, category="paints", min_price=1000)
+    assert len(hits) == 20
+    assert all(hit.product.category == "paints" and hit.product.price_value >= 1000 for hit in hits)
+
+
+def test_price_filtered_common_term_is_fast(index):
+    index.search("model", limit=10, min_price=5000, max_price=5100)
+    start = time.perf_counter()
+    for _ in range(100):
+        index.search("model", limit=10, min_price=5000, max_price=5100)
+        index.search("alp", limit=10, prefix=True, min_price=5000, max_price=5100)
+    # Generous bound for slow CI machines; the unfiltered full scan takes several ms
+    assert (time.perf_counter() - start) / 200 < 0.002
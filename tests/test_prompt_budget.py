@@ -0,0 +1,37 @@
+import pytest
+
+from agents.prompt_budget import estimate_tokens
+from agents.statica_ai_agent import StaticaAIAgent
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.delenv("HF_TOKEN", raising=False)
+    return StaticaAIAgent()
+
+
+def test_unknown_agent_type_uses_default_template(agent):
+    compiler = agent.prompt_compiler
+    version = agent.catalog_version
+    assert compiler.get("unknown", version) == compiler.get("product", version)
+    assert compiler.get_template("unknown", version) == compiler.get_template("product", version)
+    assert compiler.get_template("support", version) is None
+
+
+def test_unknown_agent_type_prompt_is_trimmed(agent):
+    full_bytes = agent.prompt_compiler.size("product", agent.catalog_version)
+    prompt = agent._build_system_prompt("unknown", "virus 30cm kit")
+    assert len(prompt.encode("utf-8")) < full_bytes
+
+
+def test_size_matches_compiled_prompt(agent):
+    version = agent.catalog_version
+    for agent_type in ("product", "support", "general"):
+        prompt = agent.prompt_compiler.get(agent_type, version)
+        assert agent.prompt_compiler.size(agent_type, version) == len(prompt.encode("utf-8"))
+
+
+def test_prompt_fits_model_budget(agent):
+    model = "microsoft/DialoGPT-large"
+    prompt = agent._build_system_prompt("product", "which kit is best for ncc", model)
+    assert estimate_tokens(prompt) <= agent.prompt_budget.budget_for(model)
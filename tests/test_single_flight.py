@@ -0,0 +1,73 @@
+import asyncio
+
+from agents.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+        return results, calls, flight.stats()
+
+    results, calls, stats = asyncio.run(scenario())
+    assert results == ["answer"] * 5
+    assert calls == 1
+    assert stats["collapsed"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_cancelling_one_waiter_keeps_shared_work_running():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "answer"
+
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await second, first.cancelled()
+
+    result, first_cancelled = asyncio.run(scenario())
+    assert result == "answer"
+    assert first_cancelled
+
+
+def test_last_waiter_leaving_aborts_upstream():
+    async def scenario():
+        flight = SingleFlight()
+        state = {"started": 0, "cancelled": 0}
+
+        async def work():
+            state["started"] += 1
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                state["cancelled"] += 1
+                raise
+
+        waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        return state, flight.stats()
+
+    state, stats = asyncio.run(scenario())
+    assert state == {"started": 1, "cancelled": 1}
+    assert stats["abandoned"] == 1
+    assert stats["in_flight"] == 0
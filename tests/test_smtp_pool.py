@@ -0,0 +1,74 @@
+import asyncio
+import smtplib
+
+import pytest
+
+import smtp_pool
+from smtp_pool import SMTPConnectionPool, is_transient_error
+
+SMTP_CONFIG = {"server": "smtp.test", "port": 587, "username": "user", "password": "secret"}
+
+
+class FakeSMTP:
+    sent = []
+
+    def __init__(self, *args, **kwargs):
+        self.closed = False
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def sendmail(self, from_addr, to_addrs, data):
+        if to_addrs == ["rejected@example.com"]:
+            raise smtplib.SMTPRecipientsRefused({"rejected@example.com": (550, b"no such user")})
+        FakeSMTP.sent.append(to_addrs[0])
+
+    def noop(self):
+        return 250, b"ok"
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeSMTP.sent = []
+    monkeypatch.setattr(smtp_pool.smtplib, "SMTP", FakeSMTP)
+    pool = SMTPConnectionPool(SMTP_CONFIG, {"pool_size": 8})
+    yield pool
+    pool.close()
+
+
+def test_counters_are_exact_under_concurrent_sends(pool):
+    async def scenario():
+        await asyncio.gather(*(
+            pool.send_raw("from@example.com", [f"user{i}@example.com"], b"body") for i in range(400)
+        ))
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert len(FakeSMTP.sent) == 400
+    assert stats["sent"] == 400
+    assert stats["opened"] + stats["reused"] == 400
+    assert stats["opened"] <= 8
+
+
+def test_rejected_recipient_keeps_the_connection(pool):
+    async def scenario():
+        with pytest.raises(smtplib.SMTPRecipientsRefused) as error:
+            await pool.send_raw("from@example.com", ["rejected@example.com"], b"body")
+        await pool.send_raw("from@example.com", ["ok@example.com"], b"body")
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert not is_transient_error(error)
+    stats = pool.stats()
+    assert stats["failed"] == 1
+    assert stats["opened"] == 1
+    assert stats["reused"] == 1
@@ -0,0 +1,67 @@
+import html
+import email
+from email import policy
+
+import pytest
+
+from email_templates import EmailTemplates
+from template_compiler import TemplateCompiler
+
+
+@pytest.fixture
+def compiler():
+    return TemplateCompiler(EmailTemplates())
+
+
+def _parts(body: bytes):
+    message = email.message_from_bytes(body, policy=policy.default)
+    return {part.get_content_type(): part.get_content() for part in message.iter_parts()}
+
+
+@pytest.mark.parametrize("custom_message", [None, "<p>Runway = clear ✈</p>"])
+@pytest.mark.parametrize("email_type", EmailTemplates.template_types())
+def test_mime_body_matches_plain_render(compiler, email_type, custom_message):
+    name = "Ananya <Café> " + "x" * 120
+    subject, body = compiler.render_mime(email_type, custom_message, {"name": name})
+    expected = EmailTemplates().get_template(email_type, custom_message, {"name": name})
+    # User fields are HTML-escaped in the html part; custom_message is not
+    expected_html = EmailTemplates().get_template(email_type, custom_message, {"name": html.escape(name)})
+    parts = _parts(body)
+
+    assert subject == expected["subject"]
+    assert parts["text/plain"].replace("\r\n", "\n") == expected["text_body"]
+    assert parts["text/html"].replace("\r\n", "\n") == expected_html["html_body"]
+    assert all(len(line) <= 78 for line in body.split(b"\r\n"))
+
+
+def test_rendered_bodies_are_cached_by_relevant_fields(compiler):
+    first = compiler.render_mime("welcome", None, {"name": "Pilot", "unused": 1})
+    second = compiler.render_mime("welcome", None, {"name": "Pilot", "unused": 2})
+    third = compiler.render_mime("welcome", None, {"name": "Navigator"})
+
+    assert second is first
+    assert third != first
+    stats = compiler.stats()
+    assert stats["compiles"] == 1
+    assert stats["cache_hits"] == 1
+    assert stats["cached_bodies"] == 2
+
+
+def test_expired_compile_drops_only_its_own_bodies(compiler):
+    compiler.config["ttl"] = 0
+    compiler.render_mime("welcome", None, {"name": "Pilot"})
+    compiler.render_mime("ncc_guide", None, {"name": "Pilot"})
+    compiler.render_mime("welcome", None, {"name": "Pilot"})
+
+    assert compiler.stats()["cached_bodies"] == 2
+    assert compiler.stats()["compiles"] == 3
+
+
+def test_crlf_in_values_never_leaves_a_bare_cr(compiler):
+    custom_message = "<p>Line one</p>\r\n<p>Line two</p>\rend"
+    subject, body = compiler.render_mime("welcome", custom_message, {"name": "Al\r\nice"})
+
+    assert b"\r" not in body.replace(b"\r\n", b"")
+    parts = {content_type: text.replace("\r\n", "\n") for content_type, text in _parts(body).items()}
+    assert "Al\nice" in parts["text/plain"]
+    assert "<p>Line one</p>\n<p>Line two</p>\nend" in parts["text/html"]